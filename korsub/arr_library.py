@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Streaming Radarr/Sonarr library ingestion
+The /movie, /series and /episodefile responses are JSON arrays of large nested
+objects (images, ratings, alternate titles...) of which a scan uses a handful
+of fields. iter_json_array() decodes one array element at a time from the
+response stream, and each element is immediately projected into a small
+__slots__ record, so memory no longer grows with the size of the response.
+The same goes for /history/since, which delta scans read.
+"""
+
+import re
+import json
+import codecs
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+# Response bytes read at a time
+READ_SIZE = 64 * 1024
+
+SEPARATORS = re.compile(r'[\s,]*')
+WHITESPACE = re.compile(r'\s*')
+
+_decoder = json.JSONDecoder()
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Yield the elements of a JSON array as its bytes arrive
+
+    Args:
+        chunks: UTF-8 encoded pieces of a top-level JSON array
+
+    Yields:
+        Each decoded element, in order
+
+    Raises:
+        ValueError: The input is not a JSON array, is malformed or is truncated
+    """
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ''
+    position = 0
+    opened = False
+    finished = False
+
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+
+        if position < len(buffer):
+            if not opened:
+                if buffer[position] != '[':
+                    raise ValueError(f"Expected a JSON array, got {buffer[position:position + 20]!r}")
+                opened = True
+                position += 1
+                continue
+
+            if buffer[position] == ']':
+                return
+
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Most likely the element continues in the next chunk
+                if finished:
+                    raise
+            else:
+                # Only complete once "," or "]" follows: a number cut off by the
+                # chunk boundary ("12" of "125", "1." of "1.5") also decodes
+                following = WHITESPACE.match(buffer, end).end()
+                if following < len(buffer) and buffer[following] in ',]':
+                    yield item
+                    position = end
+                    continue
+                if finished:
+                    raise ValueError(f"Malformed JSON array near {buffer[end:end + 20]!r}")
+
+        elif finished:
+            raise ValueError("Truncated JSON array")
+
+        # Keep only the unparsed tail, then read on
+        buffer = buffer[position:]
+        position = 0
+        chunk = next(chunks, None)
+        if chunk is None:
+            buffer += text_decoder.decode(b'', final=True)
+            finished = True
+        else:
+            buffer += text_decoder.decode(chunk)
+
+
+def _fps(media_file: Dict) -> Optional[float]:
+    fps = (media_file.get('mediaInfo') or {}).get('videoFps')
+    return float(fps) if fps else None
+
+
+class MovieRecord:
+    """The fields of a Radarr movie a scan uses"""
+
+    __slots__ = ('id', 'title', 'year', 'imdb_id', 'tmdb_id', 'path', 'scene_name', 'fps', 'popularity')
+
+    def __init__(self, id, title, year, imdb_id, tmdb_id, path, scene_name=None, fps=None, popularity=0):
+        self.id = id
+        self.title = title
+        self.year = year
+        self.imdb_id = imdb_id
+        self.tmdb_id = tmdb_id
+        self.path = path
+        self.scene_name = scene_name
+        self.fps = fps
+        self.popularity = popularity
+
+    @classmethod
+    def from_json(cls, movie: Dict) -> Optional['MovieRecord']:
+        """Project a /api/v3/movie element; None for movies without a file"""
+        movie_file = movie.get('movieFile') or {}
+        if not movie.get('hasFile') or not movie_file.get('path'):
+            return None
+        return cls(
+            movie['id'],
+            movie.get('title'),
+            movie.get('year'),
+            movie.get('imdbId'),
+            movie.get('tmdbId'),
+            movie_file['path'],
+            movie_file.get('sceneName'),
+            _fps(movie_file),
+            movie.get('popularity') or 0
+        )
+
+    def __repr__(self) -> str:
+        return f"MovieRecord({self.id}, {self.title!r}, {self.year})"
+
+
+class SeriesRecord:
+    """The fields of a Sonarr series a scan uses"""
+
+    __slots__ = ('id', 'title', 'imdb_id', 'votes', 'episode_file_count')
+
+    def __init__(self, id, title, imdb_id, votes=0, episode_file_count=None):
+        self.id = id
+        self.title = title
+        self.imdb_id = imdb_id
+        self.votes = votes
+        self.episode_file_count = episode_file_count
+
+    @classmethod
+    def from_json(cls, series: Dict) -> 'SeriesRecord':
+        """Project a /api/v3/series element"""
+        return cls(
+            series['id'],
+            series.get('title'),
+            series.get('imdbId'),
+            (series.get('ratings') or {}).get('votes') or 0,
+            (series.get('statistics') or {}).get('episodeFileCount')
+        )
+
+    def __repr__(self) -> str:
+        return f"SeriesRecord({self.id}, {self.title!r})"
+
+
+class EpisodeFileRecord:
+    """The fields of a Sonarr episode file a scan uses"""
+
+    __slots__ = ('id', 'season', 'path', 'scene_name', 'fps')
+
+    def __init__(self, id, season, path, scene_name=None, fps=None):
+        self.id = id
+        self.season = season
+        self.path = path
+        self.scene_name = scene_name
+        self.fps = fps
+
+    @classmethod
+    def from_json(cls, episode_file: Dict) -> Optional['EpisodeFileRecord']:
+        """Project a /api/v3/episodefile element; None if it has no path"""
+        if not episode_file.get('path'):
+            return None
+        return cls(
+            episode_file.get('id'),
+            episode_file.get('seasonNumber'),
+            episode_file['path'],
+            episode_file.get('sceneName'),
+            _fps(episode_file)
+        )
+
+    def __repr__(self) -> str:
+        return f"EpisodeFileRecord({self.path!r})"
+
+
+def stream_records(response, project: Callable[[Dict], Any]) -> Iterator[Any]:
+    """
+    Records from a streamed arr API response
+
+    Args:
+        response: requests response opened with stream=True
+        project: Record constructor (e.g. MovieRecord.from_json); None results are skipped
+
+    Yields:
+        One record per kept array element
+    """
+    with response:
+        for item in iter_json_array(response.iter_content(chunk_size=READ_SIZE)):
+            record = project(item)
+            if record is not None:
+                yield record
+
+
+class HistoryRecord:
+    """One Radarr/Sonarr history event: what happened to which movie or episode"""
+
+    __slots__ = ('id', 'date', 'event_type', 'movie_id', 'series_id', 'season')
+
+    def __init__(self, id, date, event_type, movie_id=None, series_id=None, season=None):
+        self.id = id
+        self.date = date
+        self.event_type = event_type
+        self.movie_id = movie_id
+        self.series_id = series_id
+        self.season = season
+
+    @classmethod
+    def from_json(cls, event: Dict) -> 'HistoryRecord':
+        """Project a /api/v3/history/since element (Sonarr's with includeEpisode=true)"""
+        return cls(
+            event['id'],
+            event.get('date'),
+            event.get('eventType'),
+            event.get('movieId'),
+            event.get('seriesId'),
+            (event.get('episode') or {}).get('seasonNumber')
+        )
+
+    def __repr__(self) -> str:
+        return f"HistoryRecord({self.id}, {self.event_type!r}, {self.date!r})"
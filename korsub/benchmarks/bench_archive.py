@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Archive download microbenchmark
+Feeds the saved archives in fixtures/archives (a zip and a 7z written by
+libarchive, each holding CP949 subtitles for two episodes and an English one)
+through save_subtitle() in download-sized chunks, checks the saved .ko.srt
+against expected.json for each episode and reports the time per download.
+
+Usage: python benchmarks/bench_archive.py [--iterations N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subtitle_sink import save_subtitle  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'archives')
+
+CHUNK_SIZE = 8192
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=200, help='downloads per archive and episode')
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES, 'expected.json'), encoding='utf-8') as f:
+        expected = json.load(f)
+
+    workdir = tempfile.mkdtemp(prefix='korsub-archive-')
+    failures = 0
+    for name, targets in expected.items():
+        with open(os.path.join(FIXTURES, name), 'rb') as f:
+            data = f.read()
+        chunks = [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+
+        for target, text in targets.items():
+            save_path = os.path.join(workdir, os.path.splitext(target)[0] + '.ko.srt')
+            try:
+                save_subtitle(chunks, save_path)
+            except Exception as e:
+                print(f"FAILED: {name} for {target}: {e}")
+                failures += 1
+                continue
+            with open(save_path, encoding='utf-8') as f:
+                if f.read() != text:
+                    print(f"MISMATCH: {name} for {target}")
+                    failures += 1
+                    continue
+
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                save_subtitle(chunks, save_path)
+            seconds = (time.perf_counter() - start) / args.iterations
+            print(f"  {name:<12} {target:<18} {len(data):>6} bytes  {seconds * 1000:8.3f} ms/download")
+
+    if failures:
+        print(f"{failures} archive/episode failure(s) against expected.json")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
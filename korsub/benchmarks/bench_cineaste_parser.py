@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Cineaste board parser microbenchmark
+Parses the saved board pages in fixtures/cineaste with every available parser
+backend, checks each against expected.json (so a markup change that breaks one
+backend is caught) and reports the time per page against the original
+full-page BeautifulSoup parse.
+
+Usage: python benchmarks/bench_cineaste_parser.py [--iterations N]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cineaste_scraper import CineasteScraper, PARSERS  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'cineaste')
+
+
+def legacy_parser() -> Callable[[bytes], List[Dict]]:
+    """The pre-fast-path parse: the whole page through BeautifulSoup"""
+    from bs4 import BeautifulSoup
+
+    def parse(content: bytes) -> List[Dict]:
+        soup = BeautifulSoup(content, 'html.parser')
+        results = []
+        for link in soup.find_all('a', href=re.compile(r'wr_id=\d+')):
+            href = link.get('href', '')
+            title = link.get_text(strip=True)
+            if '#c_' in href or 'psd_caption' not in href or not title or len(title) < 3:
+                continue
+            results.append({'title': title, 'wr_id': re.search(r'wr_id=(\d+)', href).group(1)})
+        return results
+
+    return parse
+
+
+def available_backends() -> Dict[str, Callable[[bytes], List[Dict]]]:
+    backends = {}
+    for parser in PARSERS:
+        scraper = CineasteScraper(parser)
+        try:
+            scraper._parse_results(b'<a href="board.php?bo_table=psd_caption&wr_id=1">probe</a>')
+        except ImportError as e:
+            print(f"skipping {parser}: {e}")
+            continue
+        backends[parser] = scraper._parse_results
+    return backends
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--iterations', type=int, default=50, help='parses per page per backend')
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES, 'expected.json'), encoding='utf-8') as f:
+        expected = json.load(f)
+    pages = {}
+    for name in sorted(expected):
+        with open(os.path.join(FIXTURES, name), 'rb') as f:
+            pages[name] = f.read()
+
+    backends = available_backends()
+    failures = 0
+    for backend, parse in backends.items():
+        for name, content in pages.items():
+            if parse(content) != expected[name]:
+                print(f"MISMATCH: {backend} on {name}")
+                failures += 1
+
+    timings = {}
+    try:
+        candidates = dict(backends, legacy=legacy_parser())
+    except ImportError:
+        candidates = backends
+    for backend, parse in candidates.items():
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for content in pages.values():
+                parse(content)
+        timings[backend] = (time.perf_counter() - start) / (args.iterations * len(pages))
+
+    baseline = timings.get('legacy')
+    print(f"{len(pages)} pages, {sum(len(c) for c in pages.values()) // 1024} KiB, {args.iterations} iterations")
+    for backend, seconds in sorted(timings.items(), key=lambda item: item[1]):
+        speedup = f"  {baseline / seconds:5.1f}x" if baseline else ""
+        print(f"  {backend:<12} {seconds * 1000:8.3f} ms/page{speedup}")
+
+    if failures:
+        print(f"{failures} backend/page mismatch(es) against expected.json")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
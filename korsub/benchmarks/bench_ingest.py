@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Radarr library ingestion benchmark
+Fetches a synthetic /api/v3/movie response of growing size from the fake
+services and compares response.json() (the whole library as nested dicts)
+with streaming into MovieRecords, and with the (value, id) sort keys a scan
+now keeps: peak traced memory and time per library.
+
+Usage: python benchmarks/bench_ingest.py [--sizes 1000,10000,40000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import requests  # noqa: E402
+
+from arr_library import MovieRecord, stream_records  # noqa: E402
+from fake_services import FakeServices  # noqa: E402
+
+
+def load_json(session: requests.Session, url: str) -> list:
+    """Previous ingestion: the full response decoded at once"""
+    response = session.get(url, timeout=300)
+    response.raise_for_status()
+    movies = [movie for movie in response.json() if movie.get('hasFile')]
+    movies.sort(key=lambda movie: movie.get('popularity') or 0, reverse=True)
+    return movies
+
+
+def load_records(session: requests.Session, url: str) -> list:
+    """Streaming ingestion into compact records"""
+    response = session.get(url, timeout=300, stream=True)
+    response.raise_for_status()
+    return sorted(stream_records(response, MovieRecord.from_json), key=lambda movie: movie.popularity, reverse=True)
+
+
+def load_keys(session: requests.Session, url: str) -> list:
+    """Streaming ingestion into sort keys only (every movie counted as missing a subtitle)"""
+    response = session.get(url, timeout=300, stream=True)
+    response.raise_for_status()
+    return sorted(((movie.popularity, movie.id) for movie in stream_records(response, MovieRecord.from_json)), reverse=True)
+
+
+def measure(loader, session: requests.Session, url: str):
+    """(seconds, peak MiB, item count); timing and memory are taken in separate runs"""
+    started = time.perf_counter()
+    count = len(loader(session, url))
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    items = loader(session, url)
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    del items
+    return seconds, peak, count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='1000,10000,40000', help='library sizes (movies)')
+    args = parser.parse_args()
+
+    print(
+        f"  {'movies':>7}  {'response':>9}  {'json() peak':>11}  {'records peak':>12}  {'keys peak':>9}  "
+        f"{'json() time':>11}  {'records time':>12}  {'keys time':>9}"
+    )
+    for size in (int(value) for value in args.sizes.split(',')):
+        services = FakeServices(tempfile.mkdtemp(prefix='korsub-ingest-'), movies=size, series=0, latency=0, jitter=0)
+        base_url = services.start()
+        url = f"{base_url}/api/v3/movie"
+        session = requests.Session()
+        try:
+            response_size = len(session.get(url).content) / 2 ** 20
+
+            json_seconds, json_peak, json_count = measure(load_json, session, url)
+            record_seconds, record_peak, record_count = measure(load_records, session, url)
+            key_seconds, key_peak, key_count = measure(load_keys, session, url)
+            if not json_count == record_count == key_count:
+                print(f"Item count mismatch: {json_count} vs {record_count} vs {key_count}")
+                return 1
+
+            print(
+                f"  {size:>7}  {response_size:7.1f}MB  {json_peak:9.1f}MB  {record_peak:10.1f}MB  {key_peak:7.1f}MB  "
+                f"{json_seconds:10.2f}s  {record_seconds:11.2f}s  {key_seconds:8.2f}s"
+            )
+        finally:
+            session.close()
+            services.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
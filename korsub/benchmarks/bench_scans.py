@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+KorSub library scan benchmark
+Starts the fake services, points KorSub at them through its environment
+variables and runs scan_radarr_library / scan_sonarr_library and a Cineaste
+crawl over a synthetic library, reporting items/sec and per-item latency.
+The history scans are timed after --imports new movies (and a tenth as many
+series) are added to the library.
+
+Usage: python benchmarks/bench_scans.py [--movies 10000] [--series 500] [--latency-ms 20] ...
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_services import FakeServices, stable_fraction  # noqa: E402
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def timed(function: Callable, latencies: List[float]) -> Callable:
+    """Wrap a per-item scan function to record its latency"""
+    lock = threading.Lock()
+
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    return wrapper
+
+
+def report(name: str, seconds: float, items: int, latencies: List[float], extra: str = ''):
+    rate = items / seconds if seconds else 0.0
+    print(
+        f"  {name:<10} {items:>7} items in {seconds:7.2f}s  {rate:8.1f} items/s  "
+        f"p50 {percentile(latencies, 0.50) * 1000:7.1f} ms  p99 {percentile(latencies, 0.99) * 1000:7.1f} ms{extra}"
+    )
+
+
+def prepare_media(services: FakeServices, existing: float):
+    """Create the library folders and the Korean subtitles some items already have"""
+    for folder in ('movies', 'tv'):
+        Path(services.media_path, folder).mkdir(parents=True, exist_ok=True)
+
+    for movie_id in range(1, services.movies + 1):
+        if stable_fraction(f"existing:movie:{movie_id}") < existing:
+            Path(services.movie_path(movie_id)).with_suffix('.ko.srt').touch()
+
+    for series_id in range(1, services.series + 1):
+        for season in range(1, services.seasons + 1):
+            for episode in range(1, services.episodes + 1):
+                if stable_fraction(f"existing:episode:{series_id}:{season}:{episode}") < existing:
+                    Path(services.episode_path(series_id, season, episode)).with_suffix('.ko.srt').touch()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--series', type=int, default=500)
+    parser.add_argument('--seasons', type=int, default=2)
+    parser.add_argument('--episodes', type=int, default=10)
+    parser.add_argument('--board-pages', type=int, default=50, help='listing pages on the fake Cineaste board')
+    parser.add_argument('--hit-rate', type=float, default=0.5, help='fraction of titles with Korean subtitles')
+    parser.add_argument('--existing', type=float, default=0.3, help='fraction of items that already have one')
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of provider requests answered 429')
+    parser.add_argument('--concurrency', type=int, default=8, help='SCAN_CONCURRENCY')
+    parser.add_argument('--opensubtitles-rate', type=float, default=1000, help='OPENSUBTITLES_RATE_LIMIT')
+    parser.add_argument('--imports', type=int, default=50, help='movies imported before the history scans')
+    parser.add_argument('--scans', default='radarr,sonarr,history,crawl')
+    parser.add_argument('--log-level', default='ERROR')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='korsub-bench-')
+    services = FakeServices(
+        media_path=os.path.join(workdir, 'media'),
+        movies=args.movies,
+        series=args.series,
+        seasons=args.seasons,
+        episodes=args.episodes,
+        hit_rate=args.hit_rate,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        board_pages=args.board_pages
+    )
+    prepare_media(services, args.existing)
+    base_url = services.start()
+
+    os.environ.update({
+        'KORSUB_DATA_PATH': os.path.join(workdir, 'data'),
+        'MEDIA_PATH': services.media_path,
+        'LOG_LEVEL': args.log_level,
+        'OPENSUBTITLES_BASE_URL': f"{base_url}/api/v1",
+        'OPENSUBTITLES_API_KEY': 'bench',
+        'OPENSUBTITLES_RATE_LIMIT': str(args.opensubtitles_rate),
+        'DOWNLOAD_QUOTA_RESERVE': '0',
+        'CINEASTE_BASE_URL': base_url,
+        'RADARR_URL': base_url,
+        'RADARR_API_KEY': 'bench',
+        'SONARR_URL': base_url,
+        'SONARR_API_KEY': 'bench',
+        'SCAN_CONCURRENCY': str(args.concurrency),
+    })
+
+    import korsub_service_dual as service
+    logging.getLogger().setLevel(args.log_level)
+    service.CineasteScraper.CRAWL_PAGE_DELAY = 0
+
+    print(
+        f"Library: {args.movies} movies, {args.series} series x {args.seasons} seasons x {args.episodes} episodes; "
+        f"latency {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, errors {args.error_rate:.1%}, "
+        f"429s {args.rate_limit_rate:.1%}, concurrency {args.concurrency}"
+    )
+
+    scans = args.scans.split(',')
+    try:
+        if 'radarr' in scans:
+            latencies: List[float] = []
+            service.scan_movie = timed(service.scan_movie, latencies)
+            started = time.perf_counter()
+            service.scan_radarr_library()
+            progress = service.scan_engine.progress().get('radarr', {})
+            report('radarr', time.perf_counter() - started, progress.get('processed', 0), latencies,
+                   f"  downloaded {progress.get('downloaded', 0)}, errors {progress.get('errors', 0)}")
+
+        if 'sonarr' in scans:
+            latencies = []
+            service.scan_season = timed(service.scan_season, latencies)
+            started = time.perf_counter()
+            service.scan_sonarr_library()
+            progress = service.scan_engine.progress().get('sonarr', {})
+            report('sonarr', time.perf_counter() - started, progress.get('processed', 0), latencies,
+                   f"  downloaded {progress.get('downloaded', 0)}, errors {progress.get('errors', 0)} (items are seasons)")
+
+        if 'history' in scans:
+            # The first read only sets the high-water marks
+            service.scan_radarr_history()
+            service.scan_sonarr_history()
+            services.import_movies(args.imports)
+            services.import_series(max(args.imports // 10, 1))
+
+            for name, scan, function in (
+                ('radarr_history', service.scan_radarr_history, 'scan_movie'),
+                ('sonarr_history', service.scan_sonarr_history, 'scan_season')
+            ):
+                latencies = []
+                setattr(service, function, timed(getattr(service, function), latencies))
+                started = time.perf_counter()
+                scan()
+                progress = service.scan_engine.progress().get(name, {})
+                report(name.replace('_history', ' hist'), time.perf_counter() - started, progress.get('processed', 0), latencies,
+                       f"  downloaded {progress.get('downloaded', 0)}, errors {progress.get('errors', 0)}")
+
+        if 'crawl' in scans:
+            latencies = []
+            service.CineasteScraper._parse_results = timed(service.CineasteScraper._parse_results, latencies)
+            started = time.perf_counter()
+            service.crawl_cineaste()
+            report('crawl', time.perf_counter() - started, len(latencies), latencies,
+                   f"  (items are board pages; latency is parse time) {service.cineaste_scraper.index.stats()['posts']} posts indexed")
+
+    finally:
+        services.stop()
+
+    requests_seen: Dict[str, int] = dict(services.requests)
+    print("Fake service requests: " + ", ".join(f"{name} {count}" for name, count in sorted(requests_seen.items())))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
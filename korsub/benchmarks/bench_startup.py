@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+KorSub startup benchmark
+Profiles the service's imports with python -X importtime, then starts the
+service several times and measures time until /health first answers and the
+resident memory once it is idle.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--top 15] [--idle 3]
+"""
+
+import argparse
+import os
+import re
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import List, Tuple
+
+KORSUB_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICE = 'korsub_service_dual'
+
+IMPORT_TIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def service_env(port: int) -> dict:
+    """Environment for an isolated service: own state dir, no arr keys, unreachable Cineaste"""
+    env = {
+        key: value for key, value in os.environ.items()
+        if not key.endswith('_API_KEY') and key != 'PYTHONPROFILEIMPORTTIME'
+    }
+    env.update({
+        'KORSUB_DATA_PATH': tempfile.mkdtemp(prefix='korsub-startup-'),
+        'PORT': str(port),
+        'LOG_LEVEL': 'WARNING',
+        'CINEASTE_BASE_URL': 'http://127.0.0.1:9',
+    })
+    return env
+
+
+def import_profile(top: int) -> Tuple[float, List[Tuple[float, float, str]]]:
+    """Total import time of the service module and its slowest imports (cumulative ms, self ms, name)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {SERVICE}'],
+        cwd=KORSUB_DIR, env=service_env(0), capture_output=True, text=True, check=True
+    )
+    entries = []
+    total = 0.0
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if not match:
+            continue
+        own, cumulative, indent, name = int(match.group(1)), int(match.group(2)), match.group(3), match.group(4)
+        if name == SERVICE:
+            total = cumulative / 1000
+        elif len(indent) <= 2:
+            # Modules the service (or its own modules) import directly
+            entries.append((cumulative / 1000, own / 1000, name))
+    return total, sorted(entries, reverse=True)[:top]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid: int) -> float:
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def start_once(idle: float) -> Tuple[float, float]:
+    """Seconds until /health answers, and RSS after idling"""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, f'{SERVICE}.py'], cwd=KORSUB_DIR, env=service_env(port),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Service exited with {process.returncode}")
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1)
+                break
+            except OSError:
+                time.sleep(0.01)
+        healthy = time.perf_counter() - started
+
+        time.sleep(idle)
+        return healthy, rss_mb(process.pid)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='slowest imports to list')
+    parser.add_argument('--idle', type=float, default=3.0, help='seconds to idle before measuring RSS')
+    args = parser.parse_args()
+
+    total, slowest = import_profile(args.top)
+    print(f"Import of {SERVICE}: {total:.0f} ms")
+    print(f"  {'cumulative':>10}  {'self':>8}  module")
+    for cumulative, own, name in slowest:
+        print(f"  {cumulative:8.1f}ms  {own:6.1f}ms  {name}")
+
+    healthy, rss = zip(*(start_once(args.idle) for _ in range(args.runs)))
+    print(f"Time to first healthy: median {statistics.median(healthy) * 1000:.0f} ms "
+          f"(min {min(healthy) * 1000:.0f}, max {max(healthy) * 1000:.0f}) over {args.runs} runs")
+    print(f"Idle RSS after {args.idle:.0f}s: median {statistics.median(rss):.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
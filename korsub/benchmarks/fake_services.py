@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the services KorSub talks to
+One threaded HTTP server answers the OpenSubtitles (/api/v1/subtitles,
+/api/v1/download), Cineaste (/bbs/board.php) and Radarr/Sonarr (/api/v3/movie,
+/api/v3/series, /api/v3/episodefile, /api/v3/history/since) endpoints KorSub
+uses, over a synthetic library, with configurable latency, error rate and 429
+rate. import_movies() / import_series() add to the library as Radarr/Sonarr
+imports would, with matching history events.
+"""
+
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# OpenSubtitles returns search results 60 to a page
+SUBTITLE_PAGE_SIZE = 60
+
+RELEASES = ('1080p.BluRay.x264-SPARKS', '2160p.WEB-DL.DDP5.1-NTb', '720p.WEBRip.x264-GalaxyRG', '1080p.AMZN.WEB-DL-FLUX')
+
+SRT_BODY = ''.join(
+    f"{i}\n00:{i // 60:02d}:{i % 60:02d},000 --> 00:{i // 60:02d}:{i % 60:02d},900\n벤치마크 자막 {i}\n\n"
+    for i in range(1, 201)
+).encode('cp949')
+
+
+def arr_extras(kind: str, item_id: int) -> Dict:
+    """Bulk Radarr/Sonarr include with every item that KorSub doesn't read"""
+    return {
+        'overview': f"Synthetic {kind} {item_id} overview. " * 12,
+        'images': [
+            {'coverType': cover, 'url': f"/MediaCover/{item_id}/{cover}.jpg", 'remoteUrl': f"https://image.tmdb.org/t/p/original/{item_id}{cover}.jpg"}
+            for cover in ('poster', 'fanart', 'banner')
+        ],
+        'alternateTitles': [
+            {'sourceType': 'tmdb', 'title': f"Synthetic {kind} {item_id} ({language})", 'language': {'id': index, 'name': language}}
+            for index, language in enumerate(('Korean', 'Japanese', 'French', 'German', 'Spanish'))
+        ],
+        'ratings': {source: {'votes': item_id % 9000, 'value': (item_id % 100) / 10, 'type': 'user'} for source in ('imdb', 'tmdb', 'metacritic')},
+        'genres': ['Drama', 'Science Fiction', 'Thriller'],
+        'tags': [1, 2],
+        'added': '2023-05-01T12:00:00Z',
+        'qualityProfileId': 1,
+        'monitored': True,
+        'rootFolderPath': '/data/media',
+    }
+
+
+def stable_fraction(key: str) -> float:
+    """Deterministic value in [0, 1) for a key, so repeated runs see the same library"""
+    return zlib.crc32(key.encode('utf-8')) / 2 ** 32
+
+
+class FakeServices:
+    """Threaded HTTP server with a synthetic Radarr/Sonarr library and provider catalogue"""
+
+    def __init__(
+        self,
+        media_path: str,
+        movies: int = 10000,
+        series: int = 500,
+        seasons: int = 2,
+        episodes: int = 10,
+        hit_rate: float = 0.5,
+        latency: float = 0.02,
+        jitter: float = 0.01,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        board_pages: int = 50
+    ):
+        """
+        Initialize fake services
+
+        Args:
+            media_path: Root that synthetic file paths live under
+            movies: Radarr movies (all with files)
+            series: Sonarr series
+            seasons: Seasons per series
+            episodes: Episode files per season
+            hit_rate: Fraction of titles the providers have Korean subtitles for
+            latency: Mean added response time in seconds
+            jitter: Uniform +/- spread around the latency
+            error_rate: Fraction of provider requests answered with HTTP 500
+            rate_limit_rate: Fraction of provider requests answered with HTTP 429
+            board_pages: Listing pages on the fake Cineaste board
+        """
+        self.media_path = media_path.rstrip('/')
+        self.movies = movies
+        self.series = series
+        self.seasons = seasons
+        self.episodes = episodes
+        self.hit_rate = hit_rate
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.board_pages = board_pages
+
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+        self._movie_json: Optional[bytes] = None
+        self._series_json: Optional[bytes] = None
+        self._history: List[Dict] = []
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Start serving on a free local port; returns the base URL"""
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                services._dispatch(self, 'GET')
+
+            def do_POST(self):
+                services._dispatch(self, 'POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 256
+        threading.Thread(target=self._server.serve_forever, name="fake-services", daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    # Library
+
+    def movie_path(self, movie_id: int) -> str:
+        year = 1980 + movie_id % 45
+        return f"{self.media_path}/movies/Synthetic.Movie.{movie_id}.{year}.{RELEASES[movie_id % len(RELEASES)]}.mkv"
+
+    def episode_path(self, series_id: int, season: int, episode: int) -> str:
+        return f"{self.media_path}/tv/Synthetic.Show.{series_id}.S{season:02d}E{episode:02d}.{RELEASES[series_id % len(RELEASES)]}.mkv"
+
+    def movie(self, movie_id: int) -> Dict:
+        return {
+            **arr_extras('Movie', movie_id),
+            'id': movie_id,
+            'title': f"Synthetic Movie {movie_id}",
+            'year': 1980 + movie_id % 45,
+            'imdbId': f"tt{1000000 + movie_id}",
+            'tmdbId': movie_id,
+            'hasFile': True,
+            'popularity': stable_fraction(f"popularity:{movie_id}") * 100,
+            'movieFile': {
+                'path': self.movie_path(movie_id),
+                'mediaInfo': {'videoFps': 23.976}
+            }
+        }
+
+    def show(self, series_id: int) -> Dict:
+        return {
+            **arr_extras('Show', series_id),
+            'id': series_id,
+            'title': f"Synthetic Show {series_id}",
+            'imdbId': f"tt{5000000 + series_id}",
+            'ratings': {'votes': int(stable_fraction(f"votes:{series_id}") * 10000), 'value': 7.5},
+            'statistics': {'episodeFileCount': self.seasons * self.episodes}
+        }
+
+    def movie_list(self) -> List[Dict]:
+        return [self.movie(movie_id) for movie_id in range(1, self.movies + 1)]
+
+    def series_list(self) -> List[Dict]:
+        return [self.show(series_id) for series_id in range(1, self.series + 1)]
+
+    def import_movies(self, count: int) -> List[int]:
+        """Add movies to the library, each with a grab and an import history event"""
+        with self._lock:
+            movie_ids = list(range(self.movies + 1, self.movies + count + 1))
+            self.movies += count
+            self._movie_json = None
+            for movie_id in movie_ids:
+                for event_type in ('grabbed', 'downloadFolderImported'):
+                    self._add_event(event_type, movieId=movie_id, sourceTitle=Path(self.movie_path(movie_id)).stem)
+        return movie_ids
+
+    def import_series(self, count: int) -> List[int]:
+        """Add series to the library with an import history event per episode"""
+        with self._lock:
+            series_ids = list(range(self.series + 1, self.series + count + 1))
+            self.series += count
+            self._series_json = None
+            for series_id in series_ids:
+                for season in range(1, self.seasons + 1):
+                    for episode in range(1, self.episodes + 1):
+                        self._add_event(
+                            'downloadFolderImported',
+                            seriesId=series_id,
+                            episodeId=series_id * 10000 + season * 100 + episode,
+                            episode={'seasonNumber': season, 'episodeNumber': episode},
+                            sourceTitle=Path(self.episode_path(series_id, season, episode)).stem
+                        )
+        return series_ids
+
+    def _add_event(self, event_type: str, **fields):
+        """Append a history event (caller holds the lock)"""
+        self._history.append({
+            'id': len(self._history) + 1,
+            'date': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'eventType': event_type,
+            **fields
+        })
+
+    # Request handling
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str):
+        url = urlparse(handler.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        segments = url.path.rstrip('/').split('/')
+        if url.path.startswith('/files/'):
+            endpoint = 'files'
+        elif segments[-1].isdigit():
+            endpoint = f"{segments[-2]}/id"
+        else:
+            endpoint = segments[-1]
+        with self._lock:
+            self.requests[endpoint] += 1
+            roll = self._random.random()
+            delay = max(self.latency + self._random.uniform(-self.jitter, self.jitter), 0)
+
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else b''
+        time.sleep(delay)
+
+        is_provider = url.path.startswith('/api/v1/') or url.path.endswith('board.php')
+        if is_provider and roll < self.rate_limit_rate:
+            with self._lock:
+                self.requests['429'] += 1
+            return self._send(handler, 429, b'{"message":"Throttle limit reached"}', headers={'Retry-After': '1'})
+        if is_provider and roll < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                self.requests['500'] += 1
+            return self._send(handler, 500, b'{"message":"Internal error"}')
+
+        if url.path == '/api/v1/subtitles':
+            results = self._subtitles(params)
+            page = int(params.get('page', 1))
+            return self._json(handler, {
+                'total_pages': max((len(results) + SUBTITLE_PAGE_SIZE - 1) // SUBTITLE_PAGE_SIZE, 1),
+                'total_count': len(results),
+                'page': page,
+                'data': results[(page - 1) * SUBTITLE_PAGE_SIZE:page * SUBTITLE_PAGE_SIZE]
+            })
+        if url.path == '/api/v1/download' and method == 'POST':
+            file_id = json.loads(body or b'{}').get('file_id')
+            reset = (datetime.now(timezone.utc) + timedelta(hours=12)).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+            return self._json(handler, {'link': f"{self.base_url}/files/{file_id}.srt", 'remaining': 100000, 'reset_time_utc': reset})
+        if url.path.startswith('/files/'):
+            return self._send(handler, 200, SRT_BODY, content_type='application/x-subrip')
+        if url.path == '/bbs/board.php':
+            return self._send(handler, 200, self._board(params), content_type='text/html; charset=utf-8')
+        if url.path == '/api/v3/movie':
+            if self._movie_json is None:
+                self._movie_json = json.dumps(self.movie_list()).encode('utf-8')
+            return self._send(handler, 200, self._movie_json)
+        if url.path == '/api/v3/series':
+            if self._series_json is None:
+                self._series_json = json.dumps(self.series_list()).encode('utf-8')
+            return self._send(handler, 200, self._series_json)
+        if url.path == '/api/v3/episodefile':
+            return self._json(handler, self._episode_files(int(params.get('seriesId', 0))))
+        if url.path == '/api/v3/history/since':
+            with self._lock:
+                since = [event for event in self._history if event['date'] >= params.get('date', '')]
+            return self._json(handler, since)
+        if url.path.startswith('/api/v3/movie/') and segments[-1].isdigit():
+            movie_id = int(segments[-1])
+            if movie_id > self.movies:
+                return self._send(handler, 404, b'{"message":"NotFound"}')
+            return self._json(handler, self.movie(movie_id))
+        if url.path.startswith('/api/v3/series/') and segments[-1].isdigit():
+            series_id = int(segments[-1])
+            if series_id > self.series:
+                return self._send(handler, 404, b'{"message":"NotFound"}')
+            return self._json(handler, self.show(series_id))
+
+        self._send(handler, 404, b'{}')
+
+    def _subtitles(self, params: Dict[str, str]) -> List[Dict]:
+        key = params.get('parent_imdb_id') or params.get('imdb_id') or params.get('query') or ''
+        if stable_fraction(f"opensubtitles:{key}") >= self.hit_rate:
+            return []
+
+        season = int(params['season_number']) if 'season_number' in params else None
+        episodes = range(1, self.episodes + 1) if season is not None else [None]
+        results = []
+        for episode in episodes:
+            for variant in range(2):
+                file_id = zlib.crc32(f"{key}:{season}:{episode}:{variant}".encode('utf-8'))
+                results.append({
+                    'id': str(file_id),
+                    'type': 'subtitle',
+                    'attributes': {
+                        'language': 'ko',
+                        'release': f"Synthetic.{key}.{RELEASES[(file_id + variant) % len(RELEASES)]}",
+                        'download_count': file_id % 5000,
+                        'ratings': (file_id % 100) / 10,
+                        'fps': 23.976,
+                        'hearing_impaired': False,
+                        'moviehash_match': False,
+                        'uploader': {'name': 'bench'},
+                        'feature_details': {
+                            'feature_type': 'Episode' if season is not None else 'Movie',
+                            'season_number': season,
+                            'episode_number': episode
+                        },
+                        'files': [{'file_id': file_id, 'file_name': f"{file_id}.srt"}]
+                    }
+                })
+        return results
+
+    def _board(self, params: Dict[str, str]) -> bytes:
+        search = params.get('stx')
+        if search:
+            hit = stable_fraction(f"cineaste:{search.lower()}") < self.hit_rate
+            posts = [(900000 + zlib.crc32(search.encode('utf-8')) % 90000, f"{search} 자막")] if hit else []
+        else:
+            page = int(params.get('page', 1))
+            newest = 100000 - (page - 1) * 30
+            posts = [
+                (wr_id, f"Synthetic Movie {wr_id} ({1980 + wr_id % 45}) 1080p 자막")
+                for wr_id in range(newest, newest - 30, -1)
+            ] if page <= self.board_pages else []
+
+        rows = ''.join(
+            f'<tr><td class="td_subject"><div class="bo_tit">'
+            f'<a href="{self.base_url}/bbs/board.php?bo_table=psd_caption&amp;wr_id={wr_id}">{title}</a>'
+            f'</div></td></tr>\n'
+            for wr_id, title in posts
+        )
+        return (
+            '<html><body><div id="hd">header</div>'
+            f'<form name="fboardlist" id="fboardlist" method="post"><table><tbody>\n{rows}</tbody></table></form>'
+            '</body></html>'
+        ).encode('utf-8')
+
+    def _episode_files(self, series_id: int) -> List[Dict]:
+        return [
+            {
+                'id': series_id * 10000 + season * 100 + episode,
+                'seriesId': series_id,
+                'seasonNumber': season,
+                'path': self.episode_path(series_id, season, episode),
+                'mediaInfo': {'videoFps': 23.976}
+            }
+            for season in range(1, self.seasons + 1)
+            for episode in range(1, self.episodes + 1)
+        ]
+
+    def _json(self, handler: BaseHTTPRequestHandler, payload):
+        self._send(handler, 200, json.dumps(payload).encode('utf-8'))
+
+    @staticmethod
+    def _send(handler: BaseHTTPRequestHandler, status: int, body: bytes,
+              content_type: str = 'application/json', headers: Optional[Dict[str, str]] = None):
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Local index of the Cineaste subtitle board
+Posts from the psd_caption board (Korean category) are crawled newest-first into
+SQLite with a trigram table over normalized titles, so searches are answered
+locally instead of with live board requests.
+"""
+
+import re
+import time
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from storage import connect
+
+logger = logging.getLogger("CineasteIndex")
+
+NORMALIZE_PATTERN = re.compile(r'[^0-9a-z가-힣]+')
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase letters, digits and Hangul separated by single spaces"""
+    return NORMALIZE_PATTERN.sub(' ', (title or '').lower()).strip()
+
+
+def trigrams(words: Iterable[str]) -> Set[str]:
+    """Trigrams within each word (words shorter than three characters have none)"""
+    return {word[i:i + 3] for word in words for i in range(len(word) - 2)}
+
+
+class CineasteIndex:
+    """Crawled board posts with normalized-title trigram lookup and crawl state"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cineaste_posts (
+        wr_id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        normalized TEXT NOT NULL,
+        url TEXT NOT NULL,
+        crawled_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS cineaste_trigrams (
+        trigram TEXT NOT NULL,
+        wr_id INTEGER NOT NULL,
+        PRIMARY KEY (trigram, wr_id)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS cineaste_crawl (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        last_wr_id INTEGER NOT NULL DEFAULT 0,
+        pending_top INTEGER,
+        resume_page INTEGER,
+        etag TEXT,
+        last_modified TEXT,
+        crawled_at REAL
+    );
+    INSERT OR IGNORE INTO cineaste_crawl (id) VALUES (1);
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_age: float = 7200):
+        """
+        Initialize index
+
+        Args:
+            db_path: SQLite database path (in-memory database if None)
+            max_age: Seconds after the last complete crawl before the index counts as stale
+        """
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._conn = connect(db_path or ':memory:')
+        with self._lock, self._conn:
+            self._conn.executescript(self.SCHEMA)
+
+        self.lookups = 0
+
+    def add(self, entries: Iterable[Dict]) -> int:
+        """
+        Insert or update parsed board entries
+
+        Args:
+            entries: Results as returned by CineasteScraper._parse_results()
+
+        Returns:
+            Number of posts not previously indexed
+        """
+        now = time.time()
+        added = 0
+        with self._lock, self._conn:
+            for entry in entries:
+                wr_id = int(entry['wr_id'])
+                normalized = normalize_title(entry['title'])
+                existing = self._conn.execute(
+                    "SELECT normalized FROM cineaste_posts WHERE wr_id = ?", (wr_id,)
+                ).fetchone()
+                if existing is None:
+                    added += 1
+                elif existing['normalized'] != normalized:
+                    # Title edited since it was indexed
+                    self._conn.execute("DELETE FROM cineaste_trigrams WHERE wr_id = ?", (wr_id,))
+
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cineaste_posts (wr_id, title, normalized, url, crawled_at) VALUES (?, ?, ?, ?, ?)",
+                    (wr_id, entry['title'], normalized, entry['url'], now)
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO cineaste_trigrams (trigram, wr_id) VALUES (?, ?)",
+                    [(trigram, wr_id) for trigram in trigrams(normalized.split())]
+                )
+        return added
+
+    def search(self, term: str, limit: int = 100) -> List[Dict]:
+        """
+        Posts whose title contains every word of the term (like the board's subject search)
+
+        Args:
+            term: Search term
+            limit: Maximum results
+
+        Returns:
+            Results shaped like CineasteScraper._parse_results(), newest first
+        """
+        words = normalize_title(term).split()
+        if not words:
+            return []
+
+        grams = sorted(trigrams(words))
+        with self._lock:
+            self.lookups += 1
+            if grams:
+                placeholders = ','.join('?' * len(grams))
+                rows = self._conn.execute(
+                    f"""
+                    SELECT p.wr_id, p.title, p.normalized, p.url FROM cineaste_posts p
+                    JOIN (
+                        SELECT wr_id FROM cineaste_trigrams WHERE trigram IN ({placeholders})
+                        GROUP BY wr_id HAVING COUNT(*) = ?
+                    ) t ON t.wr_id = p.wr_id
+                    ORDER BY p.wr_id DESC
+                    """,
+                    grams + [len(grams)]
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT wr_id, title, normalized, url FROM cineaste_posts WHERE normalized LIKE ? ORDER BY wr_id DESC",
+                    (f"%{words[0]}%",)
+                ).fetchall()
+
+        results = []
+        for row in rows:
+            if all(word in row['normalized'] for word in words):
+                results.append({
+                    'title': row['title'],
+                    'url': row['url'],
+                    'wr_id': str(row['wr_id']),
+                    'source': 'cineaste.co.kr'
+                })
+                if len(results) >= limit:
+                    break
+        return results
+
+    def crawl_state(self) -> Dict:
+        """last_wr_id, pending_top, resume_page, etag, last_modified and crawled_at"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT * FROM cineaste_crawl WHERE id = 1").fetchone())
+
+    def save_crawl_state(self, **fields):
+        """Update crawl state columns (see crawl_state())"""
+        if not fields:
+            return
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE cineaste_crawl SET {assignments} WHERE id = 1", list(fields.values()))
+
+    def is_fresh(self) -> bool:
+        """Whether a complete crawl finished within max_age"""
+        state = self.crawl_state()
+        return (
+            state['resume_page'] is None
+            and state['last_wr_id'] > 0
+            and state['crawled_at'] is not None
+            and time.time() - state['crawled_at'] < self.max_age
+        )
+
+    def stats(self) -> Dict:
+        """Index size, crawl position and freshness"""
+        state = self.crawl_state()
+        with self._lock:
+            posts = self._conn.execute("SELECT COUNT(*) FROM cineaste_posts").fetchone()[0]
+        return {
+            'posts': posts,
+            'last_wr_id': state['last_wr_id'],
+            'backfill_page': state['resume_page'],
+            'crawled_seconds_ago': round(time.time() - state['crawled_at']) if state['crawled_at'] else None,
+            'fresh': self.is_fresh(),
+            'lookups': self.lookups
+        }
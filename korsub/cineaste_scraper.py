@@ -3,28 +3,81 @@
 Cineaste.co.kr Scraper - Fallback for movies not on OpenSubtitles
 """
 
+import os
 import requests
-from bs4 import BeautifulSoup
 import logging
 import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html import unescape
 from urllib.parse import urljoin
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Tuple
+
+from cineaste_index import CineasteIndex, normalize_title
+from http_pool import SessionPool
 
 logger = logging.getLogger("Cineaste")
 
+PARSERS = ('fast', 'lxml', 'html.parser')
+
+# The post list of a gnuboard board page lives in <form name="fboardlist">;
+# headers, sidebars and "latest posts" widgets outside it are skipped
+BOARD_LIST_START = re.compile(r'<form\b[^>]*\bname\s*=\s*["\']?fboardlist', re.I)
+BOARD_LIST_END = re.compile(r'</form\s*>', re.I)
+
+WR_ID_PATTERN = re.compile(r'wr_id=(\d+)')
+ANCHOR_PATTERN = re.compile(r'<a\b([^>]*)>(.*?)</a\s*>', re.I | re.S)
+HREF_PATTERN = re.compile(r'\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.I)
+COMMENT_PATTERN = re.compile(r'<!--.*?-->', re.S)
+TAG_PATTERN = re.compile(r'<[^>]*>')
+
 
 class CineasteScraper:
     """Scraper for Cineaste.co.kr subtitle board"""
 
-    BASE_URL = "https://cineaste.co.kr"
+    BASE_URL = os.getenv("CINEASTE_BASE_URL", "https://cineaste.co.kr")
     SUBTITLE_BOARD_URL = f"{BASE_URL}/bbs/board.php"
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    # Pause between listing pages while crawling
+    CRAWL_PAGE_DELAY = 1.0
+
+    def __init__(
+        self,
+        parser: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        index: Optional[CineasteIndex] = None
+    ):
+        """
+        Initialize scraper
+
+        Args:
+            parser: Board page parser - "fast" (regex over the post list, default),
+                "lxml" or "html.parser" (BeautifulSoup); defaults to CINEASTE_PARSER
+            max_connections: Board requests in flight at once across all callers;
+                defaults to CINEASTE_MAX_CONNECTIONS (4)
+            index: Local board index answering searches while fresh (see crawl_board())
+        """
+        self.parser = parser or os.getenv("CINEASTE_PARSER", "fast")
+        if self.parser not in PARSERS:
+            raise ValueError(f"Unknown Cineaste parser {self.parser!r}, expected one of {', '.join(PARSERS)}")
+
+        self.index = index
+        self.max_connections = max(1, max_connections or int(os.getenv("CINEASTE_MAX_CONNECTIONS", "4")))
+
+        self._sessions = SessionPool(self.max_connections, {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
 
+        # Cap on concurrent requests to cineaste.co.kr, shared by every search
+        self._host_slots = threading.BoundedSemaphore(self.max_connections)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_connections * 2, thread_name_prefix="cineaste")
+
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session for the calling thread"""
+        return self._sessions.session
+
     def search_subtitles(self, title: str, year: Optional[int] = None) -> List[Dict]:
         """
         Search for Korean subtitles on Cineaste subtitle board
@@ -34,38 +87,74 @@ class CineasteScraper:
             year: Release year (optional)
 
         Returns:
-            List of subtitle results
+            List of subtitle results, most specific search term's results first
         """
+        if not title:
+            # Board posts are found by title only; ID-only queries can't be searched
+            return []
+
+        search_terms = self._search_terms(title, year)
+
+        if self.index is not None and self.index.is_fresh():
+            logger.info(f"Searching Cineaste index for: {title} ({year})")
+            unique_results: Dict[str, Dict] = {}
+            for search_term in search_terms:
+                for result in self.index.search(search_term):
+                    unique_results.setdefault(result['wr_id'], result)
+            return list(unique_results.values())
+
         logger.info(f"Searching Cineaste for: {title} ({year})")
 
-        # Try multiple search terms
+        # All term variants go out at once; the host cap in _search_board keeps
+        # concurrent callers from piling onto the board
+        futures = {
+            self._executor.submit(self._search_board, search_term): index
+            for index, search_term in enumerate(search_terms)
+        }
+        results_by_term: Dict[int, List[Dict]] = {}
+
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                results = future.result()
+                results_by_term[index] = results
+                if not results:
+                    continue
+
+                logger.info(f"Found {len(results)} results for '{search_terms[index]}'")
+                if any(self._is_confident_match(result['title'], title, year) for result in results):
+                    break  # Remaining terms can only add looser matches
+        finally:
+            for future in futures:
+                future.cancel()
+
+        # Merge in term order, removing duplicates by wr_id
+        unique_results: Dict[str, Dict] = {}
+        for index in sorted(results_by_term):
+            for result in results_by_term[index]:
+                unique_results.setdefault(result['wr_id'], result)
+
+        return list(unique_results.values())
+
+    @staticmethod
+    def _search_terms(title: str, year: Optional[int] = None) -> List[str]:
+        """Distinct search terms, most specific first"""
         search_terms = [
+            f"{title} {year}" if year else title,  # Title with year
             title,  # Full title
-            title.split(':')[0] if ':' in title else title,  # Before colon
-            title.split('-')[0] if '-' in title else title,  # Before dash
+            title.split(':')[0],  # Before colon
+            title.split('-')[0],  # Before dash
         ]
+        return list(dict.fromkeys(term.strip() for term in search_terms if term.strip()))
 
-        # Add year variant
-        if year:
-            search_terms.insert(0, f"{title} {year}")
-
-        all_results = []
-        for search_term in search_terms:
-            results = self._search_board(search_term.strip())
-            if results:
-                logger.info(f"Found {len(results)} results for '{search_term}'")
-                all_results.extend(results)
-                break  # Stop at first successful search
-
-        # Remove duplicates by wr_id
-        seen_ids = set()
-        unique_results = []
-        for result in all_results:
-            if result['wr_id'] not in seen_ids:
-                seen_ids.add(result['wr_id'])
-                unique_results.append(result)
-
-        return unique_results
+    @staticmethod
+    def _is_confident_match(post_title: str, title: str, year: Optional[int] = None) -> bool:
+        """Whether a post title names the full title (and the year, when known)"""
+        wanted = normalize_title(title)
+        found = normalize_title(post_title)
+        if not wanted or f" {wanted} " not in f" {found} ":
+            return False
+        return year is None or str(year) in found
 
     def _search_board(self, search_term: str) -> List[Dict]:
         """Search the subtitle board"""
@@ -78,25 +167,107 @@ class CineasteScraper:
                 'sop': 'and'
             }
 
-            response = self.session.get(self.SUBTITLE_BOARD_URL, params=params, timeout=10)
+            with self._host_slots:
+                response = self.session.get(self.SUBTITLE_BOARD_URL, params=params, timeout=10)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, 'html.parser')
-            return self._parse_results(soup)
+            return self._parse_results(response.content)
 
         except Exception as e:
             logger.error(f"Cineaste search error: {e}")
             return []
 
-    def _parse_results(self, soup: BeautifulSoup) -> List[Dict]:
+    def crawl_board(self, max_pages: int = 100) -> int:
+        """
+        Add new board posts to the index, walking listing pages newest-first
+
+        Stops at the newest post indexed by the previous complete crawl. A crawl
+        that hits max_pages first (the initial backfill) continues from the
+        same page on the next call; the index is treated as stale until then.
+
+        Args:
+            max_pages: Listing pages fetched per call
+
+        Returns:
+            Number of posts added to the index
+        """
+        if self.index is None:
+            return 0
+
+        state = self.index.crawl_state()
+        target = state['last_wr_id']
+        top = state['pending_top']
+        page = state['resume_page'] or 1
+        previous_oldest = None
+        added = 0
+
+        for fetched in range(max_pages):
+            params = {'bo_table': 'psd_caption', 'sca': '한글', 'page': page}
+
+            # Only the first page is conditional; deeper pages shift whenever it changes
+            headers = {}
+            if page == 1:
+                if state['etag']:
+                    headers['If-None-Match'] = state['etag']
+                if state['last_modified']:
+                    headers['If-Modified-Since'] = state['last_modified']
+
+            try:
+                with self._host_slots:
+                    response = self.session.get(self.SUBTITLE_BOARD_URL, params=params, headers=headers, timeout=10)
+                if response.status_code == 304:
+                    logger.debug("Cineaste board unchanged since last crawl")
+                    self.index.save_crawl_state(crawled_at=time.time())
+                    return added
+                response.raise_for_status()
+            except Exception as e:
+                # Keep the position; the next crawl retries this page
+                logger.error(f"Cineaste crawl error on page {page}: {e}")
+                self.index.save_crawl_state(resume_page=page, pending_top=top)
+                return added
+
+            entries = self._parse_results(response.content)
+            added += self.index.add(entries)
+
+            if page == 1:
+                top = max([int(entry['wr_id']) for entry in entries] + [target])
+                self.index.save_crawl_state(
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
+
+            # The last entry is the oldest regular post (pinned notices sit at the top);
+            # past the end of the board only the notices are left
+            oldest = int(entries[-1]['wr_id']) if entries else 0
+            if oldest <= target or (previous_oldest is not None and oldest >= previous_oldest):
+                self.index.save_crawl_state(last_wr_id=top, pending_top=None, resume_page=None, crawled_at=time.time())
+                logger.info(f"🗂️  Cineaste index up to date: {added} new post(s), newest wr_id {top}")
+                return added
+
+            previous_oldest = oldest
+            page += 1
+            if fetched + 1 < max_pages:
+                time.sleep(self.CRAWL_PAGE_DELAY)
+
+        self.index.save_crawl_state(resume_page=page, pending_top=top)
+        logger.info(f"🗂️  Cineaste index backfill: {added} post(s) added, continuing from page {page} next crawl")
+        return added
+
+    def _parse_results(self, content: bytes) -> List[Dict]:
         """Parse search results from board page"""
+        region = self._board_list_region(content.decode('utf-8', errors='replace'))
+
+        if self.parser == 'fast':
+            links = self._links_fast(region)
+        elif self.parser == 'lxml':
+            links = self._links_lxml(region)
+        else:
+            links = self._links_soup(region)
+
         results = []
 
-        # Find all links with wr_id in the subtitle board
         # Look for article/post links (not comments which have #c_)
-        for link in soup.find_all('a', href=re.compile(r'wr_id=\d+')):
-            href = link.get('href', '')
-
+        for href, title in links:
             # Skip comment links
             if '#c_' in href:
                 continue
@@ -106,12 +277,11 @@ class CineasteScraper:
                 continue
 
             # Extract wr_id
-            wr_id_match = re.search(r'wr_id=(\d+)', href)
+            wr_id_match = WR_ID_PATTERN.search(href)
             if not wr_id_match:
                 continue
 
             wr_id = wr_id_match.group(1)
-            title = link.get_text(strip=True)
 
             # Skip empty titles or navigation links
             if not title or len(title) < 3:
@@ -129,6 +299,55 @@ class CineasteScraper:
         logger.debug(f"Parsed {len(results)} subtitle entries")
         return results
 
+    @staticmethod
+    def _board_list_region(html: str) -> str:
+        """Slice out the board's post list, or the whole page if the markup is unexpected"""
+        start = BOARD_LIST_START.search(html)
+        if not start:
+            return html
+
+        end = BOARD_LIST_END.search(html, start.end())
+        return html[start.start():end.end() if end else len(html)]
+
+    @staticmethod
+    def _links_fast(region: str) -> Iterable[Tuple[str, str]]:
+        """(href, text) of wr_id links using precompiled patterns, no DOM"""
+        for match in ANCHOR_PATTERN.finditer(region):
+            attrs = match.group(1)
+            if 'wr_id=' not in attrs:
+                continue
+
+            href_match = HREF_PATTERN.search(attrs)
+            if not href_match:
+                continue
+            href = unescape(next(group for group in href_match.groups() if group is not None))
+
+            # Same text as BeautifulSoup's get_text(strip=True)
+            body = COMMENT_PATTERN.sub('', match.group(2))
+            text = ''.join(unescape(part).strip() for part in TAG_PATTERN.split(body))
+            yield href, text
+
+    @staticmethod
+    def _links_lxml(region: str) -> Iterable[Tuple[str, str]]:
+        """(href, text) of wr_id links via lxml"""
+        import lxml.html
+
+        tree = lxml.html.fromstring(region)
+        for link in tree.iter('a'):
+            href = link.get('href') or ''
+            if 'wr_id=' not in href:
+                continue
+            yield href, ''.join(part.strip() for part in link.xpath('.//text()'))
+
+    @staticmethod
+    def _links_soup(region: str) -> Iterable[Tuple[str, str]]:
+        """(href, text) of wr_id links via BeautifulSoup's html.parser"""
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(region, 'html.parser')
+        for link in soup.find_all('a', href=WR_ID_PATTERN):
+            yield link.get('href', ''), link.get_text(strip=True)
+
     def download_subtitle(self, wr_id: str, save_path: str) -> bool:
         """
         Download subtitle file from Cineaste
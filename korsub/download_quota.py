@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Daily download quota manager for OpenSubtitles
+Tracks the remaining-downloads figure the /download endpoint reports, persists it
+across restarts and plans each day's downloads: fresh webhook imports may use the
+whole allowance, backlog (scan) downloads stop while a reserve is still left.
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from storage import connect
+
+logger = logging.getLogger("DownloadQuota")
+
+# Wait used when the API has not told us when the quota resets
+DEFAULT_RESET_SECONDS = 3600
+
+
+class DownloadQuotaExceeded(Exception):
+    """No download allowance left for this kind of download until the reset time"""
+
+    def __init__(self, retry_after: float, fresh: bool = True):
+        kind = "downloads" if fresh else "backlog downloads"
+        super().__init__(f"OpenSubtitles daily quota exhausted for {kind}, resets in {retry_after / 60:.0f} min")
+        self.retry_after = retry_after
+        self.fresh = fresh
+
+
+class DownloadQuota:
+    """Remaining daily downloads with a reserve held back for fresh imports"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS download_quota (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        remaining INTEGER,
+        reset_at REAL,
+        updated_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, db_path: Optional[str] = None, reserve: int = 5):
+        """
+        Initialize quota manager
+
+        Args:
+            db_path: SQLite database path (memory-only if None)
+            reserve: Downloads kept back for webhook imports; backlog downloads stop at this level
+        """
+        self.reserve = reserve
+
+        self._lock = threading.Lock()
+        self._remaining: Optional[int] = None
+        self._reset_at: Optional[float] = None
+        self._exhausted_hits = 0
+
+        self._conn = None
+        if db_path:
+            self._conn = connect(db_path)
+            with self._lock, self._conn:
+                self._conn.executescript(self.SCHEMA)
+                row = self._conn.execute("SELECT remaining, reset_at FROM download_quota WHERE id = 1").fetchone()
+            if row is not None:
+                self._remaining, self._reset_at = row['remaining'], row['reset_at']
+                logger.info(f"Loaded download quota: {self._remaining} remaining")
+
+    def acquire(self, fresh: bool = True) -> bool:
+        """
+        Take one download from today's plan
+
+        Args:
+            fresh: True for webhook imports, False for backlog downloads from scans
+
+        Returns:
+            True if a download is now held; give it back with release() if the
+            /download request fails before reporting the real figure
+
+        Raises:
+            DownloadQuotaExceeded: No allowance left for this kind of download
+        """
+        with self._lock:
+            now = time.time()
+            self._roll_over(now)
+
+            # Unknown until the first /download response tells us
+            if self._remaining is None:
+                return False
+
+            floor = 0 if fresh else self.reserve
+            if self._remaining <= floor:
+                self._exhausted_hits += 1
+                raise DownloadQuotaExceeded(self._retry_after(now), fresh)
+
+            # Hold one until the response reports the real figure
+            self._remaining -= 1
+            return True
+
+    def release(self):
+        """Give back a download held by acquire() that the API never counted"""
+        with self._lock:
+            if self._remaining is not None:
+                self._remaining += 1
+
+    def can_download(self, fresh: bool = True) -> bool:
+        """Whether a download of this kind would currently be allowed"""
+        with self._lock:
+            self._roll_over(time.time())
+            if self._remaining is None:
+                return True
+            return self._remaining > (0 if fresh else self.reserve)
+
+    def retry_after(self) -> float:
+        """Seconds until the quota resets"""
+        with self._lock:
+            return self._retry_after(time.time())
+
+    def update(self, remaining: Optional[int], reset_time_utc: Optional[str] = None):
+        """Record the figures from a /download response"""
+        if remaining is None:
+            return
+
+        reset_at = self._parse_reset(reset_time_utc)
+        with self._lock:
+            self._remaining = int(remaining)
+            if reset_at is not None:
+                self._reset_at = reset_at
+            self._save()
+
+    def exhaust(self, reset_time_utc: Optional[str] = None):
+        """Mark the quota as used up (HTTP 406 from /download)"""
+        reset_at = self._parse_reset(reset_time_utc)
+        with self._lock:
+            self._remaining = 0
+            self._reset_at = reset_at or self._reset_at or time.time() + DEFAULT_RESET_SECONDS
+            self._exhausted_hits += 1
+            self._save()
+
+        logger.warning(f"⏸️  Download quota exhausted, downloads paused for {self.retry_after() / 60:.0f} min")
+
+    def stats(self) -> Dict:
+        """Remaining downloads and reset time"""
+        with self._lock:
+            now = time.time()
+            self._roll_over(now)
+            return {
+                'remaining': self._remaining,
+                'reserve_for_imports': self.reserve,
+                'backlog_allowed': self._remaining is None or self._remaining > self.reserve,
+                'resets_in_seconds': round(self._reset_at - now) if self._reset_at else None,
+                'exhausted_hits': self._exhausted_hits
+            }
+
+    def _roll_over(self, now: float):
+        """Forget the old figure once the reset time has passed (caller holds the lock)"""
+        if self._reset_at is not None and now >= self._reset_at:
+            logger.info("🔄 Download quota reset, downloads resumed")
+            self._remaining = None
+            self._reset_at = None
+            self._save()
+
+    def _retry_after(self, now: float) -> float:
+        if self._reset_at is None:
+            return float(DEFAULT_RESET_SECONDS)
+        return max(self._reset_at - now, 1.0)
+
+    def _save(self):
+        """Persist the current figures (caller holds the lock)"""
+        if self._conn is None:
+            return
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO download_quota (id, remaining, reset_at, updated_at) VALUES (1, ?, ?, ?)",
+                (self._remaining, self._reset_at, time.time())
+            )
+
+    @staticmethod
+    def _parse_reset(reset_time_utc: Optional[str]) -> Optional[float]:
+        """Epoch seconds from the API's reset_time_utc (e.g. "2022-04-08T13:03:16.000Z")"""
+        if not reset_time_utc:
+            return None
+        try:
+            return datetime.fromisoformat(reset_time_utc.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            logger.debug(f"Unparseable reset_time_utc: {reset_time_utc}")
+            return None
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Thread-safe HTTP sessions for provider and arr clients
+requests.Session keeps cookies, headers and adapters that aren't meant to be
+shared between threads. SessionPool hands every thread its own session, all
+mounted on one HTTPAdapter whose urllib3 connection pool is thread-safe and
+sized for the callers, so keep-alive connections are still shared.
+"""
+
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class SessionPool:
+    """Per-thread requests sessions over one sized connection pool"""
+
+    def __init__(self, pool_size: int = 10, headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize session pool
+
+        Args:
+            pool_size: Keep-alive connections kept per host
+            headers: Default headers for every session
+        """
+        self.pool_size = pool_size
+        self.headers = dict(headers or {})
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """The calling thread's session"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            session.mount('https://', self._adapter)
+            session.mount('http://', self._adapter)
+            self._local.session = session
+        return session
+
+    def close(self):
+        """Close the pooled connections"""
+        self._adapter.close()
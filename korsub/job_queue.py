@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Persistent job queue for KorSub
+Webhook work is stored in SQLite and drained by a bounded pool of worker threads,
+so queued jobs survive container restarts and graceful shutdowns.
+"""
+
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from storage import connect
+
+logger = logging.getLogger("JobQueue")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    success INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, priority DESC, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at);
+"""
+
+# Windows used for completion-rate reporting on /jobs
+RATE_WINDOWS = {'15m': 900, '1h': 3600, '24h': 86400}
+
+
+class JobQueue:
+    """SQLite-backed job queue with a bounded worker pool"""
+
+    def __init__(
+        self,
+        db_path: str,
+        handlers: Dict[str, Callable[[Dict], bool]],
+        workers: int = 2,
+        max_attempts: int = 3,
+        retry_delay: int = 60,
+        poll_interval: float = 5.0,
+        retention_days: int = 7
+    ):
+        """
+        Initialize job queue
+
+        Args:
+            db_path: SQLite database path
+            handlers: Map of job kind to handler; a handler returns True if a subtitle was downloaded
+            workers: Number of worker threads draining the queue
+            max_attempts: Attempts before a job that raises is marked failed
+            retry_delay: Base delay in seconds before retrying a job that raised
+            poll_interval: Seconds an idle worker waits before re-checking the queue
+            retention_days: Finished jobs older than this are pruned on start
+        """
+        self.handlers = handlers
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.retention_days = retention_days
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+        self._conn = connect(db_path)
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def start(self):
+        """Recover interrupted jobs and start the worker pool"""
+        with self._lock, self._conn:
+            # Jobs left running by a crash or hard kill go back to the queue
+            recovered = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+            ).rowcount
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - self.retention_days * 86400,)
+            )
+
+        if recovered:
+            logger.info(f"♻️  Re-queued {recovered} job(s) interrupted by the last shutdown")
+
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"korsub-job-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"✓ Job queue started with {self.workers} worker(s), {self.depth()} job(s) pending")
+
+    def drain(self, timeout: float = 30.0):
+        """
+        Stop the workers after their current job
+
+        Jobs still queued stay in the database and run after the next start.
+
+        Args:
+            timeout: Seconds to wait for in-flight jobs to finish
+        """
+        logger.info("⏳ Draining job queue...")
+        self._stopping.set()
+        with self._cond:
+            self._cond.notify_all()
+
+        deadline = time.time() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.time()))
+
+        alive = [t.name for t in self._threads if t.is_alive()]
+        self._threads = []
+        if alive:
+            logger.warning(f"⚠️  Workers still busy after {timeout}s: {', '.join(alive)} (jobs will be re-queued on restart)")
+        else:
+            logger.info(f"✓ Job queue drained, {self.depth()} job(s) left for next start")
+
+    def enqueue(self, kind: str, payload: Dict, priority: int = 0, delay: float = 0) -> int:
+        """
+        Persist a job and wake a worker
+
+        Args:
+            kind: Handler name (e.g. "radarr", "sonarr")
+            payload: JSON-serializable job payload
+            priority: Higher priorities are claimed first
+            delay: Seconds before the job becomes eligible
+
+        Returns:
+            Job ID
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (kind, payload, priority, not_before, created_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload), priority, now + delay, now)
+            )
+            job_id = cursor.lastrowid
+
+        with self._cond:
+            self._cond.notify()
+
+        return job_id
+
+    def depth(self) -> int:
+        """Number of jobs waiting to run"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def stats(self) -> Dict:
+        """Queue depth, in-flight jobs and completion rates"""
+        now = time.time()
+
+        with self._lock:
+            queued = self._conn.execute(
+                "SELECT COUNT(*), SUM(not_before > ?) FROM jobs WHERE status = 'queued'", (now,)
+            ).fetchone()
+            running = self._conn.execute(
+                "SELECT id, kind, attempts, started_at FROM jobs WHERE status = 'running' ORDER BY started_at"
+            ).fetchall()
+
+            completed = {}
+            for label, seconds in RATE_WINDOWS.items():
+                row = self._conn.execute(
+                    """
+                    SELECT
+                        SUM(status = 'done'),
+                        SUM(status = 'done' AND success = 1),
+                        SUM(status = 'failed'),
+                        AVG(finished_at - started_at)
+                    FROM jobs
+                    WHERE status IN ('done', 'failed') AND finished_at >= ?
+                    """,
+                    (now - seconds,)
+                ).fetchone()
+                done, downloaded, failed, avg_duration = row[0] or 0, row[1] or 0, row[2] or 0, row[3]
+                completed[label] = {
+                    'done': done,
+                    'downloaded': downloaded,
+                    'failed': failed,
+                    'per_minute': round((done + failed) / (seconds / 60), 3),
+                    'avg_duration_seconds': round(avg_duration, 2) if avg_duration is not None else None
+                }
+
+        return {
+            'workers': self.workers,
+            'running': not self._stopping.is_set() and bool(self._threads),
+            'queue_depth': queued[0],
+            'deferred': queued[1] or 0,
+            'in_flight': [
+                {
+                    'id': row['id'],
+                    'kind': row['kind'],
+                    'attempts': row['attempts'],
+                    'running_seconds': round(now - row['started_at'], 1)
+                }
+                for row in running
+            ],
+            'completed': completed
+        }
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Atomically move the next eligible job to running"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                """
+                SELECT id, kind, payload, attempts FROM jobs
+                WHERE status = 'queued' AND not_before <= ?
+                ORDER BY priority DESC, id
+                LIMIT 1
+                """,
+                (time.time(),)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (time.time(), row['id'])
+            )
+            return row
+
+    def _finish(self, job_id: int, status: str, success: Optional[bool] = None, error: Optional[str] = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, success = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, None if success is None else int(success), error, time.time(), job_id)
+            )
+
+    def _retry(self, job_id: int, delay: float, error: str, refund_attempt: bool = False):
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                UPDATE jobs SET status = 'queued', started_at = NULL, not_before = ?, error = ?,
+                    attempts = attempts - ?
+                WHERE id = ?
+                """,
+                (time.time() + delay, error, int(refund_attempt), job_id)
+            )
+
+    def _run(self, job):
+        job_id, kind, attempts = job['id'], job['kind'], job['attempts'] + 1
+
+        try:
+            success = self.handlers[kind](json.loads(job['payload']))
+            self._finish(job_id, 'done', success=bool(success))
+        except Exception as e:
+            # Errors carrying retry_after (e.g. provider rate limits) defer the job without using up an attempt
+            retry_after = getattr(e, 'retry_after', None)
+            if retry_after is not None:
+                logger.warning(f"⏸️  Job {job_id} ({kind}) deferred {retry_after:.0f}s: {e}")
+                self._retry(job_id, retry_after, str(e), refund_attempt=True)
+            elif attempts < self.max_attempts:
+                delay = self.retry_delay * 2 ** (attempts - 1)
+                logger.warning(f"⚠️  Job {job_id} ({kind}) failed: {e} - retrying in {delay}s")
+                self._retry(job_id, delay, str(e))
+            else:
+                logger.error(f"❌ Job {job_id} ({kind}) failed after {attempts} attempt(s): {e}")
+                self._finish(job_id, 'failed', error=str(e))
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            try:
+                job = self._claim()
+            except Exception as e:
+                logger.error(f"Error claiming job: {e}")
+                job = None
+
+            if job is None:
+                with self._cond:
+                    self._cond.wait(self.poll_interval)
+                continue
+
+            self._run(job)
@@ -7,13 +7,14 @@ Automatically downloads Korean subtitles from Cineaste.co.kr for Radarr/Sonarr
 import os
 import json
 import logging
-import requests
 from flask import Flask, request, jsonify
 from pathlib import Path
 import time
 from bs4 import BeautifulSoup
 from urllib.parse import quote, urljoin
 import re
+from http_pool import SessionPool
+from wsgi_server import serve
 
 # Configuration
 CINEASTE_BASE_URL = "https://cineaste.co.kr"
@@ -37,11 +38,15 @@ class CineasteScraper:
     """Scraper for Cineaste.co.kr subtitle site"""
 
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self._sessions = SessionPool(headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
 
+    @property
+    def session(self):
+        """HTTP session for the calling thread"""
+        return self._sessions.session
+
     def search_subtitles(self, title, year=None):
         """
         Search for subtitles on Cineaste
@@ -375,4 +380,4 @@ def manual_search():
 if __name__ == '__main__':
     logger.info(f"Starting KorSub service on port {PORT}")
     logger.info(f"Media path: {MEDIA_PATH}")
-    app.run(host='0.0.0.0', port=PORT, debug=False)
+    serve(app, PORT)
@@ -5,16 +5,43 @@ Primary: OpenSubtitles.com API
 Fallback: Cineaste.co.kr scraper
 """
 
+import time
+
+# Taken before the other imports, for the startup report
+STARTUP_BEGAN = time.perf_counter()
+
 import os
+import re
 import json
 import logging
-import requests
-from flask import Flask, request, jsonify
+import resource
+from collections import deque
+from flask import Flask, Response, request, jsonify
 from pathlib import Path
-from opensubtitles_api import OpenSubtitlesAPI
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from opensubtitles_api import OpenSubtitlesAPI, RateLimitExceeded, SearchCache
 from cineaste_scraper import CineasteScraper
+from cineaste_index import CineasteIndex
+from job_queue import JobQueue
+from download_quota import DownloadQuota, DownloadQuotaExceeded
+from rate_limiter import TokenBucket
+from scan_engine import ScanEngine, ScanMemo
+from subtitle_backlog import CAPTCHA_ONLY, DOWNLOAD_FAILED, NO_RESULTS, RATE_LIMITED, SubtitleBacklog
+from arr_library import EpisodeFileRecord, HistoryRecord, MovieRecord, SeriesRecord, stream_records
+from arr_history import HistoryMarks, new_imports, utc_now
+from subtitle_ranking import rank_candidates
+from moviehash import MovieHasher
+from metrics import PROVIDER_LATENCY, WEBHOOK_EVENTS, StatsCollector, observe_scan, register_stats, render
+from storage import DB_PATH
+from wsgi_server import serve
+from http_pool import SessionPool
+from lazy import Lazy
+from media_watcher import HandledPaths, MediaWatcher
 from apscheduler.schedulers.background import BackgroundScheduler
 
+IMPORTS_DONE = time.perf_counter()
+
 # Configuration
 MEDIA_PATH = os.getenv("MEDIA_PATH", "/data/media")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -24,7 +51,57 @@ RADARR_URL = os.getenv("RADARR_URL", "http://radarr:7878/radarr")
 RADARR_API_KEY = os.getenv("RADARR_API_KEY", "")
 SONARR_URL = os.getenv("SONARR_URL", "http://sonarr:8989/sonarr")
 SONARR_API_KEY = os.getenv("SONARR_API_KEY", "")
-SCAN_INTERVAL_HOURS = int(os.getenv("SCAN_INTERVAL_HOURS", "6"))
+SCAN_INTERVAL_HOURS = int(os.getenv("SCAN_INTERVAL_HOURS", "168"))
+HISTORY_SCAN_INTERVAL_MINUTES = int(os.getenv("HISTORY_SCAN_INTERVAL_MINUTES", "15"))
+BACKLOG_RETRY_HOURS = float(os.getenv("BACKLOG_RETRY_HOURS", "24"))
+BACKLOG_MAX_RETRY_DAYS = float(os.getenv("BACKLOG_MAX_RETRY_DAYS", "60"))
+MEDIA_WATCH = os.getenv("MEDIA_WATCH", "true").lower() in ("1", "true", "yes")
+MEDIA_WATCH_DEBOUNCE_SECONDS = float(os.getenv("MEDIA_WATCH_DEBOUNCE_SECONDS", "10"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_DRAIN_TIMEOUT = int(os.getenv("JOB_DRAIN_TIMEOUT", "30"))
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "4"))
+OPENSUBTITLES_RATE_LIMIT = float(os.getenv("OPENSUBTITLES_RATE_LIMIT", "5"))
+DOWNLOAD_QUOTA_RESERVE = int(os.getenv("DOWNLOAD_QUOTA_RESERVE", "5"))
+PROVIDER_POLICY = os.getenv("PROVIDER_POLICY", "sequential").lower()
+HEDGE_DELAY_SECONDS = float(os.getenv("HEDGE_DELAY_SECONDS", "2"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "2048"))
+SEARCH_CACHE_HIT_TTL_HOURS = int(os.getenv("SEARCH_CACHE_HIT_TTL_HOURS", "24"))
+SEARCH_CACHE_MISS_TTL_HOURS = int(os.getenv("SEARCH_CACHE_MISS_TTL_HOURS", "6"))
+SEARCH_CACHE_DISK_ENTRIES = int(os.getenv("SEARCH_CACHE_DISK_ENTRIES", "100000"))
+CINEASTE_CRAWL_INTERVAL_MINUTES = int(os.getenv("CINEASTE_CRAWL_INTERVAL_MINUTES", "30"))
+CINEASTE_CRAWL_PAGES = int(os.getenv("CINEASTE_CRAWL_PAGES", "100"))
+ALIGN_SUBTITLES = os.getenv("ALIGN_SUBTITLES", "true").lower() in ("1", "true", "yes")
+BATCH_SEARCH_CONCURRENCY = int(os.getenv("BATCH_SEARCH_CONCURRENCY", "8"))
+BATCH_SEARCH_MAX_ITEMS = int(os.getenv("BATCH_SEARCH_MAX_ITEMS", "500"))
+
+if PROVIDER_POLICY not in ("sequential", "hedged", "parallel"):
+    raise ValueError(f"PROVIDER_POLICY must be sequential, hedged or parallel, not {PROVIDER_POLICY!r}")
+
+# Webhook imports are claimed ahead of any lower-priority queued work
+WEBHOOK_JOB_PRIORITY = 100
+
+# Files seen by the media watcher wait behind webhooks, which also cover
+# Radarr/Sonarr imports and carry better metadata
+FILE_JOB_PRIORITY = 50
+
+# Imports whose webhook was lost reach the watcher before the next history
+# scan, so file jobs wait one history interval for that scan to claim them
+FILE_JOB_DELAY = HISTORY_SCAN_INTERVAL_MINUTES * 60 if (RADARR_API_KEY or SONARR_API_KEY) else 0
+
+# Season/episode tag in Sonarr file names (e.g. "Show.S01E05.1080p.mkv")
+EPISODE_PATTERN = re.compile(r'[Ss](\d{1,2})[Ee](\d{1,3})')
+
+# Release year in a file or folder name (e.g. "Movie.Title.2010.1080p")
+YEAR_PATTERN = re.compile(r'[\s._(\[]((?:19|20)\d{2})(?=[\s._)\]]|$)')
+
+# First release tag after the title in names without a year
+RELEASE_TAG_PATTERN = re.compile(
+    r'[\s._\[(](?:2160p|1080p|720p|576p|480p|4k|uhd|bluray|blu-ray|bdrip|brrip|web-?dl|webrip|web|hdtv|dvdrip|remux|x26[45]|h\.?26[45]|hevc)(?=[\s._\])-]|$)',
+    re.IGNORECASE
+)
+
+# Folder names that say nothing about the title ("Season 1", "S01")
+SEASON_FOLDER_PATTERN = re.compile(r'^(?:season|s)[\s._]*\d+$', re.IGNORECASE)
 
 # Setup logging
 logging.basicConfig(
@@ -36,23 +113,64 @@ logger = logging.getLogger("KorSub")
 # Flask app
 app = Flask(__name__)
 
-# Initialize both providers
-opensub_api = OpenSubtitlesAPI(api_key=OPENSUBTITLES_API_KEY)
-cineaste_scraper = CineasteScraper()
+# Both providers are built on first use
+opensub_api = Lazy(lambda: OpenSubtitlesAPI(
+    api_key=OPENSUBTITLES_API_KEY,
+    cache=SearchCache(
+        DB_PATH,
+        max_entries=SEARCH_CACHE_SIZE,
+        hit_ttl=SEARCH_CACHE_HIT_TTL_HOURS * 3600,
+        miss_ttl=SEARCH_CACHE_MISS_TTL_HOURS * 3600,
+        max_disk_entries=SEARCH_CACHE_DISK_ENTRIES
+    ),
+    limiter=TokenBucket(OPENSUBTITLES_RATE_LIMIT),
+    quota=DownloadQuota(DB_PATH, reserve=DOWNLOAD_QUOTA_RESERVE)
+))
+# Searches are answered from the crawled board index until it misses a few crawls
+cineaste_scraper = Lazy(lambda: CineasteScraper(
+    index=CineasteIndex(DB_PATH, max_age=CINEASTE_CRAWL_INTERVAL_MINUTES * 60 * 3)
+))
+
+# Cineaste results (memory only), so hedged searches that lose the race are reused
+cineaste_cache = SearchCache(
+    max_entries=SEARCH_CACHE_SIZE,
+    hit_ttl=SEARCH_CACHE_HIT_TTL_HOURS * 3600,
+    miss_ttl=SEARCH_CACHE_MISS_TTL_HOURS * 3600
+)
+
+# Moviehash cache (by inode/size/mtime) for exact-release matching
+movie_hasher = MovieHasher(DB_PATH)
+
+# Threads for hedged/parallel provider queries
+provider_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="provider")
+
+# Threads for /manual/search/batch items (kept apart from provider_executor,
+# which the searches themselves use for hedging)
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_SEARCH_CONCURRENCY, thread_name_prefix="batch-search")
 
-# Initialize scheduler
+# Connection pool for Radarr/Sonarr API calls, shared by the scan threads
+arr_sessions = SessionPool(SCAN_CONCURRENCY)
+
+# Scheduler (started by the serving entry point)
 scheduler = BackgroundScheduler()
-scheduler.start()
+
+
+def video_fps(media_file):
+    """Frame rate from a Radarr movieFile / Sonarr episodeFile, if reported"""
+    fps = (media_file.get('mediaInfo') or {}).get('videoFps')
+    return float(fps) if fps else None
 
 
 class SubtitleProcessor:
     """Process subtitle requests with dual-provider support"""
 
-    def __init__(self):
-        self.opensub = opensub_api
-        self.cineaste = cineaste_scraper
+    def __init__(self, opensub=None, cineaste=None, policy=None, hedge_delay=None):
+        self.opensub = opensub or opensub_api
+        self.cineaste = cineaste or cineaste_scraper
+        self.policy = policy or PROVIDER_POLICY
+        self.hedge_delay = HEDGE_DELAY_SECONDS if hedge_delay is None else hedge_delay
 
-    def search_subtitles(self, title, year=None, imdb_id=None, tmdb_id=None):
+    def search_subtitles(self, title, year=None, imdb_id=None, tmdb_id=None, season=None, moviehash=None):
         """
         Search for Korean subtitles using both providers
 
@@ -60,26 +178,35 @@ class SubtitleProcessor:
         1. OpenSubtitles.com (faster, more reliable)
         2. Cineaste.co.kr (fallback for rare movies)
 
+        PROVIDER_POLICY controls when Cineaste is asked:
+        - sequential: only after OpenSubtitles comes back empty
+        - hedged: also when OpenSubtitles hasn't answered within HEDGE_DELAY_SECONDS
+        - parallel: at the same time as OpenSubtitles
+
+        When season is given, imdb_id is the series ID (the title is searched
+        if there is none) and OpenSubtitles is asked for every episode of that
+        season in one query. A moviehash of
+        the video file lets OpenSubtitles flag exact-release matches.
+
         Returns:
             (results, provider_name)
         """
-        # Try OpenSubtitles first
         logger.info(f"🔍 Searching OpenSubtitles for: {title}")
-        opensub_results = self.opensub.search_subtitles(
-            imdb_id=imdb_id,
-            tmdb_id=tmdb_id,
-            query=title if not imdb_id and not tmdb_id else None,
-            languages="ko",
-            year=year
-        )
 
-        if opensub_results:
-            logger.info(f"✓ OpenSubtitles found {len(opensub_results)} Korean subtitle(s)")
-            return opensub_results, "opensubtitles"
+        if self.policy == "sequential":
+            opensub_results = self._search_opensubtitles(title, year, imdb_id, tmdb_id, season, moviehash)
+            if opensub_results:
+                logger.info(f"✓ OpenSubtitles found {len(opensub_results)} Korean subtitle(s)")
+                return opensub_results, "opensubtitles"
 
-        # Fallback to Cineaste
-        logger.info(f"🔍 OpenSubtitles had no results, trying Cineaste fallback...")
-        cineaste_results = self.cineaste.search_subtitles(title, year)
+            # Fallback to Cineaste
+            logger.info(f"🔍 OpenSubtitles had no results, trying Cineaste fallback...")
+            cineaste_results = self._search_cineaste(title, year)
+        else:
+            opensub_results, cineaste_results = self._race_providers(title, year, imdb_id, tmdb_id, season, moviehash)
+            if opensub_results:
+                logger.info(f"✓ OpenSubtitles found {len(opensub_results)} Korean subtitle(s)")
+                return opensub_results, "opensubtitles"
 
         if cineaste_results:
             logger.info(f"✓ Cineaste found {len(cineaste_results)} Korean subtitle(s)")
@@ -88,27 +215,179 @@ class SubtitleProcessor:
         logger.warning(f"✗ No Korean subtitles found on any provider for: {title}")
         return [], None
 
-    def download_subtitle(self, result, provider, save_path):
-        """Download subtitle from the appropriate provider"""
+    def _search_opensubtitles(self, title, year, imdb_id, tmdb_id, season, moviehash=None):
+        with PROVIDER_LATENCY.labels('opensubtitles', 'search').time():
+            if season is not None and imdb_id:
+                return self.opensub.search_subtitles(
+                    parent_imdb_id=imdb_id,
+                    season_number=season,
+                    languages="ko",
+                    type="episode",
+                    moviehash=moviehash
+                )
+
+            if season is not None:
+                # No series ID (files from outside Sonarr): the title has to do
+                return self.opensub.search_subtitles(
+                    query=title,
+                    season_number=season,
+                    languages="ko",
+                    type="episode",
+                    moviehash=moviehash
+                )
+
+            return self.opensub.search_subtitles(
+                imdb_id=imdb_id,
+                tmdb_id=tmdb_id,
+                query=title if not imdb_id and not tmdb_id else None,
+                languages="ko",
+                year=year,
+                moviehash=moviehash
+            )
+
+    def _search_cineaste(self, title, year):
+        """Cineaste search, cached so a hedged query that lost the race still pays off"""
+        cache_key = cineaste_cache.make_key({'title': title, 'year': year})
+        cached = cineaste_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        with PROVIDER_LATENCY.labels('cineaste', 'search').time():
+            results = self.cineaste.search_subtitles(title, year)
+        cineaste_cache.set(cache_key, results)
+        return results
+
+    def _race_providers(self, title, year, imdb_id, tmdb_id, season, moviehash=None):
+        """
+        Query both providers with overlapping requests
+
+        OpenSubtitles results win whenever they arrive, since only they can be
+        downloaded automatically. A Cineaste answer that arrives first is used
+        once OpenSubtitles has had HEDGE_DELAY_SECONDS more to respond. The
+        losing request keeps running in the background and its result lands in
+        that provider's cache.
+
+        Returns:
+            (opensubtitles_results, cineaste_results); the second is None if not needed
+        """
+        opensub_future = provider_executor.submit(
+            self._search_opensubtitles, title, year, imdb_id, tmdb_id, season, moviehash
+        )
+        cineaste_future = None
+
+        if self.policy == "parallel":
+            cineaste_future = provider_executor.submit(self._search_cineaste, title, year)
+        elif not wait([opensub_future], timeout=self.hedge_delay).done:
+            logger.info(f"⏱️  OpenSubtitles slower than {self.hedge_delay}s, hedging with Cineaste")
+            cineaste_future = provider_executor.submit(self._search_cineaste, title, year)
+
+        grace_deadline = None
+        while cineaste_future is not None and not opensub_future.done():
+            if not cineaste_future.done():
+                wait([opensub_future, cineaste_future], return_when=FIRST_COMPLETED)
+                continue
+            if not cineaste_future.result():
+                # Nothing from Cineaste: block on OpenSubtitles alone below
+                break
+
+            if grace_deadline is None:
+                grace_deadline = time.monotonic() + self.hedge_delay
+            remaining = grace_deadline - time.monotonic()
+            if remaining <= 0:
+                logger.info("⚡ Cineaste answered first, not waiting for OpenSubtitles")
+                return None, cineaste_future.result()
+            wait([opensub_future], timeout=remaining)
+
+        # Propagates RateLimitExceeded like the sequential path
+        opensub_results = opensub_future.result()
+        if opensub_results:
+            if cineaste_future is not None:
+                cineaste_future.cancel()
+            return opensub_results, None
+
+        logger.info(f"🔍 OpenSubtitles had no results, using Cineaste fallback...")
+        if cineaste_future is None:
+            return opensub_results, self._search_cineaste(title, year)
+        return opensub_results, cineaste_future.result()
+
+    def rank_results(self, results, provider, video_name, video_fps=None):
+        """
+        Order candidates best first for a specific video file
+
+        Args:
+            results: Results from search_subtitles()
+            provider: Provider the results came from
+            video_name: Scene name or file name of the video
+            video_fps: Video frame rate from the arr media info, if known
+        """
+        if provider == "opensubtitles":
+            candidates = [(result, self.opensub.get_subtitle_details(result)) for result in results]
+        else:
+            candidates = [(result, {'release': result.get('title')}) for result in results]
+
+        return rank_candidates(candidates, video_name, video_fps)
+
+    def match_episode(self, results, provider, episode_number):
+        """
+        Narrow season-level results to one episode
+
+        Only OpenSubtitles results carry episode metadata; Cineaste results
+        are returned unchanged. Without an episode number (a file name with no
+        SxxEyy tag) nothing matches, rather than every episode of the season.
+        """
+        if provider != "opensubtitles":
+            return results
+        if episode_number is None:
+            return []
+
+        return [
+            result for result in results
+            if self.opensub.get_subtitle_details(result).get('episode_number') == episode_number
+        ]
+
+    def download_subtitle(self, result, provider, save_path, fresh=True):
+        """
+        Download subtitle from the appropriate provider
+
+        fresh marks a new import; backlog downloads from scans (fresh=False)
+        leave the reserved part of the daily quota to imports.
+        """
         if provider == "opensubtitles":
             details = self.opensub.get_subtitle_details(result)
             file_id = details.get('file_id')
             if not file_id:
                 logger.error("No file ID in OpenSubtitles result")
                 return False
-            return self.opensub.download_subtitle(file_id, save_path)
+            with PROVIDER_LATENCY.labels('opensubtitles', 'download').time():
+                if not self.opensub.download_subtitle(file_id, save_path, fresh=fresh):
+                    return False
+            self.align(save_path)
+            return True
 
         elif provider == "cineaste":
             wr_id = result.get('wr_id')
             if not wr_id:
                 logger.error("No wr_id in Cineaste result")
                 return False
-            return self.cineaste.download_subtitle(wr_id, save_path)
+            with PROVIDER_LATENCY.labels('cineaste', 'download').time():
+                return self.cineaste.download_subtitle(wr_id, save_path)
 
         else:
             logger.error(f"Unknown provider: {provider}")
             return False
 
+    def align(self, save_path):
+        """Re-time a downloaded subtitle against the video's English track, if there is one"""
+        if not ALIGN_SUBTITLES:
+            return
+        try:
+            # NumPy is only loaded once there is something to align
+            from subtitle_align import align_subtitle
+
+            align_subtitle(str(save_path))
+        except Exception as e:
+            logger.warning(f"Could not align {save_path}: {e}")
+
     def process_movie(self, payload):
         """Process movie download from Radarr webhook"""
         try:
@@ -132,14 +411,20 @@ class SubtitleProcessor:
                 title=title,
                 year=year,
                 imdb_id=imdb_id,
-                tmdb_id=tmdb_id
+                tmdb_id=tmdb_id,
+                moviehash=movie_hasher.hash(file_path)
             )
 
             if not results:
                 return False
 
-            # Get best match
-            best_match = results[0]
+            # Get best match for this release
+            best_match = self.rank_results(
+                results,
+                provider,
+                movie_file.get('sceneName') or file_path,
+                video_fps(movie_file)
+            )[0]
             logger.info(f"📥 Downloading from {provider}: {best_match.get('title', 'subtitle')}")
 
             # Determine save path
@@ -160,6 +445,9 @@ class SubtitleProcessor:
                     logger.error(f"❌ Failed to download subtitle for {title}")
                 return False
 
+        except (RateLimitExceeded, DownloadQuotaExceeded):
+            # Not a miss: let the job queue retry once the limit resets
+            raise
         except Exception as e:
             logger.error(f"Error processing movie: {e}")
             import traceback
@@ -190,13 +478,21 @@ class SubtitleProcessor:
             # Search with both providers
             results, provider = self.search_subtitles(
                 title=series_title,
-                imdb_id=imdb_id
+                imdb_id=imdb_id,
+                season=season_num,
+                moviehash=movie_hasher.hash(file_path)
             )
+            results = self.match_episode(results, provider, episode_num)
 
             if not results:
                 return False
 
-            best_match = results[0]
+            best_match = self.rank_results(
+                results,
+                provider,
+                episode_file.get('sceneName') or file_path,
+                video_fps(episode_file)
+            )[0]
             logger.info(f"📥 Downloading from {provider}")
 
             video_path = Path(file_path)
@@ -211,87 +507,462 @@ class SubtitleProcessor:
                 logger.error(f"❌ Failed to download subtitle")
                 return False
 
+        except (RateLimitExceeded, DownloadQuotaExceeded):
+            # Not a miss: let the job queue retry once the limit resets
+            raise
         except Exception as e:
             logger.error(f"Error processing episode: {e}")
             import traceback
             traceback.print_exc()
             return False
 
+    def process_file(self, payload):
+        """Process a video file the media watcher saw appear outside Radarr/Sonarr"""
+        try:
+            file_path = payload.get('path')
+            if not file_path or not os.path.isfile(file_path):
+                logger.info(f"⏭️  New file is gone again: {file_path}")
+                return False
+            if file_path in arr_handled:
+                logger.info(f"⏭️  {Path(file_path).name} was imported by Radarr/Sonarr, leaving it to their job")
+                return False
+
+            subtitle_path = Path(file_path).with_suffix('.ko.srt')
+            if subtitle_path.exists():
+                # Usually a Radarr/Sonarr import the webhook already handled
+                return False
+
+            guess = guess_video(file_path)
+            if guess is None:
+                logger.warning(f"Cannot tell the title of {file_path}")
+                return False
+            title, year, season, episode = guess
+
+            label = f"{title} S{season:02d}E{episode:02d}" if season is not None else f"{title} ({year or '?'})"
+            logger.info(f"📂 Processing new file: {label}")
+
+            results, provider = self.search_subtitles(
+                title=title,
+                year=year,
+                season=season,
+                moviehash=movie_hasher.hash(file_path)
+            )
+            if season is not None:
+                results = self.match_episode(results, provider, episode)
+
+            if not results:
+                return False
+
+            best_match = self.rank_results(results, provider, Path(file_path).name)[0]
+            logger.info(f"📥 Downloading from {provider}: {best_match.get('title', 'subtitle')}")
+
+            if self.download_subtitle(best_match, provider, str(subtitle_path)):
+                logger.info(f"✅ Korean subtitle downloaded for {label} (provider: {provider})")
+                return True
+
+            if provider == "cineaste":
+                logger.warning(f"⚠️  Cineaste requires manual download for {label}")
+            else:
+                logger.error(f"❌ Failed to download subtitle for {label}")
+            return False
+
+        except (RateLimitExceeded, DownloadQuotaExceeded):
+            # Not a miss: let the job queue retry once the limit resets
+            raise
+        except Exception as e:
+            logger.error(f"Error processing file: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+
+def guess_video(file_path):
+    """
+    Guess what a video file is from its name (and folders) alone
+
+    Returns:
+        (title, year, season, episode); season and episode are None for a
+        movie and year is None if the name has none. None if no title is left.
+    """
+    path = Path(file_path)
+    name = path.stem
+    season = episode = None
+
+    episode_match = EPISODE_PATTERN.search(name)
+    if episode_match:
+        season, episode = int(episode_match.group(1)), int(episode_match.group(2))
+        name = name[:episode_match.start()]
+
+    # "Show/Season 1/S01E01.mkv": the title is in a folder name
+    candidates = [name] + [folder.name for folder in (path.parent, path.parent.parent)]
+    for candidate in candidates:
+        if SEASON_FOLDER_PATTERN.match(candidate.strip()):
+            continue
+
+        year = None
+        tag_match = RELEASE_TAG_PATTERN.search(candidate)
+        cut = tag_match.start() if tag_match else len(candidate)
+        # The release year is the last one before the tags: "Blade Runner 2049 (2017)"
+        year_matches = [match for match in YEAR_PATTERN.finditer(candidate) if match.start() < cut]
+        if year_matches:
+            year = int(year_matches[-1].group(1))
+            cut = year_matches[-1].start()
+
+        title = ' '.join(re.sub(r'[._]+', ' ', candidate[:cut]).split()).strip(' -([')
+        if title:
+            return title, year, season, episode
+
+    return None
+
 
 # Initialize processor
 processor = SubtitleProcessor()
 
+# Persistent webhook job queue (workers are started by the entry point)
+job_queue = JobQueue(
+    DB_PATH,
+    handlers={
+        'radarr': processor.process_movie,
+        'sonarr': processor.process_episode,
+        'file': processor.process_file
+    },
+    workers=JOB_WORKERS
+)
+
+
+def queue_new_file(path):
+    """Queue a subtitle job for a video file the media watcher saw settle"""
+    if path in arr_handled or Path(path).with_suffix('.ko.srt').exists():
+        return
+    job_id = job_queue.enqueue('file', {'path': path}, priority=FILE_JOB_PRIORITY, delay=FILE_JOB_DELAY)
+    logger.info(f"📂 New file {Path(path).name}, queued job {job_id}")
+
+
+# Files Radarr/Sonarr webhooks and scans have handled, which the watcher also sees
+arr_handled = HandledPaths()
+
+# inotify watch on MEDIA_PATH (started by the entry point)
+media_watcher = MediaWatcher(MEDIA_PATH, queue_new_file, debounce=MEDIA_WATCH_DEBOUNCE_SECONDS)
+
+# Library scan engine (checkpoints live next to the job queue)
+scan_engine = ScanEngine(DB_PATH, concurrency=SCAN_CONCURRENCY)
+
+# Last Radarr/Sonarr history event each delta scan has processed
+history_marks = HistoryMarks(DB_PATH)
+
+# Items scans found no Korean subtitle for, retried with growing delays
+backlog = SubtitleBacklog(
+    DB_PATH,
+    base_delay=BACKLOG_RETRY_HOURS * 3600,
+    max_delay=BACKLOG_MAX_RETRY_DAYS * 86400
+)
+
+# Cache, rate limit, quota, queue and backlog figures for /metrics, read at scrape time
+register_stats(StatsCollector(opensub_api, cineaste_cache, cineaste_scraper, job_queue, backlog))
+
 
 # Scheduled scanning functions
+def movie_value(movie):
+    """Backlog priority of a movie: popular titles get the day's downloads first"""
+    return movie.popularity
+
+
+def series_value(series):
+    """Backlog priority of a series, by rating votes"""
+    return series.votes
+
+
+def backlog_quota_available(name, scan):
+    """Check the backlog download budget, scheduling a resume after the reset if it is spent"""
+    if opensub_api.quota.can_download(fresh=False):
+        return True
+
+    logger.warning(f"⏸️  {name} scan skipped: backlog download quota used up for today")
+    schedule_resume(name, scan, opensub_api.quota.retry_after())
+    return False
+
+
+def schedule_resume(name, scan, delay):
+    """Re-run a paused scan once the rate limit or download quota has reset"""
+    run_date = datetime.now() + timedelta(seconds=delay + 60)
+    scheduler.add_job(
+        scan,
+        'date',
+        run_date=run_date,
+        id=f'{name.lower()}_resume',
+        name=f'Resume paused {name} scan',
+        replace_existing=True
+    )
+    logger.info(f"⏰ {name} scan will resume at {run_date:%Y-%m-%d %H:%M}")
+
+
+def backlog_due(name, items):
+    """Pass on the (item_key, item) pairs that are not waiting out a backlog retry delay"""
+    skipped = 0
+    for key, item in items:
+        if backlog.due(key):
+            yield key, item
+        else:
+            skipped += 1
+
+    if skipped:
+        logger.info(f"⏭️  {name} scan: {skipped} item(s) left for later by the missing-subtitle backlog")
+
+
+def scan_movie(movie):
+    """Download a Korean subtitle for one Radarr movie (a MovieRecord) if it is missing"""
+    key = f"movie:{movie.id}"
+    arr_handled.add(movie.path)
+
+    # Check if Korean subtitle already exists
+    subtitle_path = Path(movie.path).with_suffix('.ko.srt')
+
+    if subtitle_path.exists():
+        backlog.clear(key)
+        return False  # Already has Korean subtitle
+
+    # Try to download Korean subtitle
+    logger.info(f"📽️  Missing Korean subtitle: {movie.title} ({movie.year})")
+
+    try:
+        # Hashing reads 128 KiB per file and runs on the scan's worker threads
+        results, provider = processor.search_subtitles(
+            title=movie.title,
+            year=movie.year,
+            imdb_id=movie.imdb_id,
+            tmdb_id=movie.tmdb_id,
+            moviehash=movie_hasher.hash(movie.path)
+        )
+
+        if not results:
+            backlog.record_miss(key, NO_RESULTS, movie.title)
+            return False
+
+        best_match = processor.rank_results(
+            results,
+            provider,
+            movie.scene_name or movie.path,
+            movie.fps
+        )[0]
+        success = processor.download_subtitle(best_match, provider, str(subtitle_path), fresh=False)
+    except RateLimitExceeded as e:
+        backlog.record_miss(key, RATE_LIMITED, movie.title, e.retry_after)
+        raise
+
+    if success:
+        logger.info(f"✅ Downloaded Korean subtitle for {movie.title}")
+        backlog.clear(key)
+    elif provider == "cineaste":
+        logger.info(f"⚠️  Cineaste match found but requires manual download: {movie.title}")
+        backlog.record_miss(key, CAPTCHA_ONLY, movie.title)
+    else:
+        backlog.record_miss(key, DOWNLOAD_FAILED, movie.title)
+
+    return success
+
+
 def scan_radarr_library():
     """Scan Radarr library for movies missing Korean subtitles"""
     if not RADARR_API_KEY:
         logger.warning("Radarr API key not configured, skipping scheduled scan")
         return
 
+    if not backlog_quota_available('Radarr', scan_radarr_library):
+        return
+
     try:
         logger.info("🔍 Starting scheduled Radarr library scan for missing Korean subtitles")
 
-        # Get all movies from Radarr
-        response = requests.get(
+        # Get all movies from Radarr, decoded as they arrive into compact records
+        response = arr_sessions.session.get(
             f"{RADARR_URL}/api/v3/movie",
             headers={"X-Api-Key": RADARR_API_KEY},
-            timeout=30
+            timeout=30,
+            stream=True
         )
         response.raise_for_status()
-        movies = response.json()
 
-        processed = 0
-        downloaded = 0
+        # Most valuable titles first, so a limited download quota goes to them.
+        # Only (value, id) keys of movies still lacking a subtitle are kept for
+        # the sort; each record is fetched again when a scan worker reaches it
+        ranked = []
+        subtitled = 0
+        for movie in stream_records(response, MovieRecord.from_json):
+            if Path(movie.path).with_suffix('.ko.srt').exists():
+                backlog.clear(f"movie:{movie.id}")
+                subtitled += 1
+            else:
+                ranked.append((movie_value(movie), movie.id))
+        ranked.sort(reverse=True)
+        logger.info(f"   {len(ranked)} movie(s) missing Korean subtitles, {subtitled} already have them")
+
+        result = scan_engine.run(
+            'radarr',
+            backlog_due('Radarr', ((f"movie:{movie_id}", movie_id) for _, movie_id in ranked)),
+            scan_movie_id,
+            total=len(ranked)
+        )
 
-        for movie in movies:
-            # Skip if no file
-            if not movie.get('hasFile'):
-                continue
+        if result['status'] == 'already_running':
+            return
+        observe_scan(result)
+        if result['status'] == 'paused':
+            schedule_resume('Radarr', scan_radarr_library, result['retry_after'])
+            return
 
-            movie_file = movie.get('movieFile')
-            if not movie_file:
-                continue
+        logger.info(f"✓ Radarr scan complete: {result.get('processed', 0)} movies checked, {result.get('downloaded', 0)} Korean subtitles downloaded")
 
-            file_path = movie_file.get('path')
-            if not file_path:
+    except Exception as e:
+        logger.error(f"Error scanning Radarr library: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+def scan_movie_id(movie_id):
+    """scan_movie for a Radarr movie fetched when the scan reaches it"""
+    movie = fetch_arr_item(RADARR_URL, RADARR_API_KEY, 'movie', movie_id, MovieRecord.from_json)
+    return scan_movie(movie) if movie is not None else False
+
+
+def parse_episode_number(file_path):
+    """Episode number from an SxxEyy file name, or None"""
+    match = EPISODE_PATTERN.search(Path(file_path).name)
+    return int(match.group(2)) if match else None
+
+
+def fetch_episode_files(series):
+    """Get all episode files (EpisodeFileRecords) for one series"""
+    response = arr_sessions.session.get(
+        f"{SONARR_URL}/api/v3/episodefile",
+        headers={"X-Api-Key": SONARR_API_KEY},
+        params={"seriesId": series.id},
+        timeout=30,
+        stream=True
+    )
+    response.raise_for_status()
+    return list(stream_records(response, EpisodeFileRecord.from_json))
+
+
+def fetch_series_files(series_id):
+    """(SeriesRecord, episode files) for one series, or None if it has been deleted since"""
+    series = fetch_arr_item(SONARR_URL, SONARR_API_KEY, 'series', series_id, SeriesRecord.from_json)
+    if series is None:
+        return None
+    return series, fetch_episode_files(series)
+
+
+def iter_sonarr_seasons(series_ids):
+    """
+    Yield (item_key, (series, season, episode_files)) for every season with files
+
+    Sonarr's episodefile endpoint only accepts one seriesId, so each series and
+    its files are fetched (concurrently, over one pooled session) when the scan
+    reaches it. Only SCAN_CONCURRENCY fetches run ahead of the scan, so memory
+    stays flat and a paused scan stops quickly.
+
+    Args:
+        series_ids: Ids of the series to scan, in scan order
+    """
+    pending = iter(series_ids)
+
+    executor = ThreadPoolExecutor(max_workers=SCAN_CONCURRENCY, thread_name_prefix="sonarr-fetch")
+    window = deque()
+
+    def fetch_next():
+        series_id = next(pending, None)
+        if series_id is not None:
+            window.append(executor.submit(fetch_series_files, series_id))
+
+    try:
+        for _ in range(SCAN_CONCURRENCY):
+            fetch_next()
+
+        while window:
+            fetched = window.popleft().result()
+            fetch_next()
+            if fetched is None:
                 continue
+            series, episode_files = fetched
 
-            # Check if Korean subtitle already exists
-            video_path = Path(file_path)
-            subtitle_path = video_path.with_suffix('.ko.srt')
+            seasons = {}
+            for ep_file in episode_files:
+                seasons.setdefault(ep_file.season, []).append(ep_file)
 
-            if subtitle_path.exists():
-                continue  # Already has Korean subtitle
+            for season, files in seasons.items():
+                yield f"season:{series.id}:{season}", (series, season, files)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
-            # Try to download Korean subtitle
-            logger.info(f"📽️  Missing Korean subtitle: {movie['title']} ({movie.get('year')})")
 
-            results, provider = processor.search_subtitles(
-                title=movie.get('title'),
-                year=movie.get('year'),
-                imdb_id=movie.get('imdbId'),
-                tmdb_id=movie.get('tmdbId')
-            )
+def scan_season(scan_processor, series, season, episode_files):
+    """Download Korean subtitles for the episodes of one season that lack them"""
+    key = f"season:{series.id}:{season}"
+    title = f"{series.title} season {season}"
 
-            if results:
-                best_match = results[0]
-                success = processor.download_subtitle(best_match, provider, str(subtitle_path))
+    missing = []
+    for ep_file in episode_files:
+        arr_handled.add(ep_file.path)
+        # Check if Korean subtitle already exists
+        subtitle_path = Path(ep_file.path).with_suffix('.ko.srt')
+        if not subtitle_path.exists():
+            missing.append((ep_file, subtitle_path))
 
-                if success:
-                    logger.info(f"✅ Downloaded Korean subtitle for {movie['title']}")
-                    downloaded += 1
-                elif provider == "cineaste":
-                    logger.info(f"⚠️  Cineaste match found but requires manual download: {movie['title']}")
+    if not missing:
+        backlog.clear(key)
+        return 0
 
-            processed += 1
+    logger.info(f"📺 Missing Korean subtitles: {title} ({len(missing)} episode(s))")
 
-        logger.info(f"✓ Radarr scan complete: {processed} movies checked, {downloaded} Korean subtitles downloaded")
+    downloaded = 0
+    download_failed = False
+    try:
+        # One search per season, shared by every missing episode in it
+        results, provider = scan_processor.search_subtitles(
+            title=series.title,
+            imdb_id=series.imdb_id,
+            season=season
+        )
 
-    except Exception as e:
-        logger.error(f"Error scanning Radarr library: {e}")
-        import traceback
-        traceback.print_exc()
+        if not results:
+            backlog.record_miss(key, NO_RESULTS, title)
+            return 0
+
+        for ep_file, subtitle_path in missing:
+            episode_number = parse_episode_number(ep_file.path)
+            if episode_number is None:
+                logger.debug(f"No SxxEyy episode number in {Path(ep_file.path).name}, skipping")
+                continue
+            matches = scan_processor.match_episode(results, provider, episode_number)
+            if not matches:
+                continue
+
+            best_match = scan_processor.rank_results(
+                matches,
+                provider,
+                ep_file.scene_name or ep_file.path,
+                ep_file.fps
+            )[0]
+            if scan_processor.download_subtitle(best_match, provider, str(subtitle_path), fresh=False):
+                logger.info(f"✅ Downloaded Korean subtitle for {Path(ep_file.path).name}")
+                downloaded += 1
+            elif provider == "cineaste":
+                logger.info(f"⚠️  Cineaste match found but requires manual download: {series.title}")
+                break
+            else:
+                download_failed = True
+    except RateLimitExceeded as e:
+        backlog.record_miss(key, RATE_LIMITED, title, e.retry_after)
+        raise
+
+    # Episodes still without a subtitle keep the whole season in the backlog
+    if downloaded == len(missing):
+        backlog.clear(key)
+    elif provider == "cineaste":
+        backlog.record_miss(key, CAPTCHA_ONLY, title)
+    else:
+        backlog.record_miss(key, DOWNLOAD_FAILED if download_failed else NO_RESULTS, title)
+
+    return downloaded
 
 
 def scan_sonarr_library():
@@ -300,72 +971,228 @@ def scan_sonarr_library():
         logger.warning("Sonarr API key not configured, skipping scheduled scan")
         return
 
+    if not backlog_quota_available('Sonarr', scan_sonarr_library):
+        return
+
     try:
         logger.info("🔍 Starting scheduled Sonarr library scan for missing Korean subtitles")
 
-        # Get all series from Sonarr
-        response = requests.get(
+        # Get all series from Sonarr, decoded as they arrive into compact records
+        response = arr_sessions.session.get(
             f"{SONARR_URL}/api/v3/series",
             headers={"X-Api-Key": SONARR_API_KEY},
-            timeout=30
+            timeout=30,
+            stream=True
         )
         response.raise_for_status()
-        series_list = response.json()
 
-        processed = 0
-        downloaded = 0
+        # Only (value, id) keys are kept for the sort; series with no files (per
+        # the statistics already in /series) are left out
+        ranked = sorted(
+            (
+                (series_value(series), series.id)
+                for series in stream_records(response, SeriesRecord.from_json)
+                if series.episode_file_count != 0
+            ),
+            reverse=True
+        )
+
+        # Provider searches are shared across seasons and episodes for this scan
+        opensub_memo = ScanMemo(opensub_api)
+        cineaste_memo = ScanMemo(cineaste_scraper)
+        scan_processor = SubtitleProcessor(opensub=opensub_memo, cineaste=cineaste_memo)
+
+        result = scan_engine.run(
+            'sonarr',
+            backlog_due('Sonarr', iter_sonarr_seasons([series_id for _, series_id in ranked])),
+            lambda item: scan_season(scan_processor, *item)
+        )
+
+        if result['status'] == 'already_running':
+            return
+        observe_scan(result)
+        if result['status'] == 'paused':
+            schedule_resume('Sonarr', scan_sonarr_library, result['retry_after'])
+            return
+
+        logger.info(f"✓ Sonarr scan complete: {result.get('processed', 0)} seasons checked, {result.get('downloaded', 0)} Korean subtitles downloaded")
+        logger.info(
+            f"   Provider searches: OpenSubtitles {opensub_memo.calls} ({opensub_memo.hits} reused), "
+            f"Cineaste {cineaste_memo.calls} ({cineaste_memo.hits} reused)"
+        )
+
+    except Exception as e:
+        logger.error(f"Error scanning Sonarr library: {e}")
+        import traceback
+        traceback.print_exc()
+
 
-        for series in series_list:
-            # Get episode files for this series
-            series_id = series['id']
+def fetch_history(source, base_url, api_key, **params):
+    """
+    Import events an arr instance recorded since its high-water mark
+
+    Args:
+        source: "radarr" or "sonarr"
+        base_url: Instance URL
+        api_key: Instance API key
+        **params: Extra /history/since query parameters
+
+    Returns:
+        (import events, new mark or None if there were no new events), or None
+        when the history is read for the first time and the mark was only set
+    """
+    mark = history_marks.get(source)
+    if mark is None:
+        # Nothing to replay yet; older imports are left to the full scan
+        history_marks.advance(source, 0, utc_now())
+        logger.info(f"📜 Following {source} history for new imports from now on")
+        return None
+
+    last_id, last_date = mark
+    response = arr_sessions.session.get(
+        f"{base_url}/api/v3/history/since",
+        headers={"X-Api-Key": api_key},
+        params=dict(params, date=last_date),
+        timeout=30,
+        stream=True
+    )
+    response.raise_for_status()
+    return new_imports(stream_records(response, HistoryRecord.from_json), last_id)
+
+
+def fetch_arr_item(base_url, api_key, resource, item_id, project):
+    """One movie or series as a record, or None if it has been deleted since"""
+    response = arr_sessions.session.get(
+        f"{base_url}/api/v3/{resource}/{item_id}",
+        headers={"X-Api-Key": api_key},
+        timeout=30
+    )
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return project(response.json())
+
+
+def history_quota_available(source):
+    """Whether delta scan downloads are allowed; if not, the next tick tries again"""
+    if opensub_api.quota.can_download(fresh=False):
+        return True
+    logger.info(f"⏸️  {source} history scan waiting: backlog download quota used up for today")
+    return False
+
+
+def scan_radarr_history():
+    """Check the movies Radarr imported since the last history read, including while KorSub was down"""
+    if not RADARR_API_KEY:
+        return
 
-            ep_response = requests.get(
-                f"{SONARR_URL}/api/v3/episodefile",
-                headers={"X-Api-Key": SONARR_API_KEY},
-                params={"seriesId": series_id},
-                timeout=30
+    try:
+        history = fetch_history('radarr', RADARR_URL, RADARR_API_KEY)
+        if history is None:
+            return
+        imports, mark = history
+        if mark is None:
+            return
+
+        movie_ids = list(dict.fromkeys(event.movie_id for event in imports if event.movie_id))
+        if movie_ids:
+            if not history_quota_available('Radarr'):
+                return
+            logger.info(f"📜 Radarr history: {len(movie_ids)} movie(s) imported since the last check")
+
+            # A new file is worth a search now, whatever earlier files' misses were
+            for movie_id in movie_ids:
+                backlog.clear(f"movie:{movie_id}")
+
+            movies = (fetch_arr_item(RADARR_URL, RADARR_API_KEY, 'movie', movie_id, MovieRecord.from_json) for movie_id in movie_ids)
+            result = scan_engine.run(
+                'radarr_history',
+                ((f"movie:{movie.id}", movie) for movie in movies if movie is not None),
+                scan_movie,
+                total=len(movie_ids)
             )
-            ep_response.raise_for_status()
-            episode_files = ep_response.json()
 
-            for ep_file in episode_files:
-                file_path = ep_file.get('path')
-                if not file_path:
-                    continue
+            if result['status'] == 'already_running':
+                return
+            observe_scan(result)
+            if result['status'] == 'paused':
+                # Resumed from its checkpoint on a later tick; the mark stays put until then
+                return
+            logger.info(f"✓ Radarr history scan complete: {result['processed']} movies checked, {result['downloaded']} Korean subtitles downloaded")
 
-                # Check if Korean subtitle already exists
-                video_path = Path(file_path)
-                subtitle_path = video_path.with_suffix('.ko.srt')
+        history_marks.advance('radarr', *mark)
 
-                if subtitle_path.exists():
-                    continue  # Already has Korean subtitle
+    except Exception as e:
+        logger.error(f"Error scanning Radarr history: {e}")
 
-                # Try to download Korean subtitle
-                logger.info(f"📺 Missing Korean subtitle: {series['title']}")
 
-                results, provider = processor.search_subtitles(
-                    title=series.get('title'),
-                    imdb_id=series.get('imdbId')
-                )
+def iter_history_seasons(imports):
+    """Yield (item_key, (series, season, episode_files)) for the seasons that had imports"""
+    seasons = {}
+    for event in imports:
+        if event.series_id and event.season is not None:
+            seasons.setdefault(event.series_id, set()).add(event.season)
+
+    for series_id, numbers in seasons.items():
+        fetched = fetch_series_files(series_id)
+        if fetched is None:
+            continue
+
+        series, episode_files = fetched
+        for season in sorted(numbers):
+            files = [ep_file for ep_file in episode_files if ep_file.season == season]
+            if files:
+                yield f"season:{series.id}:{season}", (series, season, files)
 
-                if results:
-                    best_match = results[0]
-                    success = processor.download_subtitle(best_match, provider, str(subtitle_path))
 
-                    if success:
-                        logger.info(f"✅ Downloaded Korean subtitle for {series['title']}")
-                        downloaded += 1
-                    elif provider == "cineaste":
-                        logger.info(f"⚠️  Cineaste match found but requires manual download: {series['title']}")
+def scan_sonarr_history():
+    """Check the seasons Sonarr imported episodes into since the last history read"""
+    if not SONARR_API_KEY:
+        return
+
+    try:
+        history = fetch_history('sonarr', SONARR_URL, SONARR_API_KEY, includeEpisode='true')
+        if history is None:
+            return
+        imports, mark = history
+        if mark is None:
+            return
+
+        if imports:
+            if not history_quota_available('Sonarr'):
+                return
+            logger.info(f"📜 Sonarr history: {len(imports)} episode import(s) since the last check")
+
+            for event in imports:
+                if event.series_id and event.season is not None:
+                    backlog.clear(f"season:{event.series_id}:{event.season}")
+
+            scan_processor = SubtitleProcessor(opensub=ScanMemo(opensub_api), cineaste=ScanMemo(cineaste_scraper))
+            result = scan_engine.run(
+                'sonarr_history',
+                iter_history_seasons(imports),
+                lambda item: scan_season(scan_processor, *item)
+            )
 
-                processed += 1
+            if result['status'] == 'already_running':
+                return
+            observe_scan(result)
+            if result['status'] == 'paused':
+                return
+            logger.info(f"✓ Sonarr history scan complete: {result['processed']} seasons checked, {result['downloaded']} Korean subtitles downloaded")
 
-        logger.info(f"✓ Sonarr scan complete: {processed} episodes checked, {downloaded} Korean subtitles downloaded")
+        history_marks.advance('sonarr', *mark)
 
     except Exception as e:
-        logger.error(f"Error scanning Sonarr library: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"Error scanning Sonarr history: {e}")
+
+
+def crawl_cineaste():
+    """Add new Cineaste board posts to the local index"""
+    try:
+        cineaste_scraper.crawl_board(max_pages=CINEASTE_CRAWL_PAGES)
+    except Exception as e:
+        logger.error(f"Error crawling Cineaste board: {e}")
 
 
 @app.route('/health', methods=['GET'])
@@ -392,13 +1219,19 @@ def radarr_webhook():
         logger.info(f"📨 Radarr webhook: {event_type}")
 
         if event_type == 'Download':
-            success = processor.process_movie(payload)
-            return jsonify({'success': success}), 200
+            # Recorded now, before the media watcher's debounce reports the same file
+            arr_handled.add((payload.get('movieFile') or {}).get('path'))
+            job_id = job_queue.enqueue('radarr', payload, priority=WEBHOOK_JOB_PRIORITY)
+            logger.info(f"📥 Queued Radarr job {job_id}")
+            WEBHOOK_EVENTS.labels('radarr', event_type, 'queued').inc()
+            return jsonify({'queued': True, 'job_id': job_id}), 202
         else:
+            WEBHOOK_EVENTS.labels('radarr', event_type or 'unknown', 'ignored').inc()
             return jsonify({'ignored': True}), 200
 
     except Exception as e:
         logger.error(f"Error handling Radarr webhook: {e}")
+        WEBHOOK_EVENTS.labels('radarr', 'unknown', 'error').inc()
         return jsonify({'error': str(e)}), 500
 
 
@@ -412,58 +1245,188 @@ def sonarr_webhook():
         logger.info(f"📨 Sonarr webhook: {event_type}")
 
         if event_type == 'Download':
-            success = processor.process_episode(payload)
-            return jsonify({'success': success}), 200
+            # Recorded now, before the media watcher's debounce reports the same file
+            arr_handled.add((payload.get('episodeFile') or {}).get('path'))
+            job_id = job_queue.enqueue('sonarr', payload, priority=WEBHOOK_JOB_PRIORITY)
+            logger.info(f"📥 Queued Sonarr job {job_id}")
+            WEBHOOK_EVENTS.labels('sonarr', event_type, 'queued').inc()
+            return jsonify({'queued': True, 'job_id': job_id}), 202
         else:
+            WEBHOOK_EVENTS.labels('sonarr', event_type or 'unknown', 'ignored').inc()
             return jsonify({'ignored': True}), 200
 
     except Exception as e:
         logger.error(f"Error handling Sonarr webhook: {e}")
+        WEBHOOK_EVENTS.labels('sonarr', 'unknown', 'error').inc()
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/manual/search', methods=['POST'])
-def manual_search():
-    """Manual search endpoint"""
-    try:
-        data = request.get_json()
-        title = data.get('title')
-        year = data.get('year')
-        imdb_id = data.get('imdb_id')
-        tmdb_id = data.get('tmdb_id')
+@app.route('/jobs', methods=['GET'])
+def jobs():
+    """Job queue depth, in-flight jobs and completion rates"""
+    return jsonify(job_queue.stats()), 200
 
-        if not any([title, imdb_id, tmdb_id]):
-            return jsonify({'error': 'title, imdb_id, or tmdb_id required'}), 400
 
-        results, provider = processor.search_subtitles(
+@app.route('/watch', methods=['GET'])
+def watch_status():
+    """Media path watch: directories watched and files reported"""
+    return jsonify(dict(media_watcher.stats(), arr_handled_paths=len(arr_handled))), 200
+
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """OpenSubtitles search cache and rate limiter counters"""
+    return jsonify({
+        'search_cache': opensub_api.cache.stats(),
+        'rate_limiter': dict(opensub_api.limiter.stats(), rate_limit_hits=opensub_api.rate_limit_hits),
+        'download_quota': opensub_api.quota.stats(),
+        'cineaste_index': cineaste_scraper.index.stats()
+    }), 200
+
+
+@app.route('/backlog', methods=['GET'])
+def backlog_status():
+    """Missing-subtitle backlog: size by last outcome and the next items to be retried"""
+    return jsonify(backlog.stats()), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metrics"""
+    body, content_type = render()
+    return body, 200, {'Content-Type': content_type}
+
+
+def run_manual_search(data, search_processor=None):
+    """
+    Run one manual search query
+
+    Args:
+        data: Query with title, year, imdb_id and/or tmdb_id
+        search_processor: Processor to search with (defaults to the shared one)
+
+    Returns:
+        (response dictionary, HTTP status)
+    """
+    search_processor = search_processor or processor
+    title = data.get('title')
+    year = data.get('year')
+    imdb_id = data.get('imdb_id')
+    tmdb_id = data.get('tmdb_id')
+
+    if not any([title, imdb_id, tmdb_id]):
+        return {'error': 'title, imdb_id, or tmdb_id required'}, 400
+
+    try:
+        results, provider = search_processor.search_subtitles(
             title=title,
             year=year,
             imdb_id=imdb_id,
             tmdb_id=tmdb_id
         )
+    except RateLimitExceeded as e:
+        return {'error': str(e), 'rate_limited': True, 'retry_after': int(e.retry_after) + 1}, 429
+
+    # Format results based on provider
+    formatted_results = []
+    if provider == "opensubtitles":
+        for result in results[:10]:
+            details = opensub_api.get_subtitle_details(result)
+            formatted_results.append(details)
+    elif provider == "cineaste":
+        formatted_results = results[:10]
+
+    return {
+        'query': title or imdb_id or tmdb_id,
+        'year': year,
+        'provider': provider or 'none',
+        'results_count': len(results),
+        'results': formatted_results
+    }, 200
 
-        # Format results based on provider
-        formatted_results = []
-        if provider == "opensubtitles":
-            for result in results[:10]:
-                details = opensub_api.get_subtitle_details(result)
-                formatted_results.append(details)
-        elif provider == "cineaste":
-            formatted_results = results[:10]
 
-        return jsonify({
-            'query': title or imdb_id or tmdb_id,
-            'year': year,
-            'provider': provider or 'none',
-            'results_count': len(results),
-            'results': formatted_results
-        }), 200
+@app.route('/manual/search', methods=['POST'])
+def manual_search():
+    """Manual search endpoint"""
+    try:
+        body, status = run_manual_search(request.get_json())
+        if body.get('rate_limited'):
+            return jsonify(body), status, {'Retry-After': str(body['retry_after'])}
+        return jsonify(body), status
 
     except Exception as e:
         logger.error(f"Error in manual search: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/manual/search/batch', methods=['POST'])
+def manual_search_batch():
+    """
+    Search many titles or IDs at once
+
+    Body: {"items": [{"title": "Tron Legacy", "year": 2010}, {"imdb_id": "tt1104001"}, "Parasite", ...]}
+
+    Items run concurrently (BATCH_SEARCH_CONCURRENCY) under the shared
+    OpenSubtitles rate limiter. Each result is streamed as one line of JSON as
+    soon as it is ready, in completion order, with the item's "index" and
+    "status" (the HTTP status /manual/search would have returned).
+    """
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'items must be a non-empty list'}), 400
+    if len(items) > BATCH_SEARCH_MAX_ITEMS:
+        return jsonify({'error': f'at most {BATCH_SEARCH_MAX_ITEMS} items per batch'}), 400
+
+    items = [{'title': item} if isinstance(item, str) else item for item in items]
+    logger.info(f"📨 Batch manual search: {len(items)} item(s)")
+
+    # Repeated queries within the batch are searched once
+    batch_processor = SubtitleProcessor(opensub=ScanMemo(opensub_api), cineaste=ScanMemo(cineaste_scraper))
+
+    def search(item):
+        if not isinstance(item, dict):
+            return {'error': 'item must be an object or a title string'}, 400
+        try:
+            return run_manual_search(item, batch_processor)
+        except Exception as e:
+            logger.error(f"Error in batch search for {item}: {e}")
+            return {'error': str(e)}, 500
+
+    futures = {batch_executor.submit(search, item): index for index, item in enumerate(items)}
+
+    def stream():
+        try:
+            for future in as_completed(futures):
+                body, status = future.result()
+                yield json.dumps(dict(body, index=futures[future], status=status), ensure_ascii=False) + '\n'
+        finally:
+            # Client went away: drop the items that haven't started
+            for future in futures:
+                future.cancel()
+
+    return Response(stream(), mimetype='application/x-ndjson')
+
+
+@app.route('/scan/status', methods=['GET'])
+def scan_status():
+    """Progress of the current or most recent library scans"""
+    return jsonify(scan_engine.progress()), 200
+
+
+@app.route('/scan/history', methods=['POST'])
+def trigger_history_scan():
+    """Check Radarr and Sonarr history for new imports now"""
+    try:
+        logger.info("📨 Manual history scan triggered")
+        scan_radarr_history()
+        scan_sonarr_history()
+        return jsonify({'success': True, 'marks': history_marks.stats()}), 200
+    except Exception as e:
+        logger.error(f"Error in manual history scan: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/scan/radarr', methods=['POST'])
 def trigger_radarr_scan():
     """Manually trigger Radarr library scan"""
@@ -498,11 +1461,15 @@ if __name__ == '__main__':
     logger.info("Provider Priority:")
     logger.info("  1️⃣  OpenSubtitles.com (fast, reliable)")
     logger.info("  2️⃣  Cineaste.co.kr (fallback for rare movies)")
+    logger.info(f"  🏁 Policy: {PROVIDER_POLICY}" + (f" (hedge after {HEDGE_DELAY_SECONDS}s)" if PROVIDER_POLICY == "hedged" else ""))
     logger.info("=" * 60)
     logger.info("Automation:")
     logger.info("  📨 Webhooks: Radarr & Sonarr (instant on download)")
+    logger.info(f"  📋 Job queue: {JOB_WORKERS} worker(s), persisted at {DB_PATH}")
+    logger.info(f"  👀 Media watch: {'new video files under ' + MEDIA_PATH if MEDIA_WATCH else 'disabled'}")
     if RADARR_API_KEY or SONARR_API_KEY:
-        logger.info(f"  ⏰ Scheduled Scans: Every {SCAN_INTERVAL_HOURS} hours")
+        logger.info(f"  📜 History scans: every {HISTORY_SCAN_INTERVAL_MINUTES} minutes and on startup")
+        logger.info(f"  ⏰ Full library scans: every {SCAN_INTERVAL_HOURS} hours")
         if RADARR_API_KEY:
             logger.info("     ✓ Radarr library scanning enabled")
         if SONARR_API_KEY:
@@ -511,27 +1478,82 @@ if __name__ == '__main__':
         logger.info("  ⏰ Scheduled Scans: Disabled (no API keys configured)")
     logger.info("=" * 60)
 
-    # Schedule periodic scans if API keys are configured
+    # Schedule periodic scans if API keys are configured: history scans pick up
+    # new imports (also those missed while down, hence one at startup), the
+    # full library scans are a consistency sweep
     if RADARR_API_KEY:
+        scheduler.add_job(
+            scan_radarr_history,
+            'interval',
+            minutes=HISTORY_SCAN_INTERVAL_MINUTES,
+            id='radarr_history',
+            name='Check Radarr history for new imports',
+            max_instances=1,
+            coalesce=True,
+            next_run_time=datetime.now()
+        )
         scheduler.add_job(
             scan_radarr_library,
             'interval',
             hours=SCAN_INTERVAL_HOURS,
             id='radarr_scan',
             name='Scan Radarr for missing Korean subtitles',
-            next_run_time=None  # Don't run immediately on startup
+            max_instances=1,
+            coalesce=True
         )
-        logger.info(f"✓ Scheduled Radarr scans every {SCAN_INTERVAL_HOURS} hours")
+        logger.info(f"✓ Scheduled Radarr history scans every {HISTORY_SCAN_INTERVAL_MINUTES} minutes, full scans every {SCAN_INTERVAL_HOURS} hours")
 
     if SONARR_API_KEY:
+        scheduler.add_job(
+            scan_sonarr_history,
+            'interval',
+            minutes=HISTORY_SCAN_INTERVAL_MINUTES,
+            id='sonarr_history',
+            name='Check Sonarr history for new imports',
+            max_instances=1,
+            coalesce=True,
+            next_run_time=datetime.now()
+        )
         scheduler.add_job(
             scan_sonarr_library,
             'interval',
             hours=SCAN_INTERVAL_HOURS,
             id='sonarr_scan',
             name='Scan Sonarr for missing Korean subtitles',
-            next_run_time=None  # Don't run immediately on startup
+            max_instances=1,
+            coalesce=True
         )
-        logger.info(f"✓ Scheduled Sonarr scans every {SCAN_INTERVAL_HOURS} hours")
-
-    app.run(host='0.0.0.0', port=PORT, debug=False)
+        logger.info(f"✓ Scheduled Sonarr history scans every {HISTORY_SCAN_INTERVAL_MINUTES} minutes, full scans every {SCAN_INTERVAL_HOURS} hours")
+
+    scheduler.add_job(
+        crawl_cineaste,
+        'interval',
+        minutes=CINEASTE_CRAWL_INTERVAL_MINUTES,
+        id='cineaste_crawl',
+        name='Crawl new Cineaste board posts into the local index',
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.now()
+    )
+    logger.info(f"✓ Scheduled Cineaste board crawls every {CINEASTE_CRAWL_INTERVAL_MINUTES} minutes")
+
+    scheduler.start()
+    job_queue.start()
+    if MEDIA_WATCH:
+        media_watcher.start()
+
+    logger.info(
+        f"⏱️  Startup: imports {IMPORTS_DONE - STARTUP_BEGAN:.2f}s, "
+        f"ready {time.perf_counter() - STARTUP_BEGAN:.2f}s, "
+        f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB "
+        f"(PYTHONPROFILEIMPORTTIME=1 prints an import profile)"
+    )
+
+    def shutdown():
+        """Drain in-flight jobs once requests have finished; queued jobs resume on next start"""
+        scheduler.shutdown(wait=False)
+        media_watcher.stop()
+        batch_executor.shutdown(wait=False, cancel_futures=True)
+        job_queue.drain(timeout=JOB_DRAIN_TIMEOUT)
+
+    serve(app, PORT, drain_timeout=JOB_DRAIN_TIMEOUT, on_shutdown=shutdown)
@@ -10,6 +10,7 @@ import logging
 from flask import Flask, request, jsonify
 from pathlib import Path
 from opensubtitles_api import OpenSubtitlesAPI
+from wsgi_server import serve
 
 # Configuration
 MEDIA_PATH = os.getenv("MEDIA_PATH", "/data/media")
@@ -280,4 +281,4 @@ if __name__ == '__main__':
         logger.warning("Then set environment variable: OPENSUBTITLES_API_KEY")
         logger.warning("=" * 60)
 
-    app.run(host='0.0.0.0', port=PORT, debug=False)
+    serve(app, PORT)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Lazily built shared objects
+Lazy wraps a factory and builds the object on first attribute access, so a
+provider a deployment never uses (and the parsers it imports) costs nothing
+at startup.
+"""
+
+import threading
+from typing import Any, Callable
+
+
+class Lazy:
+    """Proxy that builds its target on first use; thread-safe"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._target = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the target has been built yet"""
+        return self._target is not None
+
+    def _load(self) -> Any:
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = self._factory()
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Filesystem watch for new video files
+Files that reach the library outside Radarr/Sonarr (manual copies, other
+tools) were only found by the library scans. MediaWatcher puts an inotify
+watch (through ctypes, no extra dependency) on every directory under the
+media root and reports a video file once it has been written and closed or
+moved in, and no further event for it arrived for a debounce interval. The
+thread sleeps in select() between events, so the tree is never polled.
+Radarr/Sonarr imports trigger the watch as well; HandledPaths remembers the
+files their webhooks and history scans took care of so those are skipped.
+"""
+
+import os
+import errno
+import ctypes
+import select
+import struct
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger("MediaWatcher")
+
+VIDEO_EXTENSIONS = frozenset({
+    '.mkv', '.mp4', '.m4v', '.avi', '.mov', '.wmv', '.ts', '.m2ts', '.mpg', '.mpeg', '.webm'
+})
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Finished files, and new directories (which need watches of their own)
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_ONLYDIR
+
+EVENT_HEADER = struct.Struct('iIII')
+READ_SIZE = 64 * 1024
+
+
+def _load_inotify():
+    """libc with the inotify calls prototyped, or None where there is no inotify"""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class HandledPaths:
+    """Recently seen file paths, forgotten after a TTL"""
+
+    def __init__(self, ttl: float = 86400):
+        """
+        Initialize path registry
+
+        Args:
+            ttl: Seconds a path is remembered
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._paths: Dict[str, float] = {}
+
+    def add(self, path: Optional[str]):
+        """Remember a path (None is ignored)"""
+        if not path:
+            return
+        now = time.monotonic()
+        with self._lock:
+            # Insertion order is expiry order, so expired paths are at the front
+            for old, expires in list(self._paths.items()):
+                if expires > now:
+                    break
+                del self._paths[old]
+            self._paths.pop(os.path.normpath(path), None)
+            self._paths[os.path.normpath(path)] = now + self.ttl
+
+    def __contains__(self, path: str) -> bool:
+        with self._lock:
+            expires = self._paths.get(os.path.normpath(path))
+        return expires is not None and expires > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+
+class MediaWatcher:
+    """Reports new video files under a directory tree via inotify"""
+
+    def __init__(
+        self,
+        root: str,
+        on_file: Callable[[str], None],
+        debounce: float = 10.0,
+        extensions: Iterable[str] = VIDEO_EXTENSIONS
+    ):
+        """
+        Initialize watcher
+
+        Args:
+            root: Directory tree to watch
+            on_file: Called from the watcher thread with each settled video file path
+            debounce: Seconds without further events before a file is reported
+            extensions: Lowercase file extensions to report
+        """
+        self.root = os.path.abspath(root)
+        self.on_file = on_file
+        self.debounce = debounce
+        self.extensions = frozenset(extensions)
+
+        self._libc = None
+        self._fd: Optional[int] = None
+        self._wake_read, self._wake_write = None, None
+        self._paths: Dict[int, bytes] = {}
+        self._pending: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._limit_warned = False
+
+        self.reported = 0
+        self.overflows = 0
+
+    def start(self) -> bool:
+        """
+        Start watching in a background thread
+
+        Returns:
+            False if inotify is unavailable or the root is not a directory
+        """
+        if not os.path.isdir(self.root):
+            logger.warning(f"Media path {self.root} does not exist, not watching it")
+            return False
+
+        self._libc = _load_inotify()
+        if self._libc is None:
+            logger.warning("inotify is not available on this platform, not watching the media path")
+            return False
+
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            logger.warning(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+            return False
+
+        self._fd = fd
+        self._wake_read, self._wake_write = os.pipe()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="media-watcher", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop the watcher thread; files still settling are dropped"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        os.write(self._wake_write, b'x')
+        self._thread.join(timeout=5)
+        self._thread = None
+
+        for fd in (self._fd, self._wake_read, self._wake_write):
+            os.close(fd)
+        self._fd = self._wake_read = self._wake_write = None
+        self._paths.clear()
+
+    def stats(self) -> Dict:
+        """Watch count and reporting counters"""
+        return {
+            'root': self.root,
+            'watching': self._thread is not None,
+            'directories': len(self._paths),
+            'settling': len(self._pending),
+            'files_reported': self.reported,
+            'queue_overflows': self.overflows
+        }
+
+    def _run(self):
+        started = time.monotonic()
+        self._watch_tree(os.fsencode(self.root), report=False)
+        logger.info(f"👀 Watching {len(self._paths)} directories under {self.root} ({time.monotonic() - started:.1f}s to set up)")
+
+        while not self._stopping.is_set():
+            timeout = None
+            if self._pending:
+                timeout = max(min(self._pending.values()) - time.monotonic(), 0)
+
+            readable, _, _ = select.select([self._fd, self._wake_read], [], [], timeout)
+            if self._fd in readable:
+                self._read_events()
+            self._report_settled()
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; the history and library scans still cover those files
+                self.overflows += 1
+                logger.warning("⚠️  inotify queue overflowed, some new files may only be found by the next scan")
+                continue
+            if mask & IN_IGNORED:
+                self._paths.pop(wd, None)
+                continue
+
+            parent = self._paths.get(wd)
+            if parent is None or not name:
+                continue
+            path = os.path.join(parent, name)
+
+            if mask & IN_ISDIR:
+                # Files created in or moved in with the directory before its watch
+                # existed get no events of their own
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(path, report=True)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self._settle(path)
+
+    def _watch_tree(self, top: bytes, report: bool):
+        """Watch a directory and everything below it, optionally reporting the videos already there"""
+        for directory, _, files in os.walk(top):
+            if not self._add_watch(directory):
+                continue
+            if report:
+                for name in files:
+                    self._settle(os.path.join(directory, name))
+
+    def _add_watch(self, directory: bytes) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, directory, WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC and not self._limit_warned:
+                self._limit_warned = True
+                logger.warning(
+                    f"⚠️  inotify watch limit reached after {len(self._paths)} directories; "
+                    f"raise fs.inotify.max_user_watches to watch the whole media path"
+                )
+            elif error != errno.ENOSPC:
+                logger.debug(f"Cannot watch {os.fsdecode(directory)}: {os.strerror(error)}")
+            return False
+
+        # A directory moved within the tree keeps its watch descriptor; this updates its path
+        self._paths[wd] = directory
+        return True
+
+    def _settle(self, path: bytes):
+        """(Re)start the debounce interval for a video file"""
+        path = os.fsdecode(path)
+        if os.path.splitext(path)[1].lower() in self.extensions:
+            self._pending[path] = time.monotonic() + self.debounce
+
+    def _report_settled(self):
+        now = time.monotonic()
+        settled = [path for path, deadline in self._pending.items() if deadline <= now]
+        for path in settled:
+            del self._pending[path]
+            self.reported += 1
+            try:
+                self.on_file(path)
+            except Exception as e:
+                logger.error(f"Error handling new file {path}: {e}")
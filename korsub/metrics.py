@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics for KorSub
+Provider latency, webhook events and scan results are recorded as they happen.
+Figures the components already keep (search caches, rate limiter, download
+quota, job queue, subtitle backlog) are read by a collector only when /metrics is scraped, so
+they add nothing to the cost of a request.
+"""
+
+from typing import Dict, Iterator, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+
+PROVIDER_LATENCY = Histogram(
+    'korsub_provider_request_seconds',
+    'Time waiting for a provider search or download',
+    ['provider', 'endpoint'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+WEBHOOK_EVENTS = Counter(
+    'korsub_webhook_events_total',
+    'Radarr/Sonarr webhook events received',
+    ['source', 'event_type', 'outcome']
+)
+
+SCAN_DURATION = Histogram(
+    'korsub_scan_duration_seconds',
+    'Duration of library scan runs',
+    ['scan', 'status'],
+    buckets=(60, 300, 900, 1800, 3600, 7200, 14400, 43200, 86400)
+)
+
+SCAN_ITEMS = Histogram(
+    'korsub_scan_items',
+    'Items (movies or seasons) checked per library scan run',
+    ['scan'],
+    buckets=(10, 100, 500, 1000, 5000, 10000, 50000, 100000)
+)
+
+
+def observe_scan(result: Dict):
+    """Record a finished or paused run from ScanEngine.run()"""
+    if not result.get('finished_at'):
+        return
+    SCAN_DURATION.labels(result['name'], result['status']).observe(result['finished_at'] - result['started_at'])
+    SCAN_ITEMS.labels(result['name']).observe(result['processed'])
+
+
+def _built(provider) -> bool:
+    """False for a lazily built provider nobody has used yet (scrapes don't build it)"""
+    return getattr(provider, 'loaded', True)
+
+
+class StatsCollector:
+    """Exports the counters of an OpenSubtitles client, Cineaste cache/scraper, job queue and backlog"""
+
+    def __init__(self, opensubtitles, cineaste_cache, cineaste, job_queue, backlog=None):
+        self.opensubtitles = opensubtitles
+        self.cineaste_cache = cineaste_cache
+        self.cineaste = cineaste
+        self.job_queue = job_queue
+        self.backlog = backlog
+
+    def describe(self) -> Iterator[Metric]:
+        # Registering would otherwise run a full collect() at import time
+        return iter(())
+
+    def collect(self) -> Iterator[Metric]:
+        caches = [('cineaste', self.cineaste_cache)]
+        if _built(self.opensubtitles):
+            caches.insert(0, ('opensubtitles', self.opensubtitles.cache))
+
+        lookups = CounterMetricFamily(
+            'korsub_search_cache_lookups', 'Search cache lookups by result', labels=['cache', 'result']
+        )
+        hit_ratio = GaugeMetricFamily(
+            'korsub_search_cache_hit_ratio', 'Search cache hits per lookup since start', labels=['cache']
+        )
+        for name, cache in caches:
+            stats = cache.stats()
+            for result in ('memory_hits', 'disk_hits', 'misses'):
+                lookups.add_metric([name, result], stats[result])
+            if stats['hit_ratio'] is not None:
+                hit_ratio.add_metric([name], stats['hit_ratio'])
+        yield lookups
+        yield hit_ratio
+
+        if _built(self.opensubtitles):
+            yield from self._opensubtitles()
+
+        if _built(self.cineaste):
+            yield GaugeMetricFamily(
+                'korsub_cineaste_index_posts', 'Cineaste board posts in the local index',
+                value=self.cineaste.index.stats()['posts']
+            )
+
+        queue = self.job_queue.stats()
+        yield GaugeMetricFamily('korsub_job_queue_depth', 'Queued webhook jobs', value=queue['queue_depth'])
+        yield GaugeMetricFamily('korsub_jobs_in_flight', 'Webhook jobs being processed', value=len(queue['in_flight']))
+
+        if self.backlog is not None:
+            backlog = GaugeMetricFamily(
+                'korsub_backlog_items', 'Items without a Korean subtitle, by last outcome', labels=['outcome']
+            )
+            for outcome, items in self.backlog.counts():
+                backlog.add_metric([outcome], items)
+            yield backlog
+
+    def _opensubtitles(self) -> Iterator[Metric]:
+        limiter = self.opensubtitles.limiter.stats()
+        yield CounterMetricFamily(
+            'korsub_rate_limit_hits', 'HTTP 429 responses from OpenSubtitles',
+            value=self.opensubtitles.rate_limit_hits
+        )
+        yield CounterMetricFamily(
+            'korsub_rate_limiter_throttled', 'OpenSubtitles requests delayed by the local rate limiter',
+            value=limiter['throttled']
+        )
+        yield CounterMetricFamily(
+            'korsub_rate_limiter_wait_seconds', 'Time spent waiting on the local rate limiter',
+            value=limiter['seconds_waited']
+        )
+
+        quota = self.opensubtitles.quota.stats()
+        if quota['remaining'] is not None:
+            yield GaugeMetricFamily(
+                'korsub_download_quota_remaining', 'OpenSubtitles downloads left today', value=quota['remaining']
+            )
+        yield CounterMetricFamily(
+            'korsub_download_quota_exhausted', 'Downloads refused because the daily quota was used up',
+            value=quota['exhausted_hits']
+        )
+
+
+def register_stats(collector: StatsCollector):
+    REGISTRY.register(collector)
+
+
+def render() -> Tuple[bytes, str]:
+    """(body, content type) for a /metrics response"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+OpenSubtitles moviehash computation
+The hash is the file size plus the 64-bit little-endian word sums of the first
+and last 64 KiB, so only 128 KiB is read per file (with positioned reads) no
+matter how large the video is. Results are cached by device, inode, size and
+mtime so unchanged files are never read twice.
+"""
+
+import os
+import struct
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from storage import connect
+
+logger = logging.getLogger("MovieHash")
+
+CHUNK_SIZE = 64 * 1024
+WORDS = struct.Struct(f"<{CHUNK_SIZE // 8}Q")
+HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+def compute_moviehash(path: str) -> Optional[str]:
+    """
+    Compute the OpenSubtitles moviehash of a file
+
+    Args:
+        path: Video file path
+
+    Returns:
+        16-character hex hash, or None if the file is unreadable or smaller than 128 KiB
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError as e:
+        logger.debug(f"Cannot open {path} for hashing: {e}")
+        return None
+
+    try:
+        size = os.fstat(fd).st_size
+        if size < CHUNK_SIZE * 2:
+            return None
+
+        head = os.pread(fd, CHUNK_SIZE, 0)
+        tail = os.pread(fd, CHUNK_SIZE, size - CHUNK_SIZE)
+        if len(head) < CHUNK_SIZE or len(tail) < CHUNK_SIZE:
+            return None
+
+        value = (size + sum(WORDS.unpack(head)) + sum(WORDS.unpack(tail))) & HASH_MASK
+        return f"{value:016x}"
+
+    except OSError as e:
+        logger.debug(f"Error hashing {path}: {e}")
+        return None
+
+    finally:
+        os.close(fd)
+
+
+class MovieHasher:
+    """Moviehash lookups cached by (device, inode, size, mtime)"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS moviehash_cache (
+        dev INTEGER NOT NULL,
+        ino INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        hash TEXT NOT NULL,
+        PRIMARY KEY (dev, ino)
+    );
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = 65536, workers: int = 4):
+        """
+        Initialize hasher
+
+        Args:
+            db_path: SQLite database path for the persistent cache (memory-only if None)
+            max_entries: Hashes kept in memory
+            workers: Threads used by hash_files()
+        """
+        self.max_entries = max_entries
+        self.workers = workers
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.computed = 0
+
+        self._conn = None
+        if db_path:
+            self._conn = connect(db_path)
+            with self._lock, self._conn:
+                self._conn.executescript(self.SCHEMA)
+
+    def hash(self, path: str) -> Optional[str]:
+        """Moviehash of a file, reading it only if it changed since it was last hashed"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+
+        identity: Tuple[int, int] = (st.st_dev, st.st_ino)
+        version: Tuple[int, int] = (st.st_size, st.st_mtime_ns)
+
+        with self._lock:
+            cached = self._memory.get(identity)
+            if cached is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, hash FROM moviehash_cache WHERE dev = ? AND ino = ?", identity
+                ).fetchone()
+                if row is not None:
+                    cached = ((row['size'], row['mtime_ns']), row['hash'])
+
+            if cached is not None and cached[0] == version:
+                self._remember(identity, cached)
+                self.hits += 1
+                return cached[1]
+
+        value = compute_moviehash(path)
+        if value is None:
+            return None
+
+        with self._lock:
+            self.computed += 1
+            self._remember(identity, (version, value))
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO moviehash_cache (dev, ino, size, mtime_ns, hash) VALUES (?, ?, ?, ?, ?)",
+                        identity + version + (value,)
+                    )
+        return value
+
+    def hash_files(self, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Hash several files in parallel (reads release the GIL)"""
+        paths = list(paths)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="moviehash") as executor:
+            return dict(zip(paths, executor.map(self.hash, paths)))
+
+    def _remember(self, identity, entry):
+        """Insert into the in-memory LRU (caller holds the lock)"""
+        self._memory[identity] = entry
+        self._memory.move_to_end(identity)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
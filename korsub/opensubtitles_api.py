@@ -5,44 +5,318 @@ Official API documentation: https://opensubtitles.stoplight.io/
 """
 
 import os
+import json
+import random
 import requests
 import logging
+import threading
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
 from typing import List, Dict, Optional
 import time
 
+from download_quota import DownloadQuota, DownloadQuotaExceeded
+from http_pool import SessionPool
+from rate_limiter import TokenBucket
+from storage import connect
+from subtitle_sink import save_subtitle
+
 logger = logging.getLogger("OpenSubtitles")
 
 
+class RateLimitExceeded(Exception):
+    """OpenSubtitles kept answering 429 after the client's retries"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"OpenSubtitles rate limit exceeded, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class SearchCache:
+    """
+    Two-tier cache for search results
+
+    A bounded in-memory LRU sits in front of a SQLite table that survives
+    restarts. Results with subtitles and empty "no Korean subs" results have
+    separate TTLs, since new subtitles for a title appear far less often than
+    the same title gets searched again. Expired rows are pruned every
+    PRUNE_EVERY stores and the table is capped at max_disk_entries rows.
+    """
+
+    # Stores between prunes of the SQLite tier
+    PRUNE_EVERY = 500
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS search_cache (
+        key TEXT PRIMARY KEY,
+        results TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_search_cache_expires ON search_cache (expires_at);
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: int = 1024,
+        hit_ttl: int = 86400,
+        miss_ttl: int = 21600,
+        max_disk_entries: int = 100000
+    ):
+        """
+        Initialize search cache
+
+        Args:
+            db_path: SQLite database path for the persistent tier (memory-only if None)
+            max_entries: Maximum entries kept in the in-memory LRU
+            hit_ttl: Seconds to keep results that contain subtitles
+            miss_ttl: Seconds to keep empty results
+            max_disk_entries: Maximum rows kept in the SQLite tier; the rows
+                closest to expiring are dropped first
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.hit_ttl = hit_ttl
+        self.miss_ttl = miss_ttl
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict = OrderedDict()
+        self._counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'disk_pruned': 0
+        }
+        self._stores_since_prune = 0
+
+        self._conn = None
+        if db_path:
+            self._conn = connect(db_path)
+            with self._lock:
+                with self._conn:
+                    self._conn.executescript(self.SCHEMA)
+                self._prune(time.time())
+
+    @staticmethod
+    def make_key(params: Dict) -> str:
+        """Cache key for normalized search parameters"""
+        return json.dumps(params, sort_keys=True, separators=(',', ':'))
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Cached results for key, or None on a miss"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, results = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return list(results)
+                del self._memory[key]
+                self._counters['expirations'] += 1
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT results, expires_at FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row['expires_at'] > now:
+                    results = json.loads(row['results'])
+                    self._remember(key, row['expires_at'], results)
+                    self._counters['disk_hits'] += 1
+                    return list(results)
+
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, key: str, results: List[Dict]):
+        """Store results with the TTL for hits or empty results"""
+        now = time.time()
+        expires_at = now + (self.hit_ttl if results else self.miss_ttl)
+
+        with self._lock:
+            self._remember(key, expires_at, results)
+            self._counters['stores'] += 1
+
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO search_cache (key, results, expires_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(results), expires_at)
+                    )
+
+                # The service runs for weeks; expired rows are never read again
+                self._stores_since_prune += 1
+                if self._stores_since_prune >= self.PRUNE_EVERY:
+                    self._prune(now)
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+            if self._conn is not None:
+                stats['disk_entries'] = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 3) if lookups else None
+        return stats
+
+    def _prune(self, now: float):
+        """Delete expired rows, then the rows closest to expiring beyond the cap (caller holds the lock)"""
+        self._stores_since_prune = 0
+        with self._conn:
+            pruned = self._conn.execute("DELETE FROM search_cache WHERE expires_at < ?", (now,)).rowcount
+            excess = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0] - self.max_disk_entries
+            if excess > 0:
+                pruned += self._conn.execute(
+                    "DELETE FROM search_cache WHERE key IN (SELECT key FROM search_cache ORDER BY expires_at LIMIT ?)",
+                    (excess,)
+                ).rowcount
+        self._counters['disk_pruned'] += pruned
+
+    def _remember(self, key: str, expires_at: float, results: List[Dict]):
+        """Insert into the in-memory LRU (caller holds the lock)"""
+        self._memory[key] = (expires_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters['evictions'] += 1
+
+
 class OpenSubtitlesAPI:
     """Client for OpenSubtitles.com REST API"""
 
-    BASE_URL = "https://api.opensubtitles.com/api/v1"
+    BASE_URL = os.getenv("OPENSUBTITLES_BASE_URL", "https://api.opensubtitles.com/api/v1")
 
-    def __init__(self, api_key: Optional[str] = None, user_agent: str = "KorSub v1.0"):
+    # Documented limit is 5 requests per second per IP
+    RATE_LIMIT_PER_SECOND = 5
+    # Upper bound of random delay added before each retry so threads don't retry in lockstep
+    RETRY_JITTER = 1.0
+    # Results pages read for a whole-season search (60 results per page)
+    MAX_SEASON_PAGES = 10
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        user_agent: str = "KorSub v1.0",
+        cache: Optional[SearchCache] = None,
+        limiter: Optional[TokenBucket] = None,
+        max_retries: int = 3,
+        quota: Optional[DownloadQuota] = None,
+        pool_size: int = 16
+    ):
         """
         Initialize OpenSubtitles API client
 
         Args:
             api_key: OpenSubtitles.com API key (optional for search, required for download)
             user_agent: User agent string (required by API)
+            cache: Search result cache (defaults to a memory-only cache)
+            limiter: Rate limiter shared by all API calls (defaults to the documented limit)
+            max_retries: Retries after a 429 before raising RateLimitExceeded
+            quota: Daily download quota manager (defaults to a memory-only one)
+            pool_size: Keep-alive connections shared by the calling threads
         """
         self.api_key = api_key or os.getenv("OPENSUBTITLES_API_KEY", "")
         self.user_agent = user_agent
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.cache = cache or SearchCache()
+        self.limiter = limiter or TokenBucket(self.RATE_LIMIT_PER_SECOND)
+        self.max_retries = max_retries
+        self.rate_limit_hits = 0
+        # 429s arrive on provider, scan and batch threads at once
+        self._hits_lock = threading.Lock()
+        self.quota = quota or DownloadQuota()
+        headers = {
             'User-Agent': self.user_agent,
             'Accept': 'application/json',
             'Content-Type': 'application/json'
-        })
+        }
 
         if self.api_key:
-            self.session.headers.update({
-                'Api-Key': self.api_key
-            })
+            headers['Api-Key'] = self.api_key
             logger.info("OpenSubtitles API initialized with API key")
         else:
             logger.warning("OpenSubtitles API initialized WITHOUT API key (search-only mode)")
 
+        # Each thread (webhook jobs, scans, request handlers) gets its own session
+        self._sessions = SessionPool(pool_size, headers)
+
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session for the calling thread"""
+        return self._sessions.session
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send an API request through the shared rate limiter
+
+        A 429 pauses the limiter for the delay the server asks for (so every
+        thread backs off), then the request is retried with jitter.
+
+        Raises:
+            RateLimitExceeded: Still rate limited after max_retries retries
+        """
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            response = self.session.request(method, url, **kwargs)
+
+            if response.status_code != 429:
+                # Back off before the server has to tell us to
+                if response.headers.get('X-RateLimit-Remaining', response.headers.get('RateLimit-Remaining')) == '0':
+                    reset = self._reset_seconds(response.headers)
+                    if reset:
+                        self.limiter.pause(reset)
+                return response
+
+            with self._hits_lock:
+                self.rate_limit_hits += 1
+            delay = self._retry_delay(response.headers, attempt)
+            self.limiter.pause(delay)
+
+            if attempt < self.max_retries:
+                logger.warning(f"Rate limit exceeded - retrying in {delay:.1f}s (retry {attempt + 1}/{self.max_retries})")
+                time.sleep(random.uniform(0, self.RETRY_JITTER))
+
+        raise RateLimitExceeded(delay)
+
+    def _retry_delay(self, headers, attempt: int) -> float:
+        """Seconds to wait after a 429, from Retry-After/X-RateLimit-* or exponential backoff"""
+        retry_after = headers.get('Retry-After')
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                try:
+                    return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+                except (TypeError, ValueError):
+                    pass
+
+        reset = self._reset_seconds(headers)
+        if reset is not None:
+            return reset
+
+        return float(2 ** attempt)
+
+    @staticmethod
+    def _reset_seconds(headers) -> Optional[float]:
+        """Seconds until the rate limit window resets, if the response says"""
+        for name in ('X-RateLimit-Reset', 'RateLimit-Reset'):
+            value = headers.get(name)
+            if not value:
+                continue
+            try:
+                reset = float(value)
+            except ValueError:
+                continue
+            # Either seconds until reset or an epoch timestamp
+            return max(reset - time.time(), 0.0) if reset > 1e9 else reset
+        return None
+
     def search_subtitles(
         self,
         imdb_id: Optional[str] = None,
@@ -50,7 +324,11 @@ class OpenSubtitlesAPI:
         query: Optional[str] = None,
         languages: str = "ko",
         year: Optional[int] = None,
-        type: str = "movie"
+        type: str = "movie",
+        parent_imdb_id: Optional[str] = None,
+        season_number: Optional[int] = None,
+        episode_number: Optional[int] = None,
+        moviehash: Optional[str] = None
     ) -> List[Dict]:
         """
         Search for subtitles
@@ -62,67 +340,140 @@ class OpenSubtitlesAPI:
             languages: Comma-separated language codes (default: "ko" for Korean)
             year: Release year
             type: Content type ("movie" or "episode")
+            parent_imdb_id: IMDb ID of the series (episode searches)
+            season_number: Season number (episode searches)
+            episode_number: Episode number (episode searches, omit for a whole season)
+            moviehash: OpenSubtitles hash of the video file; exact matches get moviehash_match
 
         Returns:
             List of subtitle results
+
+        Raises:
+            RateLimitExceeded: Still rate limited after retries (not the same as no results)
         """
         endpoint = f"{self.BASE_URL}/subtitles"
         params = {
-            'languages': languages,
+            'languages': ','.join(sorted(lang.strip().lower() for lang in languages.split(','))),
             'type': type
         }
 
         # Prefer IMDb ID (most reliable)
-        if imdb_id:
-            params['imdb_id'] = imdb_id.replace('tt', '')  # API wants ID without 'tt'
+        if parent_imdb_id:
+            params['parent_imdb_id'] = parent_imdb_id.replace('tt', '').lstrip('0')
+            if season_number is not None:
+                params['season_number'] = season_number
+            if episode_number is not None:
+                params['episode_number'] = episode_number
+            logger.info(f"Searching by series IMDb ID: {parent_imdb_id} (season {season_number})")
+        elif imdb_id:
+            params['imdb_id'] = imdb_id.replace('tt', '').lstrip('0')  # API wants ID without 'tt' or leading zeros
             logger.info(f"Searching by IMDb ID: {imdb_id}")
         elif tmdb_id:
-            params['tmdb_id'] = tmdb_id
+            params['tmdb_id'] = str(tmdb_id)
             logger.info(f"Searching by TMDB ID: {tmdb_id}")
         elif query:
-            params['query'] = query
+            # API docs ask for lowercase queries; it also keeps cache keys stable
+            params['query'] = ' '.join(query.lower().split())
             if year:
                 params['year'] = year
+            if season_number is not None:
+                params['season_number'] = season_number
+            if episode_number is not None:
+                params['episode_number'] = episode_number
             logger.info(f"Searching by query: {query} ({year})")
         else:
             logger.error("No search criteria provided")
             return []
 
+        # A moviehash only flags exact-release matches, so results are cached
+        # without it (shared by searches with and without one) and the ids
+        # matching a given file are cached separately under its hash
+        cache_key = self.cache.make_key(params)
+        match_key = self.cache.make_key(dict(params, moviehash=moviehash)) if moviehash else None
+
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            if match_key is None:
+                logger.info(f"Found {len(cached)} subtitle results (cached)")
+                return cached
+            matched = self.cache.get(match_key)
+            if matched is not None:
+                logger.info(f"Found {len(cached)} subtitle results (cached, {len(matched)} hash match(es))")
+                return self._flag_hash_matches(cached, matched)
+
+        if moviehash:
+            params['moviehash'] = moviehash
+
         try:
-            response = self.session.get(endpoint, params=params, timeout=10)
+            # Sorted parameters avoid a redirect on the API side
+            response = self._request('GET', endpoint, params=sorted(params.items()), timeout=10)
             response.raise_for_status()
 
             data = response.json()
             results = data.get('data', [])
 
+            # A whole season often spans several pages; episodes only listed on
+            # later pages would otherwise never be matched
+            if season_number is not None and episode_number is None:
+                total_pages = min(data.get('total_pages') or 1, self.MAX_SEASON_PAGES)
+                for page in range(2, total_pages + 1):
+                    response = self._request('GET', endpoint, params=sorted(dict(params, page=page).items()), timeout=10)
+                    response.raise_for_status()
+                    results.extend(response.json().get('data', []))
+
+            matched = [result.get('id') for result in results if result.get('attributes', {}).get('moviehash_match')]
+            self.cache.set(cache_key, self._flag_hash_matches(results, []) if matched else results)
+            if match_key is not None:
+                self.cache.set(match_key, matched)
             logger.info(f"Found {len(results)} subtitle results")
             return results
 
+        except RateLimitExceeded:
+            logger.error(f"Rate limit exceeded - giving up after {self.max_retries} retries")
+            raise
         except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 429:
-                logger.error("Rate limit exceeded - too many requests")
-            else:
-                logger.error(f"HTTP error: {e.response.status_code} - {e.response.text}")
+            logger.error(f"HTTP error: {e.response.status_code} - {e.response.text}")
             return []
         except Exception as e:
             logger.error(f"Search error: {e}")
             return []
 
-    def download_subtitle(self, file_id: int, save_path: str) -> bool:
+    @staticmethod
+    def _flag_hash_matches(results: List[Dict], matched: List[str]) -> List[Dict]:
+        """Results with moviehash_match set for the given result ids only"""
+        matched = set(matched)
+        flagged = []
+        for result in results:
+            attributes = result.get('attributes', {})
+            is_match = result.get('id') in matched
+            if bool(attributes.get('moviehash_match')) != is_match:
+                result = dict(result, attributes=dict(attributes, moviehash_match=is_match))
+            flagged.append(result)
+        return flagged
+
+    def download_subtitle(self, file_id: int, save_path: str, fresh: bool = True) -> bool:
         """
         Download subtitle file
 
         Args:
             file_id: OpenSubtitles file ID
             save_path: Path to save the subtitle file
+            fresh: True for a new import (webhook), False for backlog (scan) downloads
 
         Returns:
             True if successful, False otherwise
+
+        Raises:
+            RateLimitExceeded: Still rate limited after retries
+            DownloadQuotaExceeded: Daily download allowance used up until the reset time
         """
         if not self.api_key:
             logger.error("API key required for downloads - please set OPENSUBTITLES_API_KEY")
             return False
 
+        held = self.quota.acquire(fresh)
+        counted = False
+
         endpoint = f"{self.BASE_URL}/download"
         payload = {
             'file_id': file_id
@@ -130,11 +481,13 @@ class OpenSubtitlesAPI:
 
         try:
             # Request download link
-            response = self.session.post(endpoint, json=payload, timeout=10)
+            response = self._request('POST', endpoint, json=payload, timeout=10)
             response.raise_for_status()
 
             data = response.json()
             download_url = data.get('link')
+            self.quota.update(data.get('remaining'), data.get('reset_time_utc'))
+            counted = True
 
             if not download_url:
                 logger.error("No download link in response")
@@ -145,25 +498,39 @@ class OpenSubtitlesAPI:
             dl_response = self.session.get(download_url, timeout=30, stream=True)
             dl_response.raise_for_status()
 
-            # Save to file
-            with open(save_path, 'wb') as f:
-                for chunk in dl_response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # Unpacked, converted to UTF-8 SRT and renamed into place only once complete
+            sink = save_subtitle(dl_response.iter_content(chunk_size=8192), save_path)
 
-            logger.info(f"Subtitle saved to {save_path}")
+            source = f"{sink.archive}:{sink.format}" if sink.archive else sink.format
+            logger.info(
+                f"Subtitle saved to {save_path} "
+                f"({source}/{sink.encoding}, converted in {sink.convert_seconds * 1000:.1f} ms)"
+            )
             return True
 
+        except RateLimitExceeded:
+            logger.error(f"Rate limit exceeded - giving up after {self.max_retries} retries")
+            raise
         except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 429:
-                logger.error("Rate limit exceeded - too many requests")
-            elif e.response.status_code == 406:
+            if e.response.status_code == 406:
                 logger.error("Daily download limit exceeded")
+                counted = True
+                try:
+                    reset_time_utc = e.response.json().get('reset_time_utc')
+                except ValueError:
+                    reset_time_utc = None
+                self.quota.exhaust(reset_time_utc)
+                raise DownloadQuotaExceeded(self.quota.retry_after())
             else:
                 logger.error(f"HTTP error: {e.response.status_code} - {e.response.text}")
             return False
         except Exception as e:
             logger.error(f"Download error: {e}")
             return False
+        finally:
+            # Failed before the API counted the download (rate limit, network error)
+            if held and not counted:
+                self.quota.release()
 
     def get_subtitle_details(self, result: Dict) -> Dict:
         """
@@ -186,7 +553,13 @@ class OpenSubtitlesAPI:
             'uploader': attributes.get('uploader', {}).get('name', 'Unknown'),
             'hearing_impaired': attributes.get('hearing_impaired', False),
             'foreign_parts_only': attributes.get('foreign_parts_only', False),
-            'feature_type': attributes.get('feature_details', {}).get('feature_type')
+            'fps': attributes.get('fps'),
+            'moviehash_match': attributes.get('moviehash_match', False),
+            'machine_translated': attributes.get('machine_translated', False),
+            'ai_translated': attributes.get('ai_translated', False),
+            'feature_type': attributes.get('feature_details', {}).get('feature_type'),
+            'season_number': attributes.get('feature_details', {}).get('season_number'),
+            'episode_number': attributes.get('feature_details', {}).get('episode_number')
         }
 
 
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Thread-safe token bucket rate limiter
+Shared by every caller of a provider client so concurrent scans, webhook jobs
+and manual searches stay under the provider's documented request rate.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger("RateLimiter")
+
+
+class TokenBucket:
+    """Token bucket with a shared pause for server-requested backoff"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize token bucket
+
+        Args:
+            rate: Tokens added per second (sustained requests per second)
+            capacity: Maximum burst size (defaults to one second's worth)
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+        self._acquired = 0
+        self._throttled = 0
+        self._waited = 0.0
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Block until tokens are available
+
+        Args:
+            tokens: Tokens to take (one per request)
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if acquired, False if the timeout would be exceeded
+        """
+        start = time.monotonic()
+        throttled = False
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                wait = max(self._paused_until - now, 0.0)
+                if wait == 0.0:
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        self._acquired += 1
+                        if throttled:
+                            self._throttled += 1
+                            self._waited += now - start
+                        return True
+                    wait = (tokens - self._tokens) / self.rate
+
+            if timeout is not None and now + wait - start > timeout:
+                return False
+
+            throttled = True
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold every caller for at least the given number of seconds (e.g. after a 429)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def paused_for(self) -> float:
+        """Seconds until a server-requested pause ends (0 if not paused)"""
+        with self._lock:
+            return max(self._paused_until - time.monotonic(), 0.0)
+
+    def stats(self) -> Dict:
+        """Acquisition and throttling counters"""
+        with self._lock:
+            return {
+                'rate_per_second': self.rate,
+                'capacity': self.capacity,
+                'acquired': self._acquired,
+                'throttled': self._throttled,
+                'seconds_waited': round(self._waited, 2),
+                'paused_for': round(max(self._paused_until - time.monotonic(), 0.0), 2)
+            }
+
+    def _refill(self, now: float):
+        """Add tokens for the time since the last refill (caller holds the lock)"""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
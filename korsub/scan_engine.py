@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Concurrent, resumable library scan engine for KorSub
+Items are processed by a bounded thread pool; completed item keys are checkpointed
+to SQLite so a scan killed by a restart resumes where it stopped.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from storage import connect
+
+logger = logging.getLogger("ScanEngine")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_runs (
+    name TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS scan_checkpoints (
+    name TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    PRIMARY KEY (name, item_key)
+);
+"""
+
+
+class ScanEngine:
+    """Run library scans with a configurable concurrency level and checkpoints"""
+
+    def __init__(
+        self,
+        db_path: str,
+        concurrency: int = 4,
+        checkpoint_every: int = 25,
+        progress_every: int = 100
+    ):
+        """
+        Initialize scan engine
+
+        Args:
+            db_path: SQLite database path for checkpoints
+            concurrency: Items processed in parallel per scan
+            checkpoint_every: Completed items buffered before a checkpoint write
+            progress_every: Completed items between progress log lines
+        """
+        self.concurrency = max(1, concurrency)
+        self.checkpoint_every = checkpoint_every
+        self.progress_every = progress_every
+
+        self._db_lock = threading.Lock()
+        self._conn = connect(db_path)
+        with self._db_lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+        self._scan_locks: Dict[str, threading.Lock] = {}
+        self._progress: Dict[str, Dict] = {}
+        self._progress_lock = threading.Lock()
+
+    def run(
+        self,
+        name: str,
+        items: Iterable[Tuple[str, Any]],
+        handler: Callable[[Any], bool],
+        total: Optional[int] = None
+    ) -> Dict:
+        """
+        Process every item, resuming an interrupted scan of the same name
+
+        Args:
+            name: Scan name (e.g. "radarr"); one scan per name runs at a time
+            items: Iterable of (item_key, item) pairs, consumed lazily
+            handler: Called with each item; returns True (or a count) if subtitles were downloaded
+            total: Number of items if known up front (for progress reporting)
+
+        Returns:
+            Final progress dictionary for the scan. If a handler raises an error
+            carrying retry_after (provider rate limit or download quota), the scan
+            stops early with status "paused" and resumes from its checkpoint next run.
+        """
+        lock = self._scan_locks.setdefault(name, threading.Lock())
+        if not lock.acquire(blocking=False):
+            logger.warning(f"⏭️  {name} scan already running, skipping")
+            return {'name': name, 'status': 'already_running'}
+
+        try:
+            done_keys = self._begin(name)
+            progress = self._new_progress(name, total, resumed=len(done_keys))
+            pending_checkpoints: List[str] = []
+            paused = threading.Event()
+
+            if done_keys:
+                logger.info(f"♻️  Resuming {name} scan: {len(done_keys)} item(s) already checkpointed")
+
+            def finish(future, key):
+                try:
+                    downloaded = future.result()
+                    with self._progress_lock:
+                        progress['processed'] += 1
+                        progress['downloaded'] += int(downloaded or 0)
+                    pending_checkpoints.append(key)
+                except Exception as e:
+                    if getattr(e, 'retry_after', None) is not None:
+                        # Left uncheckpointed so the resumed scan retries it
+                        if not paused.is_set():
+                            logger.warning(f"⏸️  {name} scan paused ({e}), stopping early")
+                            with self._progress_lock:
+                                progress['paused_reason'] = str(e)
+                                progress['retry_after'] = e.retry_after
+                        paused.set()
+                        return
+                    logger.error(f"Error scanning {key}: {e}")
+                    with self._progress_lock:
+                        progress['errors'] += 1
+
+                if len(pending_checkpoints) >= self.checkpoint_every:
+                    self._checkpoint(name, pending_checkpoints)
+                    pending_checkpoints.clear()
+
+                completed = progress['processed'] + progress['errors']
+                if completed % self.progress_every == 0:
+                    self._log_progress(progress)
+
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"scan-{name}") as executor:
+                in_flight = {}
+                for key, item in items:
+                    if paused.is_set():
+                        break
+
+                    if key in done_keys:
+                        with self._progress_lock:
+                            progress['skipped'] += 1
+                        continue
+
+                    # Keep the window bounded so large libraries are consumed lazily
+                    while len(in_flight) >= self.concurrency * 2:
+                        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            finish(future, in_flight.pop(future))
+
+                    in_flight[executor.submit(handler, item)] = key
+
+                while in_flight:
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        finish(future, in_flight.pop(future))
+
+            self._checkpoint(name, pending_checkpoints)
+            if not paused.is_set():
+                self._complete(name)
+
+            with self._progress_lock:
+                progress['status'] = 'paused' if paused.is_set() else 'complete'
+                progress['finished_at'] = time.time()
+            self._log_progress(progress)
+            return dict(progress)
+
+        except Exception:
+            with self._progress_lock:
+                if name in self._progress:
+                    self._progress[name]['status'] = 'interrupted'
+            raise
+
+        finally:
+            lock.release()
+
+    def progress(self) -> Dict[str, Dict]:
+        """Progress of the current or most recent scan of each name"""
+        with self._progress_lock:
+            report = {}
+            for name, progress in self._progress.items():
+                entry = dict(progress)
+                end = entry['finished_at'] or time.time()
+                elapsed = max(end - entry['started_at'], 1e-6)
+                entry['elapsed_seconds'] = round(elapsed, 1)
+                entry['items_per_second'] = round(entry['processed'] / elapsed, 2)
+                report[name] = entry
+            return report
+
+    def _new_progress(self, name: str, total: Optional[int], resumed: int) -> Dict:
+        progress = {
+            'name': name,
+            'status': 'running',
+            'started_at': time.time(),
+            'finished_at': None,
+            'total': total,
+            'resumed_from': resumed,
+            'processed': 0,
+            'skipped': 0,
+            'downloaded': 0,
+            'errors': 0,
+            'paused_reason': None,
+            'retry_after': None
+        }
+        with self._progress_lock:
+            self._progress[name] = progress
+        return progress
+
+    def _log_progress(self, progress: Dict):
+        completed = progress['processed'] + progress['errors'] + progress['skipped']
+        total = f"/{progress['total']}" if progress['total'] else ""
+        elapsed = max(time.time() - progress['started_at'], 1e-6)
+        logger.info(
+            f"📊 {progress['name']} scan: {completed}{total} items, "
+            f"{progress['downloaded']} downloaded, {progress['errors']} errors "
+            f"({progress['processed'] / elapsed:.1f} items/s)"
+        )
+
+    def _begin(self, name: str) -> set:
+        """Start a scan run, returning checkpointed keys if the last run was interrupted"""
+        with self._db_lock, self._conn:
+            row = self._conn.execute("SELECT status FROM scan_runs WHERE name = ?", (name,)).fetchone()
+
+            if row is not None and row['status'] == 'running':
+                keys = self._conn.execute(
+                    "SELECT item_key FROM scan_checkpoints WHERE name = ?", (name,)
+                ).fetchall()
+                return {r['item_key'] for r in keys}
+
+            self._conn.execute("DELETE FROM scan_checkpoints WHERE name = ?", (name,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scan_runs (name, status, started_at, finished_at) VALUES (?, 'running', ?, NULL)",
+                (name, time.time())
+            )
+            return set()
+
+    def _checkpoint(self, name: str, keys: List[str]):
+        if not keys:
+            return
+        with self._db_lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO scan_checkpoints (name, item_key) VALUES (?, ?)",
+                [(name, key) for key in keys]
+            )
+
+    def _complete(self, name: str):
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "UPDATE scan_runs SET status = 'complete', finished_at = ? WHERE name = ?",
+                (time.time(), name)
+            )
+            self._conn.execute("DELETE FROM scan_checkpoints WHERE name = ?", (name,))
+
+
+class ScanMemo:
+    """
+    Per-scan proxy that runs each distinct provider search once
+
+    Wraps a provider client; search_subtitles() results are shared by every
+    caller with the same arguments, including scan threads asking at the same
+    time (later callers wait for the first). Other attributes pass through.
+    """
+
+    def __init__(self, provider: Any):
+        self.provider = provider
+        self.calls = 0
+        self.hits = 0
+        self._results: Dict[Tuple, Any] = {}
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def search_subtitles(self, *args, **kwargs) -> Any:
+        key = (args, tuple(sorted(kwargs.items())))
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            if key in self._results:
+                with self._lock:
+                    self.hits += 1
+                return self._results[key]
+
+            result = self.provider.search_subtitles(*args, **kwargs)
+            with self._lock:
+                self.calls += 1
+                self._results[key] = result
+            return result
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.provider, name)
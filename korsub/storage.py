@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+SQLite helpers for KorSub's persistent state
+All durable state (job queue, caches, checkpoints) lives in one database under /data
+"""
+
+import os
+import sqlite3
+import logging
+from pathlib import Path
+
+logger = logging.getLogger("Storage")
+
+DATA_PATH = os.getenv("KORSUB_DATA_PATH", "/data/korsub")
+DB_PATH = os.path.join(DATA_PATH, "korsub.db")
+
+
+def connect(db_path: str = DB_PATH) -> sqlite3.Connection:
+    """
+    Open a SQLite connection suitable for sharing between worker threads
+
+    Callers must serialize access with their own lock. WAL mode lets the
+    separate connections opened by each component read while another writes.
+
+    Args:
+        db_path: Database file path (parent directory is created if missing)
+
+    Returns:
+        Open sqlite3 connection
+    """
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    logger.debug(f"Opened database {db_path}")
+    return conn
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Subtitle timing alignment against a reference track
+Cue times of a downloaded subtitle are compared with a reference subtitle for
+the same video (an existing .en.srt, or an English text track extracted from
+the video with ffmpeg when available). Cue activity is binned into histograms
+and cross-correlated with NumPy FFTs over the common frame-rate ratios; the
+best offset and scale are applied if they clearly beat the current timing.
+"""
+
+import re
+import shutil
+import logging
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from subtitle_sink import SubtitleSink
+
+logger = logging.getLogger("SubtitleAlign")
+
+SRT_TIMING = re.compile(
+    r'(\d{1,2}):(\d{2}):(\d{2})[,.](\d{3})\s*-->\s*(\d{1,2}):(\d{2}):(\d{2})[,.](\d{3})'
+)
+
+# Histogram resolution
+BIN_MS = 100
+
+# Scale factors tried: same speed plus the usual frame-rate conversions
+# (PAL speed-up and 23.976/24 mismatches)
+FPS_RATIOS = sorted({
+    1.0,
+    25 / 23.976, 23.976 / 25,
+    25 / 24, 24 / 25,
+    24 / 23.976, 23.976 / 24,
+    30 / 29.97, 29.97 / 30,
+})
+
+# Largest offset considered
+MAX_OFFSET_MS = 10 * 60 * 1000
+
+# Overlap (fraction of the smaller track's on-screen time) the fit must reach,
+# and how much it must improve on the current timing, before cues are rewritten
+MIN_SCORE = 0.5
+MIN_IMPROVEMENT = 0.1
+
+REFERENCE_SUFFIXES = ('.en.srt', '.eng.srt', '.en.hi.srt', '.en.sdh.srt', '.en.forced.srt')
+VIDEO_EXTENSIONS = ('.mkv', '.mp4', '.m4v', '.avi', '.mov', '.wmv', '.ts')
+TEXT_CODECS = ('subrip', 'ass', 'ssa', 'mov_text', 'webvtt', 'text')
+
+
+def srt_times(text: str) -> np.ndarray:
+    """Cue (start, end) times in milliseconds, shape (n, 2)"""
+    fields = np.array(SRT_TIMING.findall(text), dtype=np.int64).reshape(-1, 8)
+    weights = np.array([3600000, 60000, 1000, 1])
+    return np.stack([fields[:, :4] @ weights, fields[:, 4:] @ weights], axis=1)
+
+
+def activity(times: np.ndarray, length: int) -> np.ndarray:
+    """1.0 for each bin with a cue on screen"""
+    bins = np.clip(times // BIN_MS, 0, length)
+    edges = np.zeros(length + 1)
+    np.add.at(edges, bins[:, 0], 1)
+    np.add.at(edges, bins[:, 1], -1)
+    return (np.cumsum(edges[:length]) > 0).astype(np.float64)
+
+
+def fit(reference: np.ndarray, subtitle: np.ndarray) -> Dict:
+    """
+    Best (scale, offset) mapping subtitle cue times onto the reference
+
+    Args:
+        reference: Reference cue times from srt_times()
+        subtitle: Subtitle cue times from srt_times()
+
+    Returns:
+        Dict with scale, offset_ms, score (overlap fraction of the fit) and
+        baseline (overlap fraction of the unchanged timing)
+    """
+    max_offset_bins = MAX_OFFSET_MS // BIN_MS
+    span = int(max(reference.max(), subtitle.max() * max(FPS_RATIOS)) // BIN_MS) + 1
+    size = 1 << int(np.ceil(np.log2(span + max_offset_bins + 1)))
+
+    ref_signal = activity(reference, span)
+    ref_spectrum = np.conj(np.fft.rfft(ref_signal, size))
+    ref_total = float(ref_signal.sum())
+
+    best = {'scale': 1.0, 'offset_ms': 0, 'score': 0.0, 'baseline': 0.0}
+    for scale in FPS_RATIOS:
+        scaled = np.round(subtitle * scale).astype(np.int64)
+        sub_signal = activity(scaled, span)
+        norm = min(ref_total, float(sub_signal.sum())) or 1.0
+
+        # correlation[k] = overlap when the subtitle is shifted by k bins (negative k wraps around)
+        correlation = np.fft.irfft(np.fft.rfft(sub_signal, size) * ref_spectrum, size)
+        candidates = np.concatenate([correlation[:max_offset_bins + 1], correlation[-max_offset_bins:]])
+        index = int(np.argmax(candidates))
+        lag = index if index <= max_offset_bins else index - len(candidates)
+        score = float(candidates[index]) / norm
+
+        if scale == 1.0:
+            best['baseline'] = float(correlation[0]) / norm
+        if score > best['score'] + 1e-9:
+            best.update(scale=scale, offset_ms=-lag * BIN_MS, score=score)
+
+    return best
+
+
+def shift_srt(text: str, scale: float, offset_ms: int) -> str:
+    """Rewrite every SRT timing line as t * scale + offset"""
+    matches = list(SRT_TIMING.finditer(text))
+    if not matches:
+        return text
+
+    times = srt_times(text)
+    shifted = np.maximum(np.round(times * scale).astype(np.int64) + offset_ms, 0)
+
+    pieces: List[str] = []
+    position = 0
+    for match, (start, end) in zip(matches, shifted.tolist()):
+        pieces.append(text[position:match.start()])
+        pieces.append(f"{_timestamp(start)} --> {_timestamp(end)}")
+        position = match.end()
+    pieces.append(text[position:])
+    return ''.join(pieces)
+
+
+def _timestamp(ms: int) -> str:
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+
+def find_reference(subtitle_path: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Reference subtitle text for the video a subtitle was saved next to
+
+    Args:
+        subtitle_path: e.g. "/movies/Tron (2010)/Tron.2010.1080p.ko.srt"
+
+    Returns:
+        (SRT text, description of where it came from), or (None, None)
+    """
+    path = Path(subtitle_path)
+    base = path.name[:-len('.ko.srt')] if path.name.endswith('.ko.srt') else path.stem
+
+    for suffix in REFERENCE_SUFFIXES:
+        candidate = path.with_name(base + suffix)
+        if candidate.is_file():
+            return candidate.read_text(encoding='utf-8', errors='replace'), candidate.name
+
+    for extension in VIDEO_EXTENSIONS:
+        video = path.with_name(base + extension)
+        if video.is_file():
+            text = extract_english_track(str(video))
+            return (text, f"{video.name} (embedded)") if text else (None, None)
+
+    return None, None
+
+
+def extract_english_track(video_path: str, timeout: int = 300) -> Optional[str]:
+    """English text subtitle track of a video as SRT, via ffprobe/ffmpeg if installed"""
+    if not shutil.which('ffprobe') or not shutil.which('ffmpeg'):
+        return None
+
+    try:
+        probe = subprocess.run(
+            [
+                'ffprobe', '-v', 'error', '-select_streams', 's',
+                '-show_entries', 'stream=index,codec_name:stream_tags=language',
+                '-of', 'csv=p=0', video_path
+            ],
+            capture_output=True, text=True, timeout=60, check=True
+        )
+        stream = None
+        for line in probe.stdout.splitlines():
+            parts = line.split(',')
+            if len(parts) >= 3 and parts[1] in TEXT_CODECS and parts[2].lower() in ('eng', 'en'):
+                stream = parts[0]
+                break
+        if stream is None:
+            return None
+
+        extracted = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-i', video_path, '-map', f'0:{stream}', '-f', 'srt', '-'],
+            capture_output=True, timeout=timeout, check=True
+        )
+        return extracted.stdout.decode('utf-8', errors='replace')
+
+    except (subprocess.SubprocessError, OSError) as e:
+        logger.debug(f"Could not extract English track from {video_path}: {e}")
+        return None
+
+
+def align_subtitle(subtitle_path: str) -> Optional[Dict]:
+    """
+    Align a saved UTF-8 SRT subtitle with the video's reference track, in place
+
+    Args:
+        subtitle_path: Subtitle to align (e.g. movie.ko.srt)
+
+    Returns:
+        The fit (plus 'applied', 'reference' and 'seconds'), or None if there is
+        no reference track or either track has too few cues
+    """
+    started = time.perf_counter()
+    reference_text, reference_name = find_reference(subtitle_path)
+    if not reference_text:
+        return None
+
+    text = Path(subtitle_path).read_text(encoding='utf-8', errors='replace')
+    reference, subtitle = srt_times(reference_text), srt_times(text)
+    if len(reference) < 10 or len(subtitle) < 10:
+        return None
+
+    result = fit(reference, subtitle)
+    result['reference'] = reference_name
+    result['applied'] = bool(
+        result['score'] >= MIN_SCORE
+        and result['score'] - result['baseline'] >= MIN_IMPROVEMENT
+        and (result['scale'] != 1.0 or result['offset_ms'] != 0)
+    )
+
+    if result['applied']:
+        with SubtitleSink(subtitle_path, convert=False) as sink:
+            sink.write(shift_srt(text, result['scale'], result['offset_ms']).encode('utf-8'))
+
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    if result['applied']:
+        logger.info(
+            f"⏱️  Re-timed {Path(subtitle_path).name} against {reference_name}: "
+            f"x{result['scale']:.4f} {result['offset_ms']:+d} ms "
+            f"(overlap {result['baseline']:.0%} -> {result['score']:.0%}, {result['seconds']}s)"
+        )
+    else:
+        logger.debug(f"Timing of {subtitle_path} kept (fit {result})")
+    return result
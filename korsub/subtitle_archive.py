@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+In-memory extraction of subtitles from downloaded archives
+Archives are recognized from their first bytes. The download is kept in memory,
+the best subtitle member is picked by extension, language tag and episode, and
+only that member is streamed out. Zip is read with the standard library, 7z with
+py7zr (pinned in requirements.txt); RAR has no pure-Python reader and is rejected.
+"""
+
+import io
+import re
+import logging
+import zipfile
+from pathlib import PurePosixPath
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger("SubtitleArchive")
+
+# Longest magic number below
+MAGIC_SIZE = 8
+
+MAGIC = (
+    (b'PK\x03\x04', 'zip'),
+    (b'PK\x05\x06', 'zip'),
+    (b'7z\xbc\xaf\x27\x1c', '7z'),
+    (b'Rar!\x1a\x07', 'rar'),
+)
+
+# Preferred first; anything else is not a text subtitle we can convert
+SUBTITLE_EXTENSIONS = ('.srt', '.smi', '.ass', '.ssa', '.vtt')
+
+KOREAN_TAG = re.compile(r'(?<![a-z])(ko|kor|korean|kr)(?![a-z])|한글|한국어', re.I)
+OTHER_LANGUAGE_TAG = re.compile(r'(?<![a-z])(en|eng|english|ja|jpn|zh|chi|chs|cht)(?![a-z])', re.I)
+EPISODE_TAG = re.compile(r'[Ss](\d{1,2})[Ee](\d{1,3})')
+
+# Refuse members that would not fit comfortably in memory
+MAX_MEMBER_SIZE = 32 * 1024 * 1024
+
+READ_SIZE = 64 * 1024
+
+
+class ArchiveError(Exception):
+    """Archive can't be read or holds no usable subtitle"""
+
+
+def archive_type(head: bytes) -> Optional[str]:
+    """"zip", "7z" or "rar" from the first MAGIC_SIZE bytes, None for plain files"""
+    for magic, kind in MAGIC:
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+def choose_member(names: List[str], target_name: str = '') -> Optional[str]:
+    """
+    Pick the subtitle member best matching the target
+
+    Args:
+        names: Member names in the archive
+        target_name: File name being saved (its SxxEyy tag, if any, is matched)
+
+    Returns:
+        Member name, or None if there is no subtitle member
+    """
+    episode = EPISODE_TAG.search(target_name)
+    wanted_episode = (int(episode.group(1)), int(episode.group(2))) if episode else None
+
+    best, best_score = None, None
+    for name in names:
+        path = PurePosixPath(name)
+        suffix = path.suffix.lower()
+        if suffix not in SUBTITLE_EXTENSIONS or '__MACOSX' in path.parts or path.name.startswith('.'):
+            continue
+
+        stem = path.name[:-len(suffix)]
+        score = -SUBTITLE_EXTENSIONS.index(suffix)
+        if KOREAN_TAG.search(stem):
+            score += 100
+        elif OTHER_LANGUAGE_TAG.search(stem):
+            score -= 100
+
+        if wanted_episode:
+            match = EPISODE_TAG.search(path.name)
+            if match:
+                score += 50 if (int(match.group(1)), int(match.group(2))) == wanted_episode else -200
+
+        if best_score is None or score > best_score:
+            best, best_score = name, score
+    return best
+
+
+def iter_member(data: bytes, kind: str, target_name: str = '') -> Iterator[bytes]:
+    """
+    Stream the best subtitle member of an in-memory archive
+
+    Args:
+        data: Complete archive bytes
+        kind: Archive type from archive_type()
+        target_name: File name being saved, used to choose the member
+
+    Yields:
+        Member bytes in chunks
+
+    Raises:
+        ArchiveError: Unsupported or corrupt archive, or no subtitle member
+    """
+    if kind == 'zip':
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                infos = {info.filename: info for info in archive.infolist() if not info.is_dir()}
+                member = choose_member(list(infos), target_name)
+                if member is None:
+                    raise ArchiveError(f"No subtitle in zip archive ({', '.join(infos) or 'empty'})")
+                if infos[member].file_size > MAX_MEMBER_SIZE:
+                    raise ArchiveError(f"{member} is too large ({infos[member].file_size} bytes)")
+
+                logger.info(f"📦 Extracting {member} from zip archive")
+                with archive.open(member) as stream:
+                    while True:
+                        chunk = stream.read(READ_SIZE)
+                        if not chunk:
+                            return
+                        yield chunk
+        except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError) as e:
+            raise ArchiveError(f"Unreadable zip archive: {e}") from e
+
+    elif kind == '7z':
+        try:
+            import py7zr
+            import py7zr.io
+        except ImportError:
+            raise ArchiveError("7z archive needs the py7zr package (see requirements.txt)")
+
+        try:
+            with py7zr.SevenZipFile(io.BytesIO(data)) as archive:
+                infos = {info.filename: info for info in archive.list() if not info.is_directory}
+                member = choose_member(list(infos), target_name)
+                if member is None:
+                    raise ArchiveError(f"No subtitle in 7z archive ({', '.join(infos) or 'empty'})")
+                if (infos[member].uncompressed or 0) > MAX_MEMBER_SIZE:
+                    raise ArchiveError(f"{member} is too large ({infos[member].uncompressed} bytes)")
+
+                logger.info(f"📦 Extracting {member} from 7z archive")
+                factory = py7zr.io.BytesIOFactory(MAX_MEMBER_SIZE)
+                archive.extract(targets=[member], factory=factory)
+        except (py7zr.exceptions.ArchiveError, py7zr.exceptions.Bad7zFile) as e:
+            raise ArchiveError(f"Unreadable 7z archive: {e}") from e
+
+        # py7zr decompresses a member in one go; hand it on in chunks like zip
+        stream = factory.get(member)
+        stream.seek(0)
+        while True:
+            chunk = stream.read(READ_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    else:
+        raise ArchiveError(f"{kind} archives are not supported (no pure-Python reader)")
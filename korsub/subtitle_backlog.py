@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Persistent backlog of items with no Korean subtitle yet
+Each miss is recorded with its attempt count, last attempt, last outcome and
+the time it may next be searched. The wait doubles with every failed attempt
+(up to a ceiling), so titles nobody has subtitled stop costing a search on
+both providers in every scan.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from storage import connect
+
+logger = logging.getLogger("SubtitleBacklog")
+
+# Why the last attempt at an item failed
+NO_RESULTS = 'no_results'
+RATE_LIMITED = 'rate_limited'
+CAPTCHA_ONLY = 'captcha_only'
+DOWNLOAD_FAILED = 'download_failed'
+OUTCOMES = (NO_RESULTS, RATE_LIMITED, CAPTCHA_ONLY, DOWNLOAD_FAILED)
+
+
+class SubtitleBacklog:
+    """Missing-subtitle items with exponential retry backoff"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS subtitle_backlog (
+        item_key TEXT PRIMARY KEY,
+        title TEXT,
+        attempts INTEGER NOT NULL,
+        last_attempt REAL NOT NULL,
+        last_outcome TEXT NOT NULL,
+        next_eligible REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_subtitle_backlog_next ON subtitle_backlog (next_eligible);
+    """
+
+    def __init__(self, db_path: str, base_delay: float = 86400, max_delay: float = 60 * 86400):
+        """
+        Initialize backlog
+
+        Args:
+            db_path: SQLite database path
+            base_delay: Seconds before the first retry; doubled after each further miss
+            max_delay: Longest wait between retries in seconds
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._conn = connect(db_path)
+        with self._lock, self._conn:
+            self._conn.executescript(self.SCHEMA)
+            rows = self._conn.execute("SELECT item_key, attempts, next_eligible FROM subtitle_backlog").fetchall()
+
+        # Scans ask about every item, so eligibility is answered from memory
+        self._entries: Dict[str, Tuple[int, float]] = {
+            row['item_key']: (row['attempts'], row['next_eligible']) for row in rows
+        }
+        if self._entries:
+            logger.info(f"Loaded subtitle backlog: {len(self._entries)} item(s)")
+
+    def due(self, key: str, now: Optional[float] = None) -> bool:
+        """Whether an item may be searched: not in the backlog, or its wait has passed"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry is None or entry[1] <= (now or time.time())
+
+    def record_miss(self, key: str, outcome: str, title: Optional[str] = None, retry_after: Optional[float] = None):
+        """
+        Record a failed attempt and schedule the next one
+
+        Args:
+            key: Item key (e.g. "movie:42", "season:7:2")
+            outcome: One of OUTCOMES
+            title: Display title for /backlog
+            retry_after: For RATE_LIMITED, seconds until the limit resets. A rate
+                limit says nothing about the item, so it waits only that long and
+                the attempt does not count towards the backoff.
+        """
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Unknown backlog outcome {outcome!r}")
+
+        now = time.time()
+        with self._lock:
+            attempts = self._entries.get(key, (0, 0.0))[0]
+            if outcome == RATE_LIMITED:
+                next_eligible = now + (retry_after or 0)
+            else:
+                attempts += 1
+                next_eligible = now + self.delay(attempts)
+
+            self._entries[key] = (attempts, next_eligible)
+            with self._conn:
+                self._conn.execute(
+                    """INSERT OR REPLACE INTO subtitle_backlog
+                       (item_key, title, attempts, last_attempt, last_outcome, next_eligible)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (key, title, attempts, now, outcome, next_eligible)
+                )
+
+        logger.debug(f"Backlog: {key} {outcome} (attempt {attempts}), next try in {(next_eligible - now) / 3600:.1f}h")
+
+    def clear(self, key: str):
+        """Drop an item that now has a subtitle (or was re-imported and starts over)"""
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return
+            with self._conn:
+                self._conn.execute("DELETE FROM subtitle_backlog WHERE item_key = ?", (key,))
+
+    def delay(self, attempts: int) -> float:
+        """Wait after the given number of failed attempts"""
+        return min(self.base_delay * 2 ** max(attempts - 1, 0), self.max_delay)
+
+    def stats(self, upcoming: int = 20) -> Dict:
+        """Backlog size by last outcome, items due now and the next items to be retried"""
+        now = time.time()
+        by_outcome = dict(self.counts())
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM subtitle_backlog WHERE next_eligible > ? ORDER BY next_eligible LIMIT ?",
+                (now, upcoming)
+            ).fetchall()
+            due = sum(1 for _, next_eligible in self._entries.values() if next_eligible <= now)
+
+        return {
+            'items': sum(by_outcome.values()),
+            'due_now': due,
+            'by_outcome': by_outcome,
+            'upcoming': [self._describe(row, now) for row in rows]
+        }
+
+    def counts(self) -> List[Tuple[str, int]]:
+        """(last outcome, items) pairs, for metrics"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT last_outcome, COUNT(*) AS items FROM subtitle_backlog GROUP BY last_outcome"
+            ).fetchall()
+        return [(row['last_outcome'], row['items']) for row in rows]
+
+    @staticmethod
+    def _describe(row, now: float) -> Dict:
+        return {
+            'key': row['item_key'],
+            'title': row['title'],
+            'attempts': row['attempts'],
+            'last_outcome': row['last_outcome'],
+            'last_attempt_ago_hours': round((now - row['last_attempt']) / 3600, 1),
+            'next_try_in_hours': round((row['next_eligible'] - now) / 3600, 1)
+        }
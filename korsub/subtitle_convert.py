@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Streaming SAMI / ASS / WebVTT to SRT conversion
+Text is fed in pieces as it is downloaded and converted cue by cue with a
+single-pass tokenizer, so memory stays flat however many <SYNC> blocks a SAMI
+file has. SRT input passes through unchanged.
+"""
+
+import re
+from html import unescape
+from typing import List, Optional, Tuple
+
+# Characters of text needed to recognize the format
+DETECT_SIZE = 1024
+
+# Duration given to a final cue that has no following timestamp
+LAST_CUE_MS = 4000
+
+SMI_SYNC = re.compile(r'<sync\b[^>]*>', re.I)
+SMI_START = re.compile(r'start\s*=\s*["\']?(\d+)', re.I)
+SMI_PARAGRAPH = re.compile(r'<p\b([^>]*)>', re.I)
+SMI_CLASS = re.compile(r'class\s*=\s*["\']?([\w-]+)', re.I)
+SMI_TAIL = re.compile(r'</body>|</sami>', re.I)
+KOREAN_CLASS = re.compile(r'kr|ko', re.I)
+LINE_BREAK = re.compile(r'<br\s*/?>', re.I)
+TAG = re.compile(r'<[^>]*>')
+
+ASS_FIELDS = ['layer', 'start', 'end', 'style', 'name', 'marginl', 'marginr', 'marginv', 'effect', 'text']
+ASS_OVERRIDE = re.compile(r'\{[^}]*\}')
+ASS_DRAWING = re.compile(r'\{[^}]*\\p[1-9]')
+ASS_TIME = re.compile(r'(\d+):(\d{2}):(\d{2})[.:](\d{1,3})')
+
+VTT_TIMING = re.compile(r'((?:\d+:)?\d{2}:\d{2}\.\d{3})\s+-->\s+((?:\d+:)?\d{2}:\d{2}\.\d{3})')
+VTT_BLOCKS = ('WEBVTT', 'NOTE', 'STYLE', 'REGION')
+
+
+def format_timestamp(ms: int) -> str:
+    """SRT timestamp (HH:MM:SS,mmm) from milliseconds"""
+    ms = max(int(ms), 0)
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{ms:03d}"
+
+
+def detect_format(head: str) -> str:
+    """
+    Subtitle format from the start of the file
+
+    Args:
+        head: First DETECT_SIZE or more characters of decoded text
+
+    Returns:
+        "smi", "ass", "vtt" or "srt"
+    """
+    lowered = head.lstrip('\ufeff \t\r\n')[:DETECT_SIZE].lower()
+    if lowered.startswith('webvtt'):
+        return 'vtt'
+    if lowered.startswith('[script info]') or '\n[events]' in lowered:
+        return 'ass'
+    if '<sami' in lowered or '<sync' in lowered:
+        return 'smi'
+    return 'srt'
+
+
+def clean_markup(text: str) -> str:
+    """HTML-ish cue text to plain lines: <br> breaks lines, other tags dropped, entities decoded"""
+    text = TAG.sub('', LINE_BREAK.sub('\n', text.replace('\r', '').replace('\n', ' ')))
+    lines = (unescape(line).replace('\xa0', ' ').strip() for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+class SrtWriter:
+    """Numbers cues and formats them as SRT blocks"""
+
+    def __init__(self):
+        self.count = 0
+
+    def cue(self, start_ms: int, end_ms: int, text: str) -> str:
+        """One SRT block, or nothing for empty or zero-length cues"""
+        if not text or end_ms <= start_ms:
+            return ''
+        self.count += 1
+        return f"{self.count}\n{format_timestamp(start_ms)} --> {format_timestamp(end_ms)}\n{text}\n\n"
+
+
+class _Passthrough:
+    """SRT (or unrecognized) input, written as-is"""
+
+    def __init__(self, writer: SrtWriter):
+        self.writer = writer
+
+    def feed(self, text: str) -> str:
+        return text
+
+    def finish(self) -> str:
+        return ''
+
+
+class _SmiConverter:
+    """SAMI: the text after each <SYNC Start=...> lasts until the next one"""
+
+    def __init__(self, writer: SrtWriter):
+        self.writer = writer
+        self._buffer = ''
+        self._start: Optional[int] = None
+
+    def feed(self, text: str) -> str:
+        self._buffer += text
+        out = []
+        position = 0
+        while True:
+            sync = SMI_SYNC.search(self._buffer, position)
+            if sync is None:
+                break
+            start = SMI_START.search(sync.group(0))
+            if start is not None:
+                out.append(self._close(self._buffer[position:sync.start()], int(start.group(1))))
+            position = sync.end()
+
+        # Only the text since the last complete <SYNC> tag is kept
+        self._buffer = self._buffer[position:]
+        return ''.join(out)
+
+    def finish(self) -> str:
+        body = SMI_TAIL.split(self._buffer, 1)[0]
+        self._buffer = ''
+        if self._start is None:
+            return ''
+        return self.writer.cue(self._start, self._start + LAST_CUE_MS, self._cue_text(body))
+
+    def _close(self, body: str, next_start: int) -> str:
+        """Emit the cue started at the previous <SYNC> (the header before the first is skipped)"""
+        out = ''
+        if self._start is not None:
+            out = self.writer.cue(self._start, next_start, self._cue_text(body))
+        self._start = next_start
+        return out
+
+    @staticmethod
+    def _cue_text(body: str) -> str:
+        """Cue text, keeping only the Korean paragraphs of a multi-language file"""
+        paragraphs = list(SMI_PARAGRAPH.finditer(body))
+        if not paragraphs:
+            return clean_markup(body)
+
+        texts: List[Tuple[str, str]] = []
+        for index, paragraph in enumerate(paragraphs):
+            end = paragraphs[index + 1].start() if index + 1 < len(paragraphs) else len(body)
+            language = SMI_CLASS.search(paragraph.group(1))
+            texts.append((language.group(1) if language else '', body[paragraph.end():end]))
+
+        korean = [text for language, text in texts if KOREAN_CLASS.search(language)]
+        chosen = korean or [text for _, text in texts]
+        return '\n'.join(filter(None, (clean_markup(text) for text in chosen)))
+
+
+class _LineConverter:
+    """Base for line-oriented formats; complete lines are handed to _line()"""
+
+    def __init__(self, writer: SrtWriter):
+        self.writer = writer
+        self._partial = ''
+
+    def feed(self, text: str) -> str:
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        return ''.join(self._line(line.rstrip('\r')) for line in lines)
+
+    def finish(self) -> str:
+        out = self._line(self._partial.rstrip('\r')) if self._partial else ''
+        self._partial = ''
+        return out + self._end()
+
+    def _line(self, line: str) -> str:
+        raise NotImplementedError
+
+    def _end(self) -> str:
+        return ''
+
+
+class _AssConverter(_LineConverter):
+    """ASS/SSA: Dialogue lines of the [Events] section"""
+
+    def __init__(self, writer: SrtWriter):
+        super().__init__(writer)
+        self._section = ''
+        self._fields = ASS_FIELDS
+
+    def _line(self, line: str) -> str:
+        line = line.strip()
+        if line.startswith('['):
+            self._section = line.lower()
+            return ''
+        if self._section != '[events]':
+            return ''
+
+        key, _, value = line.partition(':')
+        key = key.strip().lower()
+        if key == 'format':
+            self._fields = [field.strip().lower() for field in value.split(',')]
+            return ''
+        if key != 'dialogue':
+            return ''
+
+        values = value.split(',', len(self._fields) - 1)
+        if len(values) != len(self._fields):
+            return ''
+        event = dict(zip(self._fields, values))
+
+        text = event.get('text', '')
+        if ASS_DRAWING.search(text):
+            return ''
+        text = ASS_OVERRIDE.sub('', text).replace('\\N', '\n').replace('\\n', '\n').replace('\\h', ' ')
+        text = '\n'.join(part.strip() for part in text.split('\n') if part.strip())
+
+        start, end = self._time(event.get('start', '')), self._time(event.get('end', ''))
+        if start is None or end is None:
+            return ''
+        return self.writer.cue(start, end, text)
+
+    @staticmethod
+    def _time(value: str) -> Optional[int]:
+        match = ASS_TIME.search(value)
+        if not match:
+            return None
+        hours, minutes, seconds, fraction = match.groups()
+        return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, '0'))
+
+
+class _VttConverter(_LineConverter):
+    """WebVTT: timing line plus payload lines, blocks separated by blank lines"""
+
+    def __init__(self, writer: SrtWriter):
+        super().__init__(writer)
+        self._timing: Optional[Tuple[int, int]] = None
+        self._payload: List[str] = []
+        self._skipping = False
+
+    def _line(self, line: str) -> str:
+        if not line.strip():
+            self._skipping = False
+            return self._end()
+        if self._skipping:
+            return ''
+
+        if self._timing is None:
+            timing = VTT_TIMING.search(line)
+            if timing:
+                self._timing = (self._time(timing.group(1)), self._time(timing.group(2)))
+            elif line.startswith(VTT_BLOCKS):
+                # Header, comment, style and region blocks run to the next blank line
+                self._skipping = True
+            # Anything else is a cue identifier
+            return ''
+
+        self._payload.append(line)
+        return ''
+
+    def _end(self) -> str:
+        """Emit the cue collected so far"""
+        out = ''
+        if self._timing is not None:
+            text = '\n'.join(filter(None, (clean_markup(line) for line in self._payload)))
+            out = self.writer.cue(self._timing[0], self._timing[1], text)
+        self._timing = None
+        self._payload = []
+        return out
+
+    @staticmethod
+    def _time(value: str) -> int:
+        parts = value.split(':')
+        seconds, milliseconds = parts[-1].split('.')
+        hours = int(parts[0]) if len(parts) == 3 else 0
+        return ((hours * 60 + int(parts[-2])) * 60 + int(seconds)) * 1000 + int(milliseconds)
+
+
+CONVERTERS = {
+    'srt': _Passthrough,
+    'smi': _SmiConverter,
+    'ass': _AssConverter,
+    'vtt': _VttConverter,
+}
+
+
+class SubtitleConverter:
+    """Detects the input format from the first text and converts the rest to SRT"""
+
+    def __init__(self):
+        self.format: Optional[str] = None
+        self._writer = SrtWriter()
+        self._head = ''
+        self._converter = None
+
+    @property
+    def cues(self) -> int:
+        """Cues written (0 for passthrough SRT)"""
+        return self._writer.count
+
+    def feed(self, text: str) -> str:
+        """Convert the next piece of text; returns SRT output ready so far"""
+        if self._converter is not None:
+            return self._converter.feed(text)
+
+        self._head += text
+        if len(self._head) < DETECT_SIZE:
+            return ''
+        return self._begin()
+
+    def finish(self) -> str:
+        """Flush the remaining output"""
+        out = self._begin() if self._converter is None else ''
+        return out + self._converter.finish()
+
+    def _begin(self) -> str:
+        self.format = detect_format(self._head)
+        self._converter = CONVERTERS[self.format](self._writer)
+        head, self._head = self._head, ''
+        return self._converter.feed(head)
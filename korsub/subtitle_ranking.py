@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Release-aware ranking of subtitle candidates
+Scores each candidate's release name against the video's release (group, source,
+resolution, edition) plus frame rate, hearing-impaired flag and popularity, so the
+subtitle most likely to be in sync is downloaded first.
+"""
+
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+# Source tokens grouped by the master they come from; subtitles usually sync
+# across releases of the same family
+SOURCE_PATTERN = re.compile(
+    r'(?<![a-z0-9])(?:'
+    r'(?P<bluray>blu-?ray|bdrip|brrip|bdremux|remux|bd25|bd50)|'
+    r'(?P<web>web-?dl|webrip|web|amzn|nf|dsnp|hmax|atvp)|'
+    r'(?P<hdtv>hdtv|pdtv|dsr)|'
+    r'(?P<dvd>dvdrip|dvd-?r|dvd)|'
+    r'(?P<cam>cam|hdcam|ts|telesync|hdts)'
+    r')(?![a-z0-9])'
+)
+RESOLUTION_PATTERN = re.compile(r'(?<![a-z0-9])(2160p|4k|uhd|1080p|1080i|720p|576p|480p)(?![a-z0-9])')
+EDITION_PATTERN = re.compile(
+    r'(?<![a-z0-9])(extended|unrated|uncut|remastered|imax|theatrical|criterion|'
+    r"director'?s[ ._-]?cut|dc|final[ ._-]?cut|ultimate)(?![a-z0-9])"
+)
+# Release group is the trailing "-GROUP" of a scene name
+GROUP_PATTERN = re.compile(r'-([a-z0-9]+)(?:\[[^\]]*\])?$')
+# Trailing tokens that look like a group but are part of a source tag (e.g. "WEB-DL")
+NOT_GROUPS = frozenset({'dl', 'rip', 'ray', 'r'})
+VIDEO_EXTENSIONS = frozenset({'.mkv', '.mp4', '.avi', '.m4v', '.ts', '.wmv', '.mov', '.srt', '.smi', '.ass', '.sub'})
+
+RESOLUTION_ALIASES = {'4k': '2160p', 'uhd': '2160p', '1080i': '1080p'}
+
+# Score weights
+MOVIEHASH_MATCH = 1000.0
+GROUP_MATCH = 40.0
+SOURCE_MATCH = 25.0
+SOURCE_MISMATCH = -10.0
+RESOLUTION_MATCH = 10.0
+EDITION_MATCH = 15.0
+EDITION_MISMATCH = -15.0
+FPS_MATCH = 20.0
+FPS_MISMATCH = -30.0
+HEARING_IMPAIRED = -5.0
+FOREIGN_PARTS_ONLY = -50.0
+MACHINE_TRANSLATED = -20.0
+MAX_POPULARITY = 20.0
+
+
+class ReleaseInfo:
+    """Tokens parsed from a release or file name"""
+
+    __slots__ = ('group', 'source', 'resolution', 'editions')
+
+    def __init__(self, group: Optional[str], source: Optional[str], resolution: Optional[str], editions: FrozenSet[str]):
+        self.group = group
+        self.source = source
+        self.resolution = resolution
+        self.editions = editions
+
+    def __repr__(self):
+        return f"ReleaseInfo(group={self.group!r}, source={self.source!r}, resolution={self.resolution!r}, editions={set(self.editions)!r})"
+
+
+@lru_cache(maxsize=8192)
+def parse_release(name: str) -> ReleaseInfo:
+    """
+    Parse release tokens from a scene/release or file name
+
+    Args:
+        name: e.g. "Tron.Legacy.2010.1080p.BluRay.x264-SPARKS.mkv"
+
+    Returns:
+        ReleaseInfo (fields are None when not present)
+    """
+    name = (name or '').strip().lower()
+    suffix = Path(name).suffix
+    if suffix in VIDEO_EXTENSIONS:
+        name = name[:-len(suffix)]
+
+    source = None
+    match = SOURCE_PATTERN.search(name)
+    if match:
+        source = match.lastgroup
+
+    resolution = None
+    match = RESOLUTION_PATTERN.search(name)
+    if match:
+        resolution = RESOLUTION_ALIASES.get(match.group(1), match.group(1))
+
+    editions = frozenset(
+        'directors_cut' if edition.startswith('director') or edition == 'dc' else re.sub(r'[ ._-]', '', edition)
+        for edition in EDITION_PATTERN.findall(name)
+    )
+
+    match = GROUP_PATTERN.search(name)
+    group = match.group(1) if match and match.group(1) not in NOT_GROUPS else None
+
+    return ReleaseInfo(group, source, resolution, editions)
+
+
+def score_candidate(video: ReleaseInfo, details: Dict, video_fps: Optional[float] = None) -> float:
+    """
+    Score one candidate against the video
+
+    Args:
+        video: Parsed video release
+        details: Candidate fields as returned by OpenSubtitlesAPI.get_subtitle_details()
+            (only 'release' is required)
+        video_fps: Video frame rate if known
+
+    Returns:
+        Score, higher is better
+    """
+    score = 0.0
+
+    if details.get('moviehash_match'):
+        score += MOVIEHASH_MATCH
+
+    release = parse_release(details.get('release') or '')
+
+    if video.group and release.group == video.group:
+        score += GROUP_MATCH
+    if video.source and release.source:
+        score += SOURCE_MATCH if release.source == video.source else SOURCE_MISMATCH
+    if video.resolution and release.resolution == video.resolution:
+        score += RESOLUTION_MATCH
+    if video.editions or release.editions:
+        score += EDITION_MATCH if video.editions == release.editions else EDITION_MISMATCH
+
+    fps = details.get('fps')
+    if video_fps and fps:
+        score += FPS_MATCH if abs(float(fps) - float(video_fps)) < 0.01 else FPS_MISMATCH
+
+    if details.get('hearing_impaired'):
+        score += HEARING_IMPAIRED
+    if details.get('foreign_parts_only'):
+        score += FOREIGN_PARTS_ONLY
+    if details.get('machine_translated') or details.get('ai_translated'):
+        score += MACHINE_TRANSLATED
+
+    downloads = details.get('downloads') or 0
+    score += min(math.log10(downloads + 1) * 5, MAX_POPULARITY)
+    score += float(details.get('ratings') or 0)
+
+    return score
+
+
+def rank_candidates(
+    candidates: List[Tuple[Any, Dict]],
+    video_name: Optional[str],
+    video_fps: Optional[float] = None
+) -> List[Any]:
+    """
+    Rank subtitle candidates for a video in one pass
+
+    Args:
+        candidates: (result, details) pairs; details as from get_subtitle_details()
+        video_name: Scene name or file name of the video
+        video_fps: Video frame rate if known
+
+    Returns:
+        Results ordered best first (ties keep provider order)
+    """
+    if len(candidates) < 2:
+        return [result for result, _ in candidates]
+
+    video = parse_release(Path(video_name).name if video_name else '')
+    scored = [
+        (-score_candidate(video, details, video_fps), index, result)
+        for index, (result, details) in enumerate(candidates)
+    ]
+    scored.sort(key=lambda entry: (entry[0], entry[1]))
+    return [result for _, _, result in scored]
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Streaming sink for downloaded subtitle files
+Zip/7z downloads are unpacked in memory (see subtitle_archive). Chunks are decoded
+as they arrive (BOM, UTF-8 or CP949/EUC-KR, detected from the
+leading bytes), converted to SRT if they are SAMI/ASS/WebVTT, re-encoded as UTF-8
+and written to a temporary file next to the target, which is fsynced and renamed
+into place only once the download completed. An interrupted download never
+leaves a truncated subtitle behind.
+"""
+
+import io
+import os
+import re
+import codecs
+import logging
+import time
+import tempfile
+from typing import Iterable, Optional
+
+from subtitle_archive import MAGIC_SIZE, archive_type, iter_member
+from subtitle_convert import SubtitleConverter
+
+logger = logging.getLogger("SubtitleSink")
+
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+# Bytes of non-ASCII text inspected before choosing between UTF-8 and CP949
+PROBE_SIZE = 4096
+
+NON_ASCII = re.compile(rb'[\x80-\xff]')
+
+# CP949 is a superset of EUC-KR, the usual legacy encoding of Korean subtitles
+LEGACY_ENCODING = 'cp949'
+
+
+class StreamDecoder:
+    """Incremental decoder that picks the encoding from the first bytes it sees"""
+
+    def __init__(self, probe_size: int = PROBE_SIZE):
+        self.probe_size = probe_size
+        self.encoding: Optional[str] = None
+        self._pending = b''
+        self._decoder = None
+        self._at_start = True
+
+    def feed(self, chunk: bytes, final: bool = False) -> str:
+        """
+        Decode the next chunk
+
+        Args:
+            chunk: Raw bytes
+            final: True for the last call (flushes buffered bytes)
+
+        Returns:
+            Text decoded so far (may be empty while the encoding is undecided)
+        """
+        if self._decoder is not None:
+            return self._decoder.decode(chunk, final)
+
+        data = self._pending + chunk
+        self._pending = b''
+
+        if self._at_start:
+            # A BOM needs up to 3 bytes to recognize
+            if len(data) < 3 and not final:
+                self._pending = data
+                return ''
+            self._at_start = False
+            for bom, encoding in BOMS:
+                if data.startswith(bom):
+                    return self._choose(encoding, data[len(bom):], final)
+
+        # ASCII reads the same in every candidate encoding, so it passes through
+        # while we wait for the first byte that tells them apart
+        match = NON_ASCII.search(data)
+        ascii_end = match.start() if match else len(data)
+        text = data[:ascii_end].decode('ascii')
+        rest = data[ascii_end:]
+        if not rest:
+            if final:
+                self.encoding = 'utf-8'
+            return text
+
+        if len(rest) < self.probe_size and not final:
+            self._pending = rest
+            return text
+
+        try:
+            codecs.getincrementaldecoder('utf-8')('strict').decode(rest, final)
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            encoding = LEGACY_ENCODING
+        return text + self._choose(encoding, rest, final)
+
+    def _choose(self, encoding: str, data: bytes, final: bool) -> str:
+        self.encoding = encoding
+        self._decoder = codecs.getincrementaldecoder(encoding)('replace')
+        return self._decoder.decode(data, final)
+
+
+class SubtitleSink:
+    """
+    Write a subtitle download to disk as UTF-8, atomically
+
+    Use as a context manager: the file appears at save_path only if the block
+    completes; on an exception the temporary file is removed.
+    """
+
+    def __init__(self, save_path: str, convert: bool = True):
+        """
+        Initialize sink
+
+        Args:
+            save_path: Final subtitle path (e.g. movie.ko.srt)
+            convert: Convert SAMI/ASS/WebVTT input to SRT
+        """
+        self.save_path = str(save_path)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.convert_seconds = 0.0
+        self.archive: Optional[str] = None
+
+        # Leading bytes held until the archive magic can be checked, then the
+        # whole archive if it is one
+        self._head: Optional[bytes] = b''
+        self._archive_data: Optional[io.BytesIO] = None
+
+        self._decoder = StreamDecoder()
+        self._converter = SubtitleConverter() if convert else None
+        self._encoder = codecs.getincrementalencoder('utf-8')()
+        directory, name = os.path.split(os.path.abspath(self.save_path))
+        fd, self._temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".part", dir=directory)
+        self._file = os.fdopen(fd, 'wb')
+
+    @property
+    def encoding(self) -> Optional[str]:
+        """Detected source encoding"""
+        return self._decoder.encoding
+
+    @property
+    def format(self) -> Optional[str]:
+        """Detected source format ("srt", "smi", "ass" or "vtt")"""
+        return self._converter.format if self._converter is not None else None
+
+    def write(self, chunk: bytes):
+        """Add the next downloaded chunk"""
+        self.bytes_in += len(chunk)
+
+        if self._archive_data is not None:
+            self._archive_data.write(chunk)
+            return
+
+        if self._head is not None:
+            self._head += chunk
+            if len(self._head) < MAGIC_SIZE:
+                return
+            chunk, self._head = self._head, None
+            self.archive = archive_type(chunk)
+            if self.archive:
+                self._archive_data = io.BytesIO(chunk)
+                self._archive_data.seek(0, io.SEEK_END)
+                return
+
+        self._process(chunk)
+
+    def commit(self):
+        """
+        Flush, fsync and rename the file into place
+
+        Raises:
+            ArchiveError: Archive unsupported or without a subtitle (nothing is written)
+        """
+        try:
+            if self._archive_data is not None:
+                data, self._archive_data = self._archive_data.getvalue(), None
+                for chunk in iter_member(data, self.archive, os.path.basename(self.save_path)):
+                    self._process(chunk)
+            elif self._head:
+                self._process(self._head)
+            self._head = None
+            self._write_text(self._convert(self._decoder.feed(b'', final=True), final=True))
+
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            os.chmod(self._temp_path, 0o644)
+            os.replace(self._temp_path, self.save_path)
+        except Exception:
+            self.abort()
+            raise
+
+        # Persist the rename itself
+        dir_fd = os.open(os.path.dirname(os.path.abspath(self.save_path)), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+        logger.debug(
+            f"Saved {self.save_path} ({self.format} {self.encoding} -> srt utf-8, "
+            f"{self.bytes_in} -> {self.bytes_out} bytes, converted in {self.convert_seconds * 1000:.1f} ms)"
+        )
+
+    def abort(self):
+        """Discard the partial file"""
+        self._file.close()
+        try:
+            os.unlink(self._temp_path)
+        except FileNotFoundError:
+            pass
+
+    def _process(self, chunk: bytes):
+        """Decode, convert and write subtitle bytes"""
+        self._write_text(self._convert(self._decoder.feed(chunk)))
+
+    def _convert(self, text: str, final: bool = False) -> str:
+        if self._converter is None:
+            return text
+        started = time.perf_counter()
+        out = self._converter.feed(text) if text else ''
+        if final:
+            out += self._converter.finish()
+        self.convert_seconds += time.perf_counter() - started
+        return out
+
+    def _write_text(self, text: str):
+        if text:
+            data = self._encoder.encode(text)
+            self.bytes_out += len(data)
+            self._file.write(data)
+
+    def __enter__(self) -> 'SubtitleSink':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+def save_subtitle(chunks: Iterable[bytes], save_path: str) -> SubtitleSink:
+    """
+    Stream chunks into save_path as UTF-8, replacing it atomically
+
+    Args:
+        chunks: Downloaded bytes (e.g. response.iter_content())
+        save_path: Final subtitle path
+
+    Returns:
+        The committed sink (archive, format, encoding, bytes_in, bytes_out, convert_seconds)
+    """
+    with SubtitleSink(save_path) as sink:
+        for chunk in chunks:
+            sink.write(chunk)
+    return sink
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Production serving for the KorSub Flask apps
+Requests are served by waitress with a pool of worker threads, so webhook
+bursts and slow manual searches don't queue behind each other. On SIGTERM or
+SIGINT the server stops accepting connections, lets in-flight requests finish,
+runs the app's shutdown hook (e.g. draining the job queue) and exits; a
+second signal stops at once.
+SERVER=flask falls back to Flask's development server.
+"""
+
+import os
+import sys
+import time
+import signal
+import logging
+import _thread
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger("Server")
+
+SERVER_MODES = ('waitress', 'flask')
+
+
+def serve(
+    app,
+    port: int,
+    threads: Optional[int] = None,
+    drain_timeout: float = 30,
+    on_shutdown: Optional[Callable[[], None]] = None
+):
+    """
+    Serve a WSGI app until SIGTERM/SIGINT
+
+    Args:
+        app: Flask (WSGI) application
+        port: Port to listen on (all interfaces)
+        threads: Request worker threads; defaults to SERVER_THREADS (8)
+        drain_timeout: Seconds to wait for in-flight requests on shutdown
+        on_shutdown: Called once on shutdown, after in-flight requests
+    """
+    mode = os.getenv("SERVER", "waitress").lower()
+    if mode not in SERVER_MODES:
+        raise ValueError(f"SERVER must be {' or '.join(SERVER_MODES)}, not {mode!r}")
+    threads = threads or int(os.getenv("SERVER_THREADS", "8"))
+
+    if mode == 'waitress':
+        try:
+            from waitress import create_server
+        except ImportError:
+            logger.warning("waitress is not installed, using Flask's development server")
+            mode = 'flask'
+
+    if mode == 'flask':
+        def shutdown(signum, frame):
+            logger.info(f"🛑 Received signal {signum}, shutting down")
+            if on_shutdown:
+                on_shutdown()
+            sys.exit(0)
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+        app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
+        return
+
+    server = create_server(app, host='0.0.0.0', port=port, threads=threads, ident='KorSub')
+    stopping = threading.Event()
+
+    def drain():
+        deadline = time.monotonic() + drain_timeout
+        while _busy(server) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        if _busy(server):
+            logger.warning(f"⚠️  Requests still running after {drain_timeout}s, closing anyway")
+
+        if on_shutdown:
+            on_shutdown()
+
+        # Delivered to shutdown() below, which ends server.run() in the main thread
+        _thread.interrupt_main()
+
+    def shutdown(signum, frame):
+        if stopping.is_set():
+            # Drain finished, or a second signal: stop now
+            raise KeyboardInterrupt
+        stopping.set()
+        logger.info(f"🛑 Received signal {signum}, no longer accepting connections")
+        server.accepting = False
+        threading.Thread(target=drain, name="drain", daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    logger.info(f"🌐 Serving on port {port} with {threads} worker thread(s)")
+    server.run()
+    logger.info("👋 Server stopped")
+
+
+def _busy(server) -> bool:
+    """Any request being handled or response still being sent"""
+    return any(
+        channel.requests or channel.total_outbufs_len
+        for channel in list(server.active_channels.values())
+    )